@@ -0,0 +1,23 @@
+{#
+    Fixed-size quantile sketch helpers.
+
+    A sketch is an ascending double precision[] holding the value at each
+    evenly spaced quantile (0.00, 0.01, ..., 1.00 for the default size of 101).
+    It is small enough to store per partition and can be merged across
+    partitions by weighting each point with the partition row count.
+#}
+
+{% macro quantile_sketch(column) %}
+    {%- set size = var('quantile_sketch_size') -%}
+    PERCENTILE_CONT(ARRAY[
+        {%- for i in range(size) -%}
+            {{ (i / (size - 1)) | round(6) }}{{ ", " if not loop.last }}
+        {%- endfor -%}
+    ]::double precision[]) WITHIN GROUP (ORDER BY {{ column }})
+{%- endmacro %}
+
+{# Read a single quantile from an unmerged (single partition) sketch. #}
+{% macro sketch_quantile(sketch, q) %}
+    {%- set size = var('quantile_sketch_size') -%}
+    {{ sketch }}[{{ ((q * (size - 1)) | round | int) + 1 }}]
+{%- endmacro %}
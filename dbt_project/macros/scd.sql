@@ -0,0 +1,31 @@
+-- Helpers for the SCD2 snapshots in snapshots/ and the point-in-time joins
+-- against them.
+
+-- Hash of a dimension row's tracked attributes; snapshots compare this one
+-- column instead of every attribute.
+{% macro row_hash(columns) %}
+    md5(concat_ws('|'
+    {%- for col in columns %}, coalesce({{ col }}::text, ''){% endfor %}))
+{% endmacro %}
+
+-- Indexes a snapshot needs, run as its post-hook:
+--   (key, dbt_valid_from, dbt_valid_to)  point-in-time lookups by validity range
+--   (key) WHERE dbt_valid_to IS NULL     current version; used by the snapshot
+--                                         merge itself and by current-state joins
+{% macro scd_indexes(key) %}
+    CREATE INDEX IF NOT EXISTS {{ this.identifier }}_{{ key }}_validity
+        ON {{ this }} ({{ key }}, dbt_valid_from, dbt_valid_to);
+    CREATE INDEX IF NOT EXISTS {{ this.identifier }}_{{ key }}_current
+        ON {{ this }} ({{ key }}) WHERE dbt_valid_to IS NULL
+{% endmacro %}
+
+-- Join predicate selecting the snapshot version valid at as_of (a timestamp
+-- literal); the current version when as_of is none.
+{% macro scd_valid_at(alias, as_of=none) %}
+    {%- if as_of is none -%}
+    {{ alias }}.dbt_valid_to IS NULL
+    {%- else -%}
+    {{ alias }}.dbt_valid_from <= '{{ as_of }}'::timestamp
+    AND ({{ alias }}.dbt_valid_to > '{{ as_of }}'::timestamp OR {{ alias }}.dbt_valid_to IS NULL)
+    {%- endif -%}
+{% endmacro %}
@@ -0,0 +1,8 @@
+-- Sample runs (run_pipeline.py --sample) pass --vars '{schema_suffix: _sample}'
+-- so every model builds into <schema>_sample (analytics_sample) and reads the
+-- raw_sample source; full runs leave the suffix empty. Snapshots take the same
+-- suffix in their target_schema config.
+{% macro generate_schema_name(custom_schema_name, node) -%}
+    {%- set base = target.schema if custom_schema_name is none else custom_schema_name | trim -%}
+    {{ base }}{{ var('schema_suffix', '') }}
+{%- endmacro %}
@@ -1,11 +1,7 @@
-WITH src AS (
-    SELECT DISTINCT
-        cui,
-        intreprindere
-    FROM {{ ref('stg_indemnizatii_clean') }}
-)
-
+-- One row per CUI; name variants of the same company collapse to one name.
 SELECT
     cui AS company_id,
-    trim(upper(intreprindere)) AS nume_companie
-FROM src
\ No newline at end of file
+    MIN(trim(upper(intreprindere))) AS nume_companie,
+    MIN(trim(autoritate_tutelara)) AS autoritate_tutelara
+FROM {{ ref('stg_indemnizatii_clean') }}
+GROUP BY cui
@@ -6,9 +6,12 @@ WITH src AS (
         intreprindere,
         cui,
         nume,
+        person_key,
         functie,
         suma_clean,
         variabila_clean,
+        source_line,
+        raw_hash,
         created_at
     FROM {{ ref('stg_indemnizatii_clean') }}
 )
@@ -20,9 +23,12 @@ SELECT
     intreprindere,
     cui,
     nume,
+    person_key,
     functie,
     COALESCE(suma_clean, 0) AS suma_clean,
     COALESCE(variabila_clean, 0) AS variabila_clean,
     COALESCE(suma_clean, 0) + COALESCE(variabila_clean, 0) AS total_plata,
+    source_line,
+    raw_hash,
     created_at
 FROM src
\ No newline at end of file
@@ -1,10 +1,8 @@
-WITH src AS (
-    SELECT DISTINCT
-        nume
-    FROM {{ ref('stg_indemnizatii_clean') }}
-)
-
+-- One row per person as resolved by the match_persons stage: spelling
+-- variants of a name share a person_key, shown under one normalized name.
 SELECT
-    md5(trim(upper(nume))) AS person_id,
-    trim(upper(nume)) AS nume_normalizat
-FROM src
\ No newline at end of file
+    person_key AS person_id,
+    MIN(trim(upper(nume))) AS nume_normalizat
+FROM {{ ref('stg_indemnizatii_clean') }}
+WHERE person_key IS NOT NULL
+GROUP BY person_key
\ No newline at end of file
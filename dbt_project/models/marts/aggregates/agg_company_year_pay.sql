@@ -0,0 +1,41 @@
+{{
+    config(
+        materialized='incremental',
+        unique_key='an_raportare',
+        incremental_strategy='delete+insert'
+    )
+}}
+
+-- Per-company, per-year pay summary that the analytics marts read from.
+-- On incremental runs only the reporting years present in the latest load are
+-- recomputed (delete+insert replaces the whole year, so companies dropped from
+-- a republished year do not linger). Years from earlier loads are kept as-is,
+-- so multi-year history does not have to be re-aggregated on every run.
+
+WITH touched AS (
+    SELECT DISTINCT an_raportare
+    FROM {{ ref('fact_indemnizatii') }}
+    {% if is_incremental() %}
+    WHERE loaded_at > (SELECT COALESCE(MAX(loaded_at), '-infinity') FROM {{ this }})
+    {% endif %}
+),
+
+f AS (
+    SELECT f.*
+    FROM {{ ref('fact_indemnizatii') }} f
+    JOIN touched t
+        ON f.an_raportare = t.an_raportare
+    WHERE f.company_id IS NOT NULL
+)
+
+SELECT
+    company_id,
+    an_raportare,
+    COUNT(*) AS num_people,
+    SUM(total_plata) AS total_spend,
+    MIN(total_plata) AS lowest,
+    MAX(total_plata) AS highest,
+    {{ quantile_sketch('total_plata') }} AS quantile_sketch,
+    MAX(loaded_at) AS loaded_at
+FROM f
+GROUP BY 1, 2
@@ -0,0 +1,35 @@
+{{
+    config(
+        materialized='incremental',
+        unique_key='an_raportare',
+        incremental_strategy='delete+insert',
+        post_hook="CREATE UNIQUE INDEX IF NOT EXISTS {{ this.identifier }}_pair_year ON {{ this }} (person_id, company_id, an_raportare)"
+    )
+}}
+
+-- Pay per person-company pair and reporting year, kept across loads the same
+-- way as agg_company_year_pay: only the years present in the latest load are
+-- replaced. The unique (person_id, company_id, an_raportare) index is what
+-- compensation_yoy joins consecutive periods on.
+
+WITH touched AS (
+    SELECT DISTINCT an_raportare
+    FROM {{ ref('fact_indemnizatii') }}
+    {% if is_incremental() %}
+    WHERE loaded_at > (SELECT COALESCE(MAX(loaded_at), '-infinity') FROM {{ this }})
+    {% endif %}
+)
+
+SELECT
+    f.person_id,
+    f.company_id,
+    f.an_raportare,
+    COUNT(*) AS num_rows,
+    SUM(f.total_plata) AS total_plata,
+    MAX(f.loaded_at) AS loaded_at
+FROM {{ ref('fact_indemnizatii') }} f
+JOIN touched t
+    ON f.an_raportare = t.an_raportare
+WHERE f.person_id IS NOT NULL
+  AND f.company_id IS NOT NULL
+GROUP BY 1, 2, 3
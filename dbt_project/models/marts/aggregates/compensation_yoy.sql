@@ -0,0 +1,92 @@
+{{
+    config(
+        materialized='incremental',
+        unique_key='an_raportare',
+        incremental_strategy='delete+insert',
+        post_hook="CREATE INDEX IF NOT EXISTS {{ this.identifier }}_pair_year ON {{ this }} (person_id, company_id, an_raportare)"
+    )
+}}
+
+-- Year-over-year change per person-company pair: absolute and percent change
+-- against the previous reporting year, pay volatility over the last
+-- var('yoy_volatility_periods') years and the shift of the person's pay rank
+-- within the company.
+--
+-- Consecutive periods are aligned by a key join on the unique
+-- (person_id, company_id, an_raportare) index of agg_person_company_year.
+-- Incremental runs only compute the years loaded since the last run, plus the
+-- years after each of them that still see it: t + 1 through its previous
+-- period and rank, t + 1 .. t + periods - 1 through the volatility window.
+
+{% set periods = var('yoy_volatility_periods') %}
+{#- referenced directly (not through a CTE) so the joins can use its index -#}
+{% set history = ref('agg_person_company_year') %}
+
+WITH touched AS (
+    SELECT DISTINCT an_raportare
+    FROM {{ history }}
+    {% if is_incremental() %}
+    WHERE loaded_at > (SELECT COALESCE(MAX(loaded_at), '-infinity') FROM {{ this }})
+    {% endif %}
+),
+
+years AS (
+    SELECT an_raportare FROM touched
+    UNION
+    SELECT DISTINCT h.an_raportare
+    FROM {{ history }} h
+    JOIN touched t
+        ON h.an_raportare - t.an_raportare
+           IN (SELECT generate_series(1, GREATEST({{ periods }} - 1, 1)))
+),
+
+-- Pay rank within the company, for the computed years and the years before them
+ranks AS (
+    SELECT
+        person_id,
+        company_id,
+        an_raportare,
+        RANK() OVER (PARTITION BY company_id, an_raportare ORDER BY total_plata DESC) AS rank_in_company
+    FROM {{ history }}
+    WHERE an_raportare IN (
+        SELECT an_raportare FROM years
+        UNION
+        SELECT an_raportare - 1 FROM years
+    )
+)
+
+SELECT
+    c.person_id,
+    c.company_id,
+    c.an_raportare,
+    c.total_plata,
+    p.total_plata AS prev_total_plata,
+    c.total_plata - p.total_plata AS abs_change,
+    ROUND(100.0 * (c.total_plata - p.total_plata) / NULLIF(p.total_plata, 0), 2) AS pct_change,
+    ROUND(v.volatility::numeric, 4) AS volatility,
+    rc.rank_in_company,
+    rp.rank_in_company - rc.rank_in_company AS rank_shift,
+    c.loaded_at
+FROM {{ history }} c
+JOIN years y
+    ON c.an_raportare = y.an_raportare
+LEFT JOIN {{ history }} p
+    ON p.person_id = c.person_id
+    AND p.company_id = c.company_id
+    AND p.an_raportare = c.an_raportare - 1
+LEFT JOIN ranks rc
+    ON rc.person_id = c.person_id
+    AND rc.company_id = c.company_id
+    AND rc.an_raportare = c.an_raportare
+LEFT JOIN ranks rp
+    ON rp.person_id = c.person_id
+    AND rp.company_id = c.company_id
+    AND rp.an_raportare = c.an_raportare - 1
+-- Coefficient of variation of the pair's pay over the trailing window
+LEFT JOIN LATERAL (
+    SELECT stddev_samp(w.total_plata) / NULLIF(AVG(w.total_plata), 0) AS volatility
+    FROM {{ history }} w
+    WHERE w.person_id = c.person_id
+      AND w.company_id = c.company_id
+      AND w.an_raportare BETWEEN c.an_raportare - {{ periods }} + 1 AND c.an_raportare
+) v ON TRUE
@@ -1,14 +1,13 @@
 SELECT
-    f.an_raportare,
+    a.an_raportare,
     c.denumire AS companie,
-    AVG(f.total_plata) AS avg_salary,
-    MIN(f.total_plata) AS lowest,
-    PERCENTILE_CONT(0.5) WITHIN GROUP (ORDER BY f.total_plata) AS median_salary,
-    MAX(f.total_plata) AS highest,
-    SUM(f.total_plata) AS total_spend,
-    COUNT(*) AS num_people
-FROM {{ ref('fact_indemnizatii') }} f
+    a.total_spend::numeric / a.num_people AS avg_salary,
+    a.lowest,
+    {{ sketch_quantile('a.quantile_sketch', 0.5) }} AS median_salary,
+    a.highest,
+    a.total_spend,
+    a.num_people
+FROM {{ ref('agg_company_year_pay') }} a
 JOIN {{ ref('dim_companii') }} c
-    ON f.company_id = c.company_id
-GROUP BY 1, 2
-ORDER BY total_spend DESC
\ No newline at end of file
+    ON a.company_id = c.company_id
+ORDER BY total_spend DESC
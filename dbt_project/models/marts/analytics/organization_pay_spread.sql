@@ -1,10 +1,62 @@
+-- Spread across all reporting years per institution.
+-- p90/p10 come from merging the per-year quantile sketches: every sketch point
+-- carries an equal share of its partition's row count, and the quantile is the
+-- first point whose cumulative share reaches q. For a single-year institution
+-- this returns exactly the stored quantile.
+
+WITH partitions AS (
+    SELECT
+        c.denumire,
+        a.num_people,
+        a.lowest,
+        a.highest,
+        a.quantile_sketch
+    FROM {{ ref('agg_company_year_pay') }} a
+    JOIN {{ ref('dim_companii') }} c
+        ON a.company_id = c.company_id
+),
+
+points AS (
+    SELECT
+        a.denumire,
+        s.value,
+        a.num_people::double precision / {{ var('quantile_sketch_size') }} AS weight
+    FROM partitions a
+    CROSS JOIN LATERAL unnest(a.quantile_sketch) AS s(value)
+),
+
+cumulative AS (
+    SELECT
+        denumire,
+        value,
+        SUM(weight) OVER (PARTITION BY denumire ORDER BY value ROWS UNBOUNDED PRECEDING)
+            / SUM(weight) OVER (PARTITION BY denumire) AS cum_share
+    FROM points
+),
+
+merged AS (
+    SELECT
+        denumire,
+        MIN(value) FILTER (WHERE cum_share >= 0.9) AS p90,
+        MIN(value) FILTER (WHERE cum_share >= 0.1) AS p10
+    FROM cumulative
+    GROUP BY 1
+),
+
+bounds AS (
+    SELECT
+        denumire,
+        MAX(highest) - MIN(lowest) AS spread
+    FROM partitions
+    GROUP BY 1
+)
+
 SELECT
-    c.denumire,
-    MAX(f.total_plata) - MIN(f.total_plata) AS spread,
-    PERCENTILE_CONT(0.9) WITHIN GROUP (ORDER BY f.total_plata) AS p90,
-    PERCENTILE_CONT(0.1) WITHIN GROUP (ORDER BY f.total_plata) AS p10
-FROM {{ ref('fact_indemnizatii') }} f
-JOIN {{ ref('dim_companii') }} c
-    ON f.company_id = c.company_id
-GROUP BY 1
-ORDER BY spread DESC
\ No newline at end of file
+    b.denumire,
+    b.spread,
+    m.p90,
+    m.p10
+FROM bounds b
+JOIN merged m
+    ON b.denumire = m.denumire
+ORDER BY spread DESC
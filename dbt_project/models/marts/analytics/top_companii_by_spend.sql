@@ -1,9 +1,9 @@
 SELECT
-    f.an_raportare,
+    a.an_raportare,
     c.denumire as companie,
-    SUM(f.total_plata) AS total_spend
-FROM {{ ref('fact_indemnizatii') }} f
+    SUM(a.total_spend) AS total_spend
+FROM {{ ref('agg_company_year_pay') }} a
 JOIN {{ ref('dim_companii') }} c
-    ON f.company_id = c.company_id
+    ON a.company_id = c.company_id
 GROUP BY 1, 2
-ORDER BY total_spend DESC
\ No newline at end of file
+ORDER BY total_spend DESC
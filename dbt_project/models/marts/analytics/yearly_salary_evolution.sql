@@ -1,11 +1,11 @@
 SELECT
     c.denumire AS companie,
-    f.an_raportare,
-    SUM(total_plata) AS total_spend,
-    AVG(total_plata) AS avg_salary,
-    COUNT(*) AS num_people
-FROM {{ ref('fact_indemnizatii') }} f
+    a.an_raportare,
+    SUM(a.total_spend) AS total_spend,
+    SUM(a.total_spend)::numeric / SUM(a.num_people) AS avg_salary,
+    SUM(a.num_people) AS num_people
+FROM {{ ref('agg_company_year_pay') }} a
 JOIN {{ ref('dim_companii')}} c
-    ON f.company_id = c.company_id
+    ON a.company_id = c.company_id
 GROUP BY 1, 2
-ORDER BY companie, an_raportare DESC
\ No newline at end of file
+ORDER BY companie, an_raportare DESC
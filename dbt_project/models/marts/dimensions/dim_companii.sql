@@ -1,5 +1,7 @@
 SELECT
     company_id,
-    nume_companie AS denumire
+    nume_companie AS denumire,
+    autoritate_tutelara,
+    {{ row_hash(['nume_companie', 'autoritate_tutelara']) }} AS row_hash
 FROM {{ ref('int_companii_clean') }}
-WHERE company_id IS NOT NULL
\ No newline at end of file
+WHERE company_id IS NOT NULL
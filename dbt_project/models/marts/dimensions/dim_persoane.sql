@@ -1,5 +1,6 @@
 SELECT
     person_id,
-    nume_normalizat
+    nume_normalizat,
+    {{ row_hash(['nume_normalizat']) }} AS row_hash
 FROM {{ ref('int_persoane_clean') }}
-WHERE person_id IS NOT NULL
\ No newline at end of file
+WHERE person_id IS NOT NULL
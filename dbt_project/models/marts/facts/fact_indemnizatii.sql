@@ -20,10 +20,13 @@ SELECT
     b.total_plata,
     b.suma_clean,
     b.variabila_clean,
+    b.source_line,
+    b.raw_hash,
+    b.created_at AS loaded_at,
 
     {{ var('indemnizatii_year') }} AS an_raportare
 FROM b
 LEFT JOIN p
-    ON trim(upper(p.nume_normalizat)) = trim(upper(b.nume))
+    ON p.person_id = b.person_key
 LEFT JOIN c
     ON c.company_id = b.cui
\ No newline at end of file
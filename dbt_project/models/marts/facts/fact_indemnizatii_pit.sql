@@ -0,0 +1,30 @@
+-- Compensation facts with the person and company attributes that were valid
+-- at a point in time, from the SCD2 snapshots. Defaults to the current
+-- versions; for history pass a timestamp:
+--   dbt run -s fact_indemnizatii_pit --vars '{as_of: "2026-01-01"}'
+-- The joins are range lookups on the snapshots' (key, dbt_valid_from,
+-- dbt_valid_to) indexes.
+
+{% set as_of = var('as_of', none) %}
+
+SELECT
+    f.pk,
+    f.person_id,
+    p.nume_normalizat AS nume,
+    f.company_id,
+    c.denumire AS companie,
+    c.autoritate_tutelara,
+    f.total_plata,
+    f.suma_clean,
+    f.variabila_clean,
+    f.an_raportare,
+    f.loaded_at,
+    p.dbt_valid_from AS person_valid_from,
+    c.dbt_valid_from AS company_valid_from
+FROM {{ ref('fact_indemnizatii') }} f
+LEFT JOIN {{ ref('snap_persoane') }} p
+    ON p.person_id = f.person_id
+    AND {{ scd_valid_at('p', as_of) }}
+LEFT JOIN {{ ref('snap_companii') }} c
+    ON c.company_id = f.company_id
+    AND {{ scd_valid_at('c', as_of) }}
@@ -14,11 +14,14 @@ cleaned AS (
         intreprindere,
         cui,
         personal AS nume,
+        person_key,
         calitate_membru AS functie,
         suma AS suma_raw,
         indemnizatie_variabila AS variabila_raw,
         suma_num AS suma_clean,
         indemnizatie_variabila_num AS variabila_clean,
+        source_line,
+        raw_hash,
         created_at
 
     FROM src
@@ -0,0 +1,25 @@
+{% snapshot snap_companii %}
+
+{{
+    config(
+        target_schema='snapshots' ~ var('schema_suffix', ''),
+        unique_key='company_id',
+        strategy='check',
+        check_cols=['row_hash'],
+        hard_deletes='invalidate',
+        post_hook="{{ scd_indexes('company_id') }}"
+    )
+}}
+
+-- SCD2 history of dim_companii (business key: CUI). Versions are compared on
+-- the precomputed row_hash only, so a run writes rows just for companies
+-- that were renamed, moved to another authority, appeared or disappeared.
+
+SELECT
+    company_id,
+    denumire,
+    autoritate_tutelara,
+    row_hash
+FROM {{ ref('dim_companii') }}
+
+{% endsnapshot %}
@@ -0,0 +1,24 @@
+{% snapshot snap_persoane %}
+
+{{
+    config(
+        target_schema='snapshots' ~ var('schema_suffix', ''),
+        unique_key='person_id',
+        strategy='check',
+        check_cols=['row_hash'],
+        hard_deletes='invalidate',
+        post_hook="{{ scd_indexes('person_id') }}"
+    )
+}}
+
+-- SCD2 history of dim_persoane. Versions are compared on the precomputed
+-- row_hash only, so a run writes rows just for persons that changed,
+-- appeared or disappeared.
+
+SELECT
+    person_id,
+    nume_normalizat,
+    row_hash
+FROM {{ ref('dim_persoane') }}
+
+{% endsnapshot %}
@@ -1,7 +1,37 @@
+# The handler imports the repo's cleaning and S3 layout modules, so the ZIP
+# carries those files next to handler.py. pandas/pyarrow come from a layer
+# (var.pandas_layer_arns, e.g. the AWS SDK for pandas layer); boto3 ships
+# with the runtime.
+locals {
+  repo_root = "${path.module}/../.."
+  lambda_repo_modules = [
+    "scripts/__init__.py",
+    "scripts/common/__init__.py",
+    "scripts/common/artifacts.py",
+    "scripts/common/schema.py",
+    "scripts/common/tracing.py",
+    "scripts/clean/data_clean.py",
+    "scripts/clean/s3_layout.py",
+    "scripts/clean/segment_words.py",
+  ]
+}
+
 data "archive_file" "lambda_zip" {
   type        = "zip"
-  source_dir  = "${path.module}/lambda_src"
   output_path = "${path.module}/lambda_package.zip"
+
+  source {
+    content  = file("${path.module}/lambda_src/handler.py")
+    filename = "handler.py"
+  }
+
+  dynamic "source" {
+    for_each = toset(local.lambda_repo_modules)
+    content {
+      content  = file("${local.repo_root}/${source.value}")
+      filename = source.value
+    }
+  }
 }
 
 resource "aws_lambda_function" "etl" {
@@ -10,10 +40,48 @@ resource "aws_lambda_function" "etl" {
   handler       = "handler.lambda_handler"
   runtime       = "python3.12"
   filename      = data.archive_file.lambda_zip.output_path
-  timeout       = 30
-  memory_size   = 256
+  layers        = var.pandas_layer_arns
+  timeout       = 300
+  memory_size   = 1024
   tags          = var.tags
 
+  # chunked processing spools cleaned chunks to /tmp
+  ephemeral_storage {
+    size = 2048
+  }
+
+  environment {
+    variables = {
+      OUTPUT_BUCKET     = aws_s3_bucket.artifacts.id
+      LAMBDA_CHUNK_ROWS = "50000"
+      S3_UPLOAD_FORMAT  = "parquet"
+      REPORTING_PERIOD  = var.reporting_period
+      # no person matching here, so not the pipeline's indemnizatii/ dataset
+      LAMBDA_DATASET    = "indemnizatii_unmatched"
+    }
+  }
+
   # re-upload when the ZIP changes
   source_code_hash = data.archive_file.lambda_zip.output_base64sha256
-}
\ No newline at end of file
+}
+
+# New raw publications under var.raw_prefix trigger the function
+resource "aws_lambda_permission" "allow_artifacts_bucket" {
+  statement_id  = "AllowExecutionFromArtifactsBucket"
+  action        = "lambda:InvokeFunction"
+  function_name = aws_lambda_function.etl.function_name
+  principal     = "s3.amazonaws.com"
+  source_arn    = aws_s3_bucket.artifacts.arn
+}
+
+resource "aws_s3_bucket_notification" "raw_uploads" {
+  bucket = aws_s3_bucket.artifacts.id
+
+  lambda_function {
+    lambda_function_arn = aws_lambda_function.etl.arn
+    events              = ["s3:ObjectCreated:*"]
+    filter_prefix       = var.raw_prefix
+  }
+
+  depends_on = [aws_lambda_permission.allow_artifacts_bucket]
+}
@@ -26,6 +26,7 @@ data "aws_iam_policy_document" "lambda_s3_access" {
     actions = [
       "s3:GetObject",
       "s3:PutObject",
+      "s3:DeleteObject",
       "s3:ListBucket"
     ]
     resources = [
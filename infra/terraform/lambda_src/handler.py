@@ -1,6 +1,225 @@
+# S3-triggered processing of a new raw AMEPIP publication.
+#
+# An ObjectCreated event on raw/ streams the object in chunks through the
+# same cleaning functions as scripts/clean/data_clean.py and writes the
+# cleaned rows back as period partitions plus the manifest (see
+# scripts/clean/s3_layout.py), so a new publication is queryable seconds
+# after it lands instead of after a manual `make etl`.
+#
+# The function does not run person matching (the registry lives with the
+# pipeline), so its parts have no person_key column. They go under their
+# own dataset prefix (LAMBDA_DATASET, default indemnizatii_unmatched) with
+# their own manifest, never into the upload stage's indemnizatii/ dataset.
+#
+# Memory stays bounded by the chunk size:
+#   phase 1  stream raw object -> row-local cleaning per chunk -> spool the
+#            chunk to /tmp, collect the CUI -> nr_crt mapping and the distinct
+#            text values (the glued-word dictionary)
+#   phase 2  re-read spooled chunks, repair glued words, fill nr_crt, write
+#            one part per chunk under a content-addressed key
+#            (parts whose checksum matches the manifest are not rewritten),
+#            save the manifest, then delete the parts it no longer lists
+#
+# Import-time work is limited to the standard library; pandas, boto3 and
+# the cleaning module are imported on first use and reused by warm starts.
+#
+# Local run against a directory-backed stand-in for S3:
+#   python infra/terraform/lambda_src/handler.py \
+#       --event infra/terraform/lambda_src/fixtures/s3_put_event.json --store /tmp/s3
+# (the fixture's object is read from <store>/<bucket>/<key>)
+
+import io
 import json
+import os
+import re
+import tempfile
+from pathlib import Path
+from urllib.parse import unquote_plus
+
+CHUNK_ROWS = int(os.getenv("LAMBDA_CHUNK_ROWS", "50000"))
+OUTPUT_FORMAT = os.getenv("S3_UPLOAD_FORMAT", "parquet")
+DEFAULT_PERIOD = os.getenv("REPORTING_PERIOD", "2025")
+DATASET = os.getenv("LAMBDA_DATASET", "indemnizatii_unmatched")
+
+# Raw keys may carry the period, e.g. raw/period=2025/indemnizatii.csv
+PERIOD_IN_KEY = re.compile(r"period=([^/]+)")
+
+_s3 = None
+
+# One client per container, created lazily. LAMBDA_LOCAL_STORE swaps in a
+# directory-backed stand-in for local runs.
+def s3_client():
+    global _s3
+    if _s3 is None:
+        local_root = os.getenv("LAMBDA_LOCAL_STORE")
+        if local_root:
+            from local_store import LocalObjectStore
+
+            _s3 = LocalObjectStore(local_root)
+        else:
+            import boto3
+
+            _s3 = boto3.client("s3", endpoint_url=os.getenv("S3_ENDPOINT_URL") or None)
+    return _s3
+
+# Adapts a botocore StreamingBody to io so it can be buffered and decoded
+# incrementally instead of being read into memory at once.
+class _RawBody(io.RawIOBase):
+    def __init__(self, body):
+        self._body = body
+
+    def readable(self) -> bool:
+        return True
+
+    def readinto(self, b) -> int:
+        data = self._body.read(len(b))
+        n = len(data)
+        b[:n] = data
+        return n
+
+    def close(self) -> None:
+        self._body.close()
+        super().close()
+
+def period_for_key(key: str) -> str:
+    m = PERIOD_IN_KEY.search(key)
+    return m.group(1) if m else DEFAULT_PERIOD
+
+def process_object(bucket: str, key: str) -> dict:
+    import pandas as pd
+
+    from scripts.clean.data_clean import (
+        build_cui_to_nrcrt,
+        clean_chunk,
+        fill_nr_crt,
+        iter_raw_chunks,
+        order_columns,
+    )
+    from scripts.clean.segment_words import (
+        build_vocabulary,
+        distinct_text_values,
+        make_segmenter,
+        segment_columns,
+    )
+    from scripts.clean.s3_layout import (
+        content_sha256,
+        delete_keys,
+        load_manifest,
+        part_key,
+        partition_entry,
+        save_manifest,
+        serialize,
+        stale_keys,
+    )
+    from scripts.common.artifacts import wrap_stream
+
+    s3 = s3_client()
+    out_bucket = os.getenv("OUTPUT_BUCKET") or bucket
+    period = period_for_key(key)
+
+    obj = s3.get_object(Bucket=bucket, Key=key)
+    body = io.BufferedReader(_RawBody(obj["Body"]), buffer_size=1024 * 1024)
+
+    with tempfile.TemporaryDirectory(prefix="clean-") as spool_dir:
+        spool = Path(spool_dir)
+
+        # Phase 1: row-local cleaning, chunk by chunk
+        cui_to_nrcrt: dict = {}
+        text_values: set = set()
+        chunk_count = 0
+        with wrap_stream(body, key) as text:
+            for chunk in iter_raw_chunks(text, CHUNK_ROWS):
+                cleaned = clean_chunk(chunk)
+                if "nr_crt" in cleaned.columns and "cui" in cleaned.columns:
+                    build_cui_to_nrcrt(cleaned, cui_to_nrcrt)
+                text_values |= distinct_text_values(cleaned)
+                cleaned.to_pickle(spool / f"{chunk_count:05d}.pkl")
+                chunk_count += 1
+
+        # Phase 2: word repair and nr_crt inference with the complete
+        # dictionary and mapping, then write parts
+        segment = make_segmenter(*build_vocabulary(text_values))
+        manifest = load_manifest(s3, out_bucket, DATASET)
+        previous = manifest["partitions"].get(period)
+        previous_files = {
+            f["key"]: f for f in (previous or {}).get("files", [])
+        } if previous and previous.get("format") == OUTPUT_FORMAT else {}
+
+        files = []
+        bytes_written = 0
+        for index in range(chunk_count):
+            part = pd.read_pickle(spool / f"{index:05d}.pkl")
+            part, _ = segment_columns(part, segment)
+            if "nr_crt" in part.columns and "cui" in part.columns:
+                part = fill_nr_crt(part, cui_to_nrcrt)
+            part = order_columns(part)
+
+            sha = content_sha256(part)
+            part_key_name = part_key(period, index, OUTPUT_FORMAT, sha, DATASET)
+            unchanged = previous_files.get(part_key_name)
+            if unchanged:
+                files.append(unchanged)
+                continue
+
+            payload = serialize(part, OUTPUT_FORMAT)
+            s3.put_object(
+                Bucket=out_bucket,
+                Key=part_key_name,
+                Body=payload,
+                Metadata={"sha256": sha},
+            )
+            files.append({"key": part_key_name, "rows": int(len(part)), "sha256": sha, "bytes": len(payload)})
+            bytes_written += len(payload)
+
+    entry = partition_entry(period, OUTPUT_FORMAT, files)
+    entry["source"] = f"s3://{bucket}/{key}"
+
+    summary = {
+        "source": entry["source"],
+        "dataset": DATASET,
+        "period": period,
+        "rows": entry["rows"],
+        "parts": len(files),
+        "bytes_written": bytes_written,
+    }
+    if previous and previous.get("sha256") == entry["sha256"]:
+        summary["status"] = "unchanged"
+    else:
+        manifest["partitions"][period] = entry
+        save_manifest(s3, out_bucket, manifest)
+        # After the manifest switch, so readers never lose a listed part
+        delete_keys(s3, out_bucket, stale_keys(previous, files))
+        summary["status"] = "updated"
+
+    print(json.dumps(summary))
+    return summary
+
 def lambda_handler(event, context):
+    processed = []
+    for record in event.get("Records", []):
+        if not record.get("eventName", "").startswith("ObjectCreated"):
+            continue
+        bucket = record["s3"]["bucket"]["name"]
+        key = unquote_plus(record["s3"]["object"]["key"])
+        processed.append(process_object(bucket, key))
+
     return {
         "statusCode": 200,
-        "body": json.dumps({"ok": True, "message": "romanian-public-comp-etl lambda skeleton"})
-    }
\ No newline at end of file
+        "body": json.dumps({"ok": True, "processed": processed}),
+    }
+
+if __name__ == "__main__":
+    import argparse
+    import sys
+
+    parser = argparse.ArgumentParser(description="Invoke the handler locally with an event fixture")
+    parser.add_argument("--event", type=Path, required=True)
+    parser.add_argument("--store", type=Path, required=True, help="directory standing in for S3 (<store>/<bucket>/<key>)")
+    args = parser.parse_args()
+
+    # Run from a checkout: make the repo's `scripts` package importable
+    sys.path.insert(0, str(Path(__file__).resolve().parents[3]))
+    os.environ["LAMBDA_LOCAL_STORE"] = str(args.store)
+
+    result = lambda_handler(json.loads(args.event.read_text(encoding="utf-8")), None)
+    print(json.dumps(result, indent=2))
@@ -0,0 +1,39 @@
+# Directory-backed stand-in for the S3 client calls the handler makes,
+# for running it locally without AWS (objects live at <root>/<bucket>/<key>).
+
+import json
+from pathlib import Path
+
+from botocore.exceptions import ClientError
+
+
+class LocalObjectStore:
+    def __init__(self, root):
+        self.root = Path(root)
+
+    def _path(self, bucket: str, key: str) -> Path:
+        return self.root / bucket / key
+
+    def get_object(self, Bucket: str, Key: str) -> dict:
+        path = self._path(Bucket, Key)
+        if not path.is_file():
+            raise ClientError(
+                {"Error": {"Code": "NoSuchKey", "Message": f"{Bucket}/{Key} not found"}},
+                "GetObject",
+            )
+        return {"Body": path.open("rb"), "ContentLength": path.stat().st_size}
+
+    def put_object(self, Bucket: str, Key: str, Body, Metadata: dict | None = None, **kwargs) -> dict:
+        path = self._path(Bucket, Key)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_bytes(Body if isinstance(Body, bytes) else Body.read())
+        if Metadata:
+            path.with_name(path.name + ".metadata.json").write_text(json.dumps(Metadata), encoding="utf-8")
+        return {}
+
+    def delete_objects(self, Bucket: str, Delete: dict) -> dict:
+        for obj in Delete.get("Objects", []):
+            path = self._path(Bucket, obj["Key"])
+            path.unlink(missing_ok=True)
+            path.with_name(path.name + ".metadata.json").unlink(missing_ok=True)
+        return {}
@@ -41,4 +41,21 @@ variable "db_allowed_cidrs" {
   description = "CIDR blocks allowed to connect to RDS"
   type        = list(string)
   default     = ["82.0.130.203/32"]
-}
\ No newline at end of file
+}
+variable "pandas_layer_arns" {
+  description = "Lambda layer ARNs providing pandas and pyarrow for the ETL function"
+  type        = list(string)
+  default     = []
+}
+
+variable "raw_prefix" {
+  description = "Key prefix in the artifacts bucket whose uploads trigger the ETL function"
+  type        = string
+  default     = "raw/"
+}
+
+variable "reporting_period" {
+  description = "Period used when a raw object key has no period=<...> segment"
+  type        = string
+  default     = "2025"
+}
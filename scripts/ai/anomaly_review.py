@@ -4,12 +4,25 @@ import json
 import os
 from dataclasses import dataclass
 from datetime import datetime, timezone
+from pathlib import Path
 from typing import Any, Dict, List, Optional, Tuple
 
 import pandas as pd
 import psycopg2
 from psycopg2.extras import execute_values
 
+from scripts.common.artifacts import artifact_path, open_artifact
+from scripts.common.schema import compact, report_memory
+from scripts.common.tracing import span
+
+
+# Year-over-year thresholds (columns from --yoy-table, see compensation_yoy):
+# a jump needs both the relative and the absolute change, so small bases
+# (100 -> 300 RON) are not flagged
+YOY_JUMP_PCT = 50.0
+YOY_JUMP_MIN_RON = 1000.0
+YOY_VOLATILITY = 0.5
+
 
 @dataclass(frozen=True)
 class DbConfig:
@@ -40,32 +53,40 @@ def safe_float(x: Any) -> Optional[float]:
     except Exception:
         return None
 
+# Missing values arrive as None from the database but as NaN/NA once the
+# frame holds categoricals and nullable ints; normalize to None.
+def none_if_na(x: Any) -> Any:
+    return None if x is None or pd.isna(x) else x
+
 def compute_anomaly_score(df: pd.DataFrame) -> pd.DataFrame:
     """
     Builds an anomaly score and reasons per row.
     Assumptions:
     - df has: record_pk, year, company_id, person_id, total_ron
+    - optionally yoy_pct_change, yoy_abs_change, yoy_volatility (--yoy-table)
     """
     out = df.copy()
 
     # Normalize numeric
-    out["total_ron_num"] = out["total_ron"].apply(safe_float)
+    with span("normalize_total", rows=len(out)):
+        out["total_ron_num"] = out["total_ron"].apply(safe_float)
 
     # Score + reasons
     scores: List[float] = []
     reasons_list: List[List[str]] = []
 
-    # Peer-group stats (z-score) by (year, company_id), fallback to year only
-    # This catches "way higher than peers in same org/year"
-    grp_cols = ["year", "company_id"]
-    peer = out.groupby(grp_cols)["total_ron_num"].agg(["mean", "std"]).reset_index()
-    out = out.merge(peer, on=grp_cols, how="left", suffixes=("", "_peer"))
+    with span("peer_stats", rows=len(out)):
+        # Peer-group stats (z-score) by (year, company_id), fallback to year only
+        # This catches "way higher than peers in same org/year"
+        grp_cols = ["year", "company_id"]
+        peer = out.groupby(grp_cols, observed=True)["total_ron_num"].agg(["mean", "std"]).reset_index()
+        out = out.merge(peer, on=grp_cols, how="left", suffixes=("", "_peer"))
 
-    # Fallback stats by year if std is null/0
-    peer_y = out.groupby(["year"])["total_ron_num"].agg(["mean", "std"]).rename(
-        columns={"mean": "mean_y", "std": "std_y"}
-    ).reset_index()
-    out = out.merge(peer_y, on=["year"], how="left")
+        # Fallback stats by year if std is null/0
+        peer_y = out.groupby(["year"], observed=True)["total_ron_num"].agg(["mean", "std"]).rename(
+            columns={"mean": "mean_y", "std": "std_y"}
+        ).reset_index()
+        out = out.merge(peer_y, on=["year"], how="left")
 
     def row_score(row: pd.Series) -> Tuple[float, List[str]]:
         score = 0.0
@@ -98,11 +119,11 @@ def compute_anomaly_score(df: pd.DataFrame) -> pd.DataFrame:
                 score += 4.0
                 reasons.append("total_implausibly_high")
         
-        if not row.get("person_id"):
+        if not none_if_na(row.get("person_id")):
             score += 1.0
             reasons.append("person_id_missing")
         
-        if not row.get("company_id"):
+        if not none_if_na(row.get("company_id")):
             score += 1.0
             reasons.append("company_id_missing")
         
@@ -128,13 +149,27 @@ def compute_anomaly_score(df: pd.DataFrame) -> pd.DataFrame:
                     elif z >= 3:
                         score += 1.5
                         reasons.append(f"zscore_year_{z:.1f}")
+
+        # Sudden change against the same person-company pair last year
+        pct = safe_float(none_if_na(row.get("yoy_pct_change")))
+        change = safe_float(none_if_na(row.get("yoy_abs_change")))
+        if pct is not None and change is not None:
+            if abs(pct) >= YOY_JUMP_PCT and abs(change) >= YOY_JUMP_MIN_RON:
+                score += 3.0 if abs(pct) >= 2 * YOY_JUMP_PCT else 2.0
+                reasons.append(f"yoy_jump_{pct:+.0f}pct")
+
+        volatility = safe_float(none_if_na(row.get("yoy_volatility")))
+        if volatility is not None and volatility >= YOY_VOLATILITY:
+            score += 1.0
+            reasons.append(f"yoy_volatility_{volatility:.2f}")
             
         return score, reasons
         
-    for _, r in out.iterrows():
-        s, rs = row_score(r)
-        scores.append(s)
-        reasons_list.append(rs)
+    with span("row_score", rows=len(out)):
+        for _, r in out.iterrows():
+            s, rs = row_score(r)
+            scores.append(s)
+            reasons_list.append(rs)
     
     out["anomaly_score"] = scores
     out["anomaly_reasons"] = reasons_list
@@ -167,6 +202,7 @@ Consider:
 - negative/zero/implausible totals
 - missing identifiers
 - unusually high compared to peers (z-score reason may exist)
+- sudden year-over-year jumps or volatile pay for the same person and company (yoy_* reasons)
 """.strip()
 
 def sha256_text(s: str) -> str:
@@ -245,6 +281,33 @@ def read_source_table(conn, source_table: str, year: Optional[int], limit: int)
 
     return pd.read_sql(sql, conn, params=params)
 
+def read_yoy_table(conn, yoy_table: str, year: Optional[int]) -> pd.DataFrame:
+    """
+    Year-over-year change per (year, company_id, person_id) from the
+    compensation_yoy model. Empty when the table has not been built yet.
+    """
+    with conn.cursor() as cur:
+        cur.execute("select to_regclass(%s) is not null", (yoy_table,))
+        if not cur.fetchone()[0]:
+            print(f"[anomaly_review] {yoy_table} not found; skipping year-over-year reasons")
+            return pd.DataFrame()
+
+    where = "where an_raportare = %s" if year is not None else ""
+    sql = f"""
+      select
+        an_raportare as year,
+        cast(company_id as text) as company_id,
+        cast(person_id as text) as person_id,
+        cast(prev_total_plata as float8) as yoy_prev_total,
+        cast(abs_change as float8) as yoy_abs_change,
+        cast(pct_change as float8) as yoy_pct_change,
+        cast(volatility as float8) as yoy_volatility,
+        rank_shift as yoy_rank_shift
+      from {yoy_table}
+      {where}
+    """
+    return pd.read_sql(sql, conn, params=[year] if year is not None else None)
+
 def write_candidates(conn, run_id: str, source_table: str, df: pd.DataFrame) -> List[int]:
     """
     Writes to audit.anomaly_candidates and returns candidate_id list.
@@ -256,9 +319,9 @@ def write_candidates(conn, run_id: str, source_table: str, df: pd.DataFrame) ->
             source_table,
             r["record_pk"],
             int(r["year"]) if pd.notna(r["year"]) else None,
-            r.get("company_id"),
-            r.get("person_id"),
-            r.get("total_ron_num"),
+            none_if_na(r.get("company_id")),
+            none_if_na(r.get("person_id")),
+            none_if_na(r.get("total_ron_num")),
             float(r["anomaly_score"]),
             r["anomaly_reasons"],
         ))
@@ -312,8 +375,17 @@ def main() -> None:
     parser.add_argument("--year", type=int, default=None)
     parser.add_argument("--limit", type=int, default=500)
     parser.add_argument("--min-score", type=float, default=3.0)
-    parser.add_argument("--out", default="artifacts/anomaly_candidates.csv")
+    parser.add_argument(
+        "--out",
+        default=str(artifact_path(Path("artifacts/anomaly_candidates.csv"))),
+        help="candidate CSV; .gz/.zst suffix compresses (default follows PIPELINE_COMPRESSION)",
+    )
     parser.add_argument("--write-db", action="store_true", help="write candidates + reviews to Postgres audit schema")
+    parser.add_argument(
+        "--yoy-table",
+        default=None,
+        help="year-over-year table adding yoy_* reasons, e.g. analytics.compensation_yoy",
+    )
     args = parser.parse_args()
 
     run_id = datetime.now(timezone.utc).strftime("%Y%m%dT%H%M%SZ")
@@ -322,19 +394,31 @@ def main() -> None:
     os.makedirs(os.path.dirname(args.out), exist_ok=True)
 
     with connect(db) as conn:
-        df = read_source_table(conn, args.source, args.year, args.limit)
+        with span("read_source") as s:
+            df = read_source_table(conn, args.source, args.year, args.limit)
+            s["rows"] = len(df)
+        if args.yoy_table:
+            yoy = read_yoy_table(conn, args.yoy_table, args.year)
+            if len(yoy):
+                df = df.merge(yoy, on=["year", "company_id", "person_id"], how="left")
+                print(f"[anomaly_review] rows with a previous year: {int(df['yoy_prev_total'].notna().sum())}")
+        df = compact(df)
         print("[anomaly_review] read rows:", len(df))
         print("[anomaly_review] columns:", list(df.columns))
+        report_memory(df)
+        print(f"[metrics] rows_processed={len(df)}")
 
         if len(df) == 0:
             raise RuntimeError("Query returned 0 rows. Year filter or source table/schema likely wrong.")
 
-        scored = compute_anomaly_score(df)
+        with span("compute_anomaly_score", rows=len(df)):
+            scored = compute_anomaly_score(df)
         flagged = scored[scored["anomaly_score"] >= args.min_score].copy()
         flagged = flagged.sort_values("anomaly_score", ascending=False)
 
         # Save CSV artifact for quick human review
-        flagged.to_csv(args.out, index=False)
+        with open_artifact(args.out, "w") as f:
+            flagged.to_csv(f, index=False)
         print(f"[anomaly_review] run_id={run_id} flagged={len(flagged)} saved={args.out}")
 
         # Optional DB persistance + LLM/offline classification
@@ -348,14 +432,17 @@ def main() -> None:
             for _, row in flagged.iterrows():
                 record = {
                     "record_pk": row["record_pk"],
-                    "year": row.get("year"),
-                    "company_id": row.get("company_id"),
-                    "person_id": row.get("person_id"),
+                    "year": none_if_na(row.get("year")),
+                    "company_id": none_if_na(row.get("company_id")),
+                    "person_id": none_if_na(row.get("person_id")),
 
-                    "total_plata": row.get("total_ron_num"),
+                    "total_plata": none_if_na(row.get("total_ron_num")),
                     "suma_clean": safe_float(row.get("suma_clean")),
                     "variabila_clean": safe_float(row.get("variabila_clean")),
 
+                    "yoy_pct_change": safe_float(none_if_na(row.get("yoy_pct_change"))),
+                    "yoy_rank_shift": safe_float(none_if_na(row.get("yoy_rank_shift"))),
+
                     "anomaly_score": float(row["anomaly_score"]),
                     "anomaly_reasons": row["anomaly_reasons"],
                 }
@@ -0,0 +1,432 @@
+# Read-only HTTP API over the dbt marts, for dashboards and downstream apps
+# that used to run sql/queries/clean/*.sql by hand.
+#
+#   GET /top-earners?year=&limit=              analytics.top_earners
+#   GET /companies/top-spend?year=&limit=      analytics.top_companii_by_spend
+#   GET /companies/<cui>?year=                 per-year pay summary + quantiles
+#   GET /companies/<cui>/spread                analytics.organization_pay_spread
+#   GET /persons?name=&limit=                  person lookup by name
+#   GET /persons/<person_id>?year=             pay per company and year, with YoY change
+#   GET /health, GET /stats                    liveness, cache and pool counters (not cached)
+#
+# Responses are cached in memory (TTL + LRU) keyed by path and query, and
+# carry a content ETag; If-None-Match answers 304 without a body. The cache
+# is dropped when logs/pipeline/pipeline_runs.jsonl gains a run whose load or
+# dbt stage succeeded (checked by stat() on each request, new bytes only), so
+# repeated dashboard hits are served from memory and never reach Postgres
+# until the data actually changes.
+#
+# Queries run on a bounded psycopg2 ThreadedConnectionPool of read-only,
+# autocommit sessions.
+#
+# Configuration (env):
+#   MARTS_API_SCHEMA       schema of the dbt marts (default: analytics)
+#   MARTS_API_CACHE_TTL    seconds a cached response stays valid (default: 3600)
+#   MARTS_API_CACHE_SIZE   cached responses kept, least recently used evicted (default: 512)
+#   MARTS_API_POOL_SIZE    max Postgres connections (default: 8)
+#
+# Usage:
+#   python -m scripts.api.marts_api --port 8080
+
+import argparse
+import hashlib
+import json
+import os
+import re
+import threading
+import time
+from collections import OrderedDict
+from datetime import date, datetime
+from decimal import Decimal
+from http import HTTPStatus
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from urllib.parse import parse_qsl, urlsplit
+
+import psycopg2
+from psycopg2.pool import ThreadedConnectionPool
+
+REPO_ROOT = Path(__file__).resolve().parents[2]
+# Same location as scripts/run_pipeline.py (PIPELINE_LOG_DIR relocates it)
+RUNS_JSONL = Path(os.getenv("PIPELINE_LOG_DIR") or REPO_ROOT / "logs") / "pipeline" / "pipeline_runs.jsonl"
+
+SCHEMA = os.getenv("MARTS_API_SCHEMA") or "analytics"
+CACHE_TTL_S = float(os.getenv("MARTS_API_CACHE_TTL", "3600"))
+CACHE_SIZE = int(os.getenv("MARTS_API_CACHE_SIZE", "512"))
+POOL_SIZE = int(os.getenv("MARTS_API_POOL_SIZE", "8"))
+
+DEFAULT_LIMIT = 50
+MAX_LIMIT = 500
+
+# Stages whose success changes what the marts return
+DATA_STAGES = {"load", "dbt"}
+
+# In-memory response cache: TTL per entry, least recently used evicted first.
+# Fill locks (striped by key) let one request per key query Postgres while
+# concurrent requests for the same key wait for its result.
+class ResponseCache:
+    FILL_STRIPES = 64
+
+    def __init__(self, max_entries: int, ttl_s: float):
+        self.max_entries = max_entries
+        self.ttl_s = ttl_s
+        self._entries: OrderedDict[str, tuple[float, bytes, str]] = OrderedDict()
+        self._lock = threading.Lock()
+        self._fill_locks = [threading.Lock() for _ in range(self.FILL_STRIPES)]
+        self.hits = self.misses = self.evictions = self.invalidations = 0
+
+    def get(self, key: str, *, count: bool = True) -> tuple[bytes, str] | None:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[0] < time.monotonic():
+                if entry is not None:
+                    del self._entries[key]
+                self.misses += count
+                return None
+            self._entries.move_to_end(key)
+            self.hits += count
+            return entry[1], entry[2]
+
+    def fill_lock(self, key: str) -> threading.Lock:
+        return self._fill_locks[hash(key) % self.FILL_STRIPES]
+
+    def put(self, key: str, body: bytes, etag: str) -> None:
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self.ttl_s, body, etag)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self.invalidations += 1
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "invalidations": self.invalidations,
+            }
+
+# Follows pipeline_runs.jsonl and reports when a non-sample run with a
+# successful load or dbt stage was appended since the last check. Only the
+# stat() runs per request; new bytes are read when the size changes.
+class RunLogWatcher:
+    def __init__(self, path: Path):
+        self.path = path
+        self.offset = 0
+        self.data_version = None
+        self._lock = threading.Lock()
+        self.changed()
+
+    def changed(self) -> bool:
+        try:
+            size = self.path.stat().st_size
+        except OSError:
+            return False
+        with self._lock:
+            if size == self.offset:
+                return False
+            if size < self.offset:  # file rotated or truncated
+                self.offset = 0
+
+            found = None
+            with self.path.open("rb") as f:
+                f.seek(self.offset)
+                for line in f:
+                    # A trailing line without newline may still be being written
+                    if not line.endswith(b"\n"):
+                        break
+                    self.offset += len(line)
+                    try:
+                        record = json.loads(line)
+                    except json.JSONDecodeError:
+                        continue
+                    # Sample runs load into their own schemas
+                    if record.get("sample"):
+                        continue
+                    if any(
+                        s.get("stage") in DATA_STAGES and s.get("status") == "success"
+                        for s in record.get("stages") or []
+                    ):
+                        found = record.get("run_id")
+
+            if found is None:
+                return False
+            self.data_version = found
+            return True
+
+def json_default(value):
+    if isinstance(value, Decimal):
+        return float(value)
+    if isinstance(value, (date, datetime)):
+        return value.isoformat()
+    raise TypeError(f"not JSON serializable: {type(value).__name__}")
+
+class BadRequest(ValueError):
+    pass
+
+class NotFound(LookupError):
+    pass
+
+def int_param(params: dict, name: str, default: int | None = None, maximum: int | None = None) -> int | None:
+    raw = params.get(name)
+    if raw in (None, ""):
+        return default
+    try:
+        value = int(raw)
+    except ValueError:
+        raise BadRequest(f"{name} must be an integer") from None
+    if value < 0:
+        raise BadRequest(f"{name} must not be negative")
+    return min(value, maximum) if maximum is not None else value
+
+# Endpoints: (path pattern, handler). Handlers return (sql, params); the SQL
+# reads only from SCHEMA. Queries that address one entity raise NotFound on
+# an empty result (see run_query).
+def top_earners(match, params):
+    year = int_param(params, "year")
+    limit = int_param(params, "limit", DEFAULT_LIMIT, MAX_LIMIT)
+    return f"""
+        select an_raportare, person_id, persoana, total_salary
+        from {SCHEMA}.top_earners
+        where %(year)s::int is null or an_raportare = %(year)s
+        order by total_salary desc, person_id
+        limit %(limit)s
+    """, {"year": year, "limit": limit}
+
+def top_spend(match, params):
+    year = int_param(params, "year")
+    limit = int_param(params, "limit", DEFAULT_LIMIT, MAX_LIMIT)
+    return f"""
+        select an_raportare, companie, total_spend
+        from {SCHEMA}.top_companii_by_spend
+        where %(year)s::int is null or an_raportare = %(year)s
+        order by total_spend desc, companie
+        limit %(limit)s
+    """, {"year": year, "limit": limit}
+
+# Quantiles read off the stored sketch (evenly spaced, ascending)
+def company_pay(match, params):
+    year = int_param(params, "year")
+    return f"""
+        select
+            a.company_id, c.denumire, c.autoritate_tutelara, a.an_raportare,
+            a.num_people, a.total_spend, a.lowest, a.highest,
+            a.quantile_sketch[1 + round(0.1 * (cardinality(a.quantile_sketch) - 1))::int] as p10,
+            a.quantile_sketch[1 + round(0.5 * (cardinality(a.quantile_sketch) - 1))::int] as p50,
+            a.quantile_sketch[1 + round(0.9 * (cardinality(a.quantile_sketch) - 1))::int] as p90
+        from {SCHEMA}.agg_company_year_pay a
+        join {SCHEMA}.dim_companii c on c.company_id = a.company_id
+        where a.company_id = %(cui)s and (%(year)s::int is null or a.an_raportare = %(year)s)
+        order by a.an_raportare
+    """, {"cui": match["cui"], "year": year}
+
+def company_spread(match, params):
+    return f"""
+        select c.company_id, s.denumire, s.spread, s.p90, s.p10
+        from {SCHEMA}.organization_pay_spread s
+        join {SCHEMA}.dim_companii c on c.denumire = s.denumire
+        where c.company_id = %(cui)s
+    """, {"cui": match["cui"]}
+
+def find_persons(match, params):
+    name = (params.get("name") or "").strip()
+    if len(name) < 3:
+        raise BadRequest("name must have at least 3 characters")
+    limit = int_param(params, "limit", DEFAULT_LIMIT, MAX_LIMIT)
+    pattern = "%" + name.upper().replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_") + "%"
+    return f"""
+        select person_id, nume_normalizat
+        from {SCHEMA}.dim_persoane
+        where nume_normalizat like %(pattern)s
+        order by nume_normalizat, person_id
+        limit %(limit)s
+    """, {"pattern": pattern, "limit": limit}
+
+def person_pay(match, params):
+    year = int_param(params, "year")
+    return f"""
+        select
+            y.person_id, p.nume_normalizat, y.company_id, c.denumire, y.an_raportare,
+            y.total_plata, y.prev_total_plata, y.pct_change, y.rank_in_company, y.rank_shift
+        from {SCHEMA}.compensation_yoy y
+        join {SCHEMA}.dim_persoane p on p.person_id = y.person_id
+        left join {SCHEMA}.dim_companii c on c.company_id = y.company_id
+        where y.person_id = %(person_id)s and (%(year)s::int is null or y.an_raportare = %(year)s)
+        order by y.an_raportare, y.company_id
+    """, {"person_id": match["person_id"], "year": year}
+
+ROUTES = [
+    (re.compile(r"^/top-earners$"), top_earners, False),
+    (re.compile(r"^/companies/top-spend$"), top_spend, False),
+    (re.compile(r"^/companies/(?P<cui>\d{1,12})$"), company_pay, True),
+    (re.compile(r"^/companies/(?P<cui>\d{1,12})/spread$"), company_spread, True),
+    (re.compile(r"^/persons$"), find_persons, False),
+    (re.compile(r"^/persons/(?P<person_id>[0-9a-f]{16})$"), person_pay, True),
+]
+
+# Shared state of one server: pool, cache, run log watcher
+class MartsApi:
+    def __init__(self, pool_size: int = POOL_SIZE, cache: ResponseCache | None = None, runs_path: Path = RUNS_JSONL):
+        self.pool = ThreadedConnectionPool(1, pool_size, **conn_params())
+        # Waiting here instead of in getconn(): the pool raises when exhausted
+        self.slots = threading.BoundedSemaphore(pool_size)
+        self.cache = cache or ResponseCache(CACHE_SIZE, CACHE_TTL_S)
+        self.watcher = RunLogWatcher(runs_path)
+        self.queries = 0
+
+    def run_query(self, sql: str, params: dict, single_entity: bool) -> bytes:
+        with self.slots:
+            conn = self.pool.getconn()
+            broken = False
+            try:
+                if not conn.autocommit:  # new connection from the pool
+                    conn.set_session(readonly=True, autocommit=True)
+                with conn.cursor() as cur:
+                    cur.execute(sql, params)
+                    names = [d[0] for d in cur.description]
+                    rows = [dict(zip(names, r)) for r in cur.fetchall()]
+            except (psycopg2.OperationalError, psycopg2.InterfaceError):
+                # Broken connection (e.g. database restart): drop it from the pool
+                broken = True
+                raise
+            finally:
+                # Every other error (e.g. a mart dbt has not built yet) leaves
+                # the connection usable; it goes back to the pool either way
+                self.pool.putconn(conn, close=broken)
+            self.queries += 1
+
+        if single_entity and not rows:
+            raise NotFound("no rows")
+        return json.dumps({"rows": rows, "count": len(rows)}, default=json_default, ensure_ascii=False).encode("utf-8")
+
+    # (status, body, etag, cache state) for a GET
+    def handle(self, path: str, params: dict) -> tuple[int, bytes, str | None, str]:
+        if self.watcher.changed():
+            self.cache.clear()
+            print(f"[marts_api] new data (run {self.watcher.data_version}); cache cleared")
+
+        for pattern, handler, single_entity in ROUTES:
+            match = pattern.match(path)
+            if match:
+                break
+        else:
+            raise NotFound(f"unknown endpoint {path}")
+
+        key = path + "?" + "&".join(f"{k}={v}" for k, v in sorted(params.items()))
+        cached = self.cache.get(key)
+        if cached is not None:
+            return HTTPStatus.OK, cached[0], cached[1], "hit"
+
+        with self.cache.fill_lock(key):
+            # Filled by a concurrent request while this one waited
+            cached = self.cache.get(key, count=False)
+            if cached is not None:
+                return HTTPStatus.OK, cached[0], cached[1], "hit"
+
+            sql, query_params = handler(match.groupdict(), params)
+            body = self.run_query(sql, query_params, single_entity)
+            etag = '"' + hashlib.sha256(body).hexdigest()[:32] + '"'
+            self.cache.put(key, body, etag)
+        return HTTPStatus.OK, body, etag, "miss"
+
+    def stats(self) -> dict:
+        return {
+            "cache": self.cache.stats(),
+            "db_queries": self.queries,
+            "data_version": self.watcher.data_version,
+        }
+
+    def close(self) -> None:
+        self.pool.closeall()
+
+def conn_params() -> dict:
+    return {
+        "host": os.getenv("PGHOST") or os.getenv("DB_HOST") or "localhost",
+        "port": os.getenv("PGPORT") or os.getenv("DB_PORT") or "5432",
+        "dbname": os.getenv("PGDATABASE") or os.getenv("DB_NAME"),
+        "user": os.getenv("PGUSER") or os.getenv("DB_USER"),
+        "password": os.getenv("PGPASSWORD") or os.getenv("DB_PASSWORD"),
+    }
+
+class Handler(BaseHTTPRequestHandler):
+    server_version = "marts-api/1"
+    api: MartsApi  # set by make_server
+
+    def do_GET(self):
+        url = urlsplit(self.path)
+        path = url.path.rstrip("/") or "/"
+        params = dict(parse_qsl(url.query))
+
+        if path == "/health":
+            return self.send_json(HTTPStatus.OK, {"status": "ok"})
+        if path == "/stats":
+            return self.send_json(HTTPStatus.OK, self.api.stats())
+
+        try:
+            status, body, etag, cache_state = self.api.handle(path, params)
+        except BadRequest as e:
+            return self.send_json(HTTPStatus.BAD_REQUEST, {"error": str(e)})
+        except NotFound as e:
+            return self.send_json(HTTPStatus.NOT_FOUND, {"error": str(e)})
+        except psycopg2.Error as e:
+            self.log_error("database error: %s", e)
+            return self.send_json(HTTPStatus.SERVICE_UNAVAILABLE, {"error": "database unavailable"})
+
+        if etag and etag in (self.headers.get("If-None-Match") or ""):
+            self.send_response(HTTPStatus.NOT_MODIFIED)
+            self.send_header("ETag", etag)
+            self.send_header("X-Cache", cache_state)
+            self.end_headers()
+            return
+
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        # Clients may keep the body but must revalidate (cheap 304 with the ETag)
+        self.send_header("Cache-Control", "no-cache")
+        self.send_header("ETag", etag)
+        self.send_header("X-Cache", cache_state)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def send_json(self, status: int, payload: dict) -> None:
+        body = json.dumps(payload, default=json_default).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.send_header("Cache-Control", "no-store")
+        self.end_headers()
+        self.wfile.write(body)
+
+def make_server(host: str, port: int, api: MartsApi) -> ThreadingHTTPServer:
+    handler = type("MartsApiHandler", (Handler,), {"api": api})
+    server = ThreadingHTTPServer((host, port), handler)
+    server.daemon_threads = True
+    return server
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Read-only, cached HTTP API over the dbt marts")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8080)
+    args = parser.parse_args()
+
+    api = MartsApi()
+    server = make_server(args.host, args.port, api)
+    print(f"[marts_api] serving {SCHEMA} on http://{args.host}:{args.port} (cache ttl={CACHE_TTL_S:.0f}s size={CACHE_SIZE}, pool={POOL_SIZE})")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        api.close()
+
+if __name__ == "__main__":
+    main()
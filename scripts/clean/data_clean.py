@@ -1,33 +1,115 @@
 # Data cleaning pipeline for messy PDF-extracted public salary data.
 # Handles inconsistent formatting, text artifacts, and irregular numeric patterns
 # to produce a normalized dataset suitable for loading into PostgreSQL and dbt.
-
+#
+# The transformations are plain functions so other entry points (the
+# S3-triggered Lambda) can apply them chunk by chunk. Everything except
+# nr_crt inference is row-local; nr_crt needs a CUI -> nr_crt mapping built
+# over the whole dataset first (build_cui_to_nrcrt, then fill_nr_crt).
+
+import csv
+import hashlib
+import os
+import sys
 import pandas as pd
 import re
 from pathlib import Path
 
+from scripts.clean.segment_words import (
+    build_vocabulary,
+    distinct_text_values,
+    make_segmenter,
+    segment_columns,
+)
+from scripts.common.artifacts import artifact_path, open_artifact, resolve_artifact
+from scripts.common.schema import compact, concat_compact, report_memory
+from scripts.common.tracing import span
+
 # Resolve repository root to ensure consistent file paths across environments
 BASE_DIR = Path(__file__).resolve().parents[2]  # repo root
-RAW_PATH = BASE_DIR / "data" / "indemnizatii.csv"
-CLEAN_PATH = BASE_DIR / "data" / "indemnizatii_clean.csv"
-
-# Use a forgiving CSV parser to handle inconsistent PDF-exported structure
-# (irregular delimiters, malformed rows, unexpected line breaks).
-df = pd.read_csv(
-    RAW_PATH,
-    dtype=str,
-    keep_default_na=False,
-    na_values=[],
-    engine='python',
-    on_bad_lines='warn'
-)
+# PIPELINE_DATA_DIR relocates the data artifacts (benchmarks, sample runs)
+DATA_DIR = Path(os.getenv("PIPELINE_DATA_DIR") or BASE_DIR / "data")
+# Artifacts may be plain, .gz or .zst (PIPELINE_COMPRESSION selects the output)
+RAW_PATH = resolve_artifact(DATA_DIR / "indemnizatii.csv")
+CLEAN_PATH = artifact_path(DATA_DIR / "indemnizatii_clean.csv")
+
+# Row-level lineage carried through clean, validate and load: the raw line a
+# record starts on and a short hash of its raw fields.
+LINEAGE_COLUMNS = ['source_line', 'raw_hash']
 
-print("After read_csv:", len(df))
+# Raw records cleaned per chunk; bounds the all-string working set
+CHUNK_ROWS = 50_000
+
+# Normalized header -> canonical column name
+COLUMN_RENAMES = {
+    'nr.crt': 'nr_crt',
+    'autoritate_public_tutelar_(apt)': 'autoritate_tutelara',
+    'nume_ntreprindere_public':'intreprindere',
+    'cui': 'cui',
+    'nume_personal_conducere': 'personal',
+    'calitate_(membru_ca/cs_director/membru_directorat)': 'calitate_membru',
+    'valoare_indemnizaie_fix_lunar_conform_contract_(brut-lei)*': 'suma',
+    'valoare_indemnizaie_variabila_anual_conform_contract_(brut-lei)*': 'indemnizatie_variabila'
+}
+
+# Headers glued by the PDF export ("NUME PERSONALCONDUCERE") are split back
+# into the words of the known headers before the rename lookup
+segment_header = make_segmenter(*build_vocabulary(COLUMN_RENAMES), sep='_', min_word_freq=1)
+
+def raw_hash(fields: list[str]) -> str:
+    return hashlib.blake2b('\x1f'.join(fields).encode('utf-8'), digest_size=8).hexdigest()
+
+# Read the raw CSV, tagging each record with its lineage columns.
+# Parsing is forgiving, as the PDF-exported files need (same rules as pandas'
+# python engine with on_bad_lines='warn'): blank records are skipped, records
+# with more fields than the header are reported and skipped, short records
+# are padded with NaN, all values stay strings.
+# Yields DataFrames of at most chunk_rows records (one frame when None).
+def iter_raw_chunks(text_stream, chunk_rows: int | None = None):
+    reader = csv.reader(text_stream)
+    header = next(reader)
+    if header:
+        header[0] = header[0].lstrip('\ufeff')
+    width = len(header)
+    columns = header + LINEAGE_COLUMNS
+    nan = float('nan')
+
+    rows = []
+    emitted = False
+    next_line = reader.line_num + 1
+    for fields in reader:
+        start_line, next_line = next_line, reader.line_num + 1
+        if not fields or (len(fields) == 1 and not fields[0].strip()):
+            continue
+        if len(fields) > width:
+            print(f"Skipping line {start_line}: expected {width} fields, saw {len(fields)}", file=sys.stderr)
+            continue
+
+        lineage = [start_line, raw_hash(fields)]
+        if len(fields) < width:
+            fields = fields + [nan] * (width - len(fields))
+        rows.append(fields + lineage)
+
+        if chunk_rows and len(rows) >= chunk_rows:
+            yield pd.DataFrame(rows, columns=columns)
+            emitted = True
+            rows = []
+
+    if rows or not emitted:
+        yield pd.DataFrame(rows, columns=columns)
+
+def read_raw(text_stream) -> pd.DataFrame:
+    return next(iter_raw_chunks(text_stream))
+
+# Coarse progress heartbeats for the orchestrator ("[progress] done=<n> total=<n>")
+PROGRESS_STEPS = 5
+def report_progress(done: int, step: str) -> None:
+    print(f"[progress] done={done} total={PROGRESS_STEPS} unit=steps step={step}")
 
 # Normalize column names to ASCII-safe, snake_case format for downstream systems
 # (PostgreSQL/dbt compatibility and easier querying).
-df.columns = [
-    re.sub(
+def normalize_column_name(c: str) -> str:
+    return re.sub(
         r'_+', '_',  # collapse repeated underscores
         c.encode('ascii', 'ignore') # remove diacritics
         .decode()
@@ -36,38 +118,35 @@ df.columns = [
         .replace('\n', '_')
         .replace('\r', '_')
         .strip('_')  # remove heading/trailing underscore
-    )   
-    for c in df.columns
-]
+    )
 
-print("Columns after cleaning:", df.columns)
+# Normalized header -> canonical column name, repairing glued header words
+def canonical_column_name(c: str) -> str:
+    key = normalize_column_name(c)
+    if key not in COLUMN_RENAMES:
+        key = segment_header(key)
+    return COLUMN_RENAMES.get(key, key)
 
-# Drop fully empty rows introduced by malformed PDF extraction
-df = df.dropna(how='all')
+def normalize_columns(df: pd.DataFrame) -> pd.DataFrame:
+    df.columns = [canonical_column_name(c) for c in df.columns]
 
-df = df.rename(columns={
-    'nr.crt': 'nr_crt',
-    'autoritate_public_tutelar_(apt)': 'autoritate_tutelara',
-    'nume_ntreprindere_public':'intreprindere',
-    'cui': 'cui',
-    'nume_personal_conducere': 'personal',
-    'calitate_(membru_ca/cs_director/membru_directorat)': 'calitate_membru',
-    'valoare_indemnizaie_fix_lunar_conform_contract_(brut-lei)*': 'suma',
-    'valoare_indemnizaie_variabila_anual_conform_contract_(brut-lei)*': 'indemnizatie_variabila'
-})
+    # Drop fully empty rows introduced by malformed PDF extraction
+    data_columns = [c for c in df.columns if c not in LINEAGE_COLUMNS]
+    return df.dropna(how='all', subset=data_columns)
 
 # Remove embedded line breaks and whitespace artifacts from PDF extraction
 # to ensure consistent text fields.
-for col in df.select_dtypes(include=["object"]).columns:
-    df[col] = (
-        df[col]
-        .astype(str)
-        .str.replace(r"[\r\n]+", " ", regex=True)
-        .str.strip()
-    )
-
-# Replace common placeholder values with empty strings for consistent downstream handling
-df = df.replace(['-', 'N/A', 'n/a', 'null', 'NULL'], '')
+def clean_text_columns(df: pd.DataFrame) -> pd.DataFrame:
+    for col in df.select_dtypes(include=["object"]).columns:
+        df[col] = (
+            df[col]
+            .astype(str)
+            .str.replace(r"[\r\n]+", " ", regex=True)
+            .str.strip()
+        )
+
+    # Replace common placeholder values with empty strings for consistent downstream handling
+    return df.replace(['-', 'N/A', 'n/a', 'null', 'NULL'], '')
 
 # Handles multiple irregular salary formats from source data:
 # - sums ("5000+2000")
@@ -143,66 +222,144 @@ def split_dash_into_variable(row):
 
     return row
 
-df = df.apply(split_dash_into_variable, axis=1)
-
-numeric_cols = ['suma', 'indemnizatie_variabila']
-
-for col in numeric_cols:
-    if col in df.columns:
-        df[col] = df[col].apply(clean_numeric_text)
-
-# Convert cleaned salary text into integer-safe numeric columns for downstream analysis
-df["suma_num"] = (
-    df["suma"]
-    .apply(lambda x: re.sub(r"[^\d]", "", x) if isinstance(x, str) else "")
-    .replace("", "0")
-    .astype(int)
-)
-
-# Create indemnizatie_variabila_num column
-if "indemnizatie_variabila" in df.columns:
-    df["indemnizatie_variabila_num"] = (
-        df["indemnizatie_variabila"]
-        .apply(lambda x: re.sub(r"[^\d]", "", x) if isinstance(x, str) else "")
-        .replace("", "0")
-        .astype(int)
-    )
-
-df = df.dropna(how='all')
+# Parse salary text into cleaned text and integer-safe numeric columns
+def parse_salaries(df: pd.DataFrame) -> pd.DataFrame:
+    with span("split_dash", rows=len(df)):
+        df = df.apply(split_dash_into_variable, axis=1)
+
+    numeric_cols = ['suma', 'indemnizatie_variabila']
+
+    with span("clean_numeric_text", rows=len(df)):
+        for col in numeric_cols:
+            if col in df.columns:
+                df[col] = df[col].apply(clean_numeric_text)
+
+    with span("parse_numeric", rows=len(df)):
+        # Convert cleaned salary text into integer-safe numeric columns for downstream analysis
+        df["suma_num"] = (
+            df["suma"]
+            .apply(lambda x: re.sub(r"[^\d]", "", x) if isinstance(x, str) else "")
+            .replace("", "0")
+            .astype(int)
+        )
+
+        # Create indemnizatie_variabila_num column
+        if "indemnizatie_variabila" in df.columns:
+            df["indemnizatie_variabila_num"] = (
+                df["indemnizatie_variabila"]
+                .apply(lambda x: re.sub(r"[^\d]", "", x) if isinstance(x, str) else "")
+                .replace("", "0")
+                .astype(int)
+            )
+
+    return df.dropna(how='all')
 
 # Ensure identifier column is consistently formatted as a string
 # and remove Excel-style ".0" artifacts.
-if 'nr_crt' in df.columns:
-    df['nr_crt'] = (
-        df['nr_crt']
-        .astype(str)
-        .str.replace(r'\.0$', '', regex=True)
-        .str.strip()
-        .replace({'nan': '', 'None': ''})
-    )
-
-# Infer missing nr_crt values using stable CUI -> nr_crt mapping
-# based on rows where the identifier is already present.
-if 'nr_crt' in df.columns and 'cui' in df.columns:
-    # build mapping of cui -> nr_crt from rows that already have nr_crt
-    cui_to_nrcrt = (
+def normalize_nr_crt(df: pd.DataFrame) -> pd.DataFrame:
+    if 'nr_crt' in df.columns:
+        df['nr_crt'] = (
+            df['nr_crt']
+            .astype(str)
+            .str.replace(r'\.0$', '', regex=True)
+            .str.strip()
+            .replace({'nan': '', 'None': ''})
+        )
+    return df
+
+# All row-local cleaning steps; safe to apply to any slice of the raw data.
+def clean_chunk(df: pd.DataFrame) -> pd.DataFrame:
+    with span("normalize_columns", rows=len(df)):
+        df = normalize_columns(df)
+    with span("clean_text_columns", rows=len(df)):
+        df = clean_text_columns(df)
+    df = parse_salaries(df)
+    with span("normalize_nr_crt", rows=len(df)):
+        return normalize_nr_crt(df)
+
+# Phase 1 of nr_crt inference: stable CUI -> nr_crt mapping from rows that
+# already have the identifier. The first occurrence wins, so merging the
+# mappings of consecutive chunks with setdefault gives the same result.
+def build_cui_to_nrcrt(df: pd.DataFrame, mapping: dict | None = None) -> dict:
+    mapping = {} if mapping is None else mapping
+    found = (
         df.loc[df['nr_crt'].str.strip() != '', ['cui', 'nr_crt']]
         .drop_duplicates(subset='cui')
         .set_index('cui')['nr_crt']
         .to_dict()
     )
-
-    # fill missing nr_crt directly in place
-    df['nr_crt'] = df.apply(
-        lambda row: row['nr_crt'] if row['nr_crt'].strip() != '' else cui_to_nrcrt.get(row['cui'], ''),
-        axis=1
-    )
-else:
-    print("Warning: Missing 'nr_crt' or 'cui' column — skipping identifier inference.")
-
-print(f"Final cleaned row count: {len(df)}")
-print(f"Final columns: {list(df.columns)}")
-
-# Persist cleaned dataset as a stable, versionable artifact for downstream processing
-df.to_csv(CLEAN_PATH, index=False, encoding='utf-8')
-print(f"Cleaned CSV saved to {CLEAN_PATH}")
+    for cui, nr_crt in found.items():
+        mapping.setdefault(cui, nr_crt)
+    return mapping
+
+# Output layout: data columns first, lineage columns last
+def order_columns(df: pd.DataFrame) -> pd.DataFrame:
+    lineage = [c for c in LINEAGE_COLUMNS if c in df.columns]
+    return df[[c for c in df.columns if c not in lineage] + lineage]
+
+# Phase 2: fill missing nr_crt values from the mapping
+def fill_nr_crt(df: pd.DataFrame, cui_to_nrcrt: dict) -> pd.DataFrame:
+    blank = df['nr_crt'].str.strip() == ''
+    inferred = df['cui'].astype(object).map(cui_to_nrcrt).fillna('')
+    df['nr_crt'] = df['nr_crt'].where(~blank, inferred)
+    return df
+
+def main() -> None:
+    # Row-local cleaning chunk by chunk; each cleaned chunk is compacted
+    # (categoricals, Int32) before the next one is read, so the all-string
+    # representation only ever exists for one chunk.
+    # Time between "chunk" spans inside "read_and_clean" is CSV parsing.
+    raw_rows = 0
+    chunks = []
+    with span("read_and_clean") as s, open_artifact(RAW_PATH) as raw_file:
+        for chunk in iter_raw_chunks(raw_file, CHUNK_ROWS):
+            raw_rows += len(chunk)
+            with span("chunk", rows=len(chunk)):
+                cleaned = clean_chunk(chunk)
+                with span("compact", rows=len(cleaned)):
+                    chunks.append(compact(cleaned))
+        s["rows"] = raw_rows
+
+    print("Rows read:", raw_rows)
+    report_progress(1, "read_and_clean")
+
+    with span("combine", chunks=len(chunks)):
+        df = concat_compact(chunks)
+    del chunks
+    print("Columns after cleaning:", df.columns)
+    report_progress(2, "combine")
+
+    # Split words glued by the PDF export. The dictionary comes from the
+    # distinct values of the whole dataset, so this runs after the chunks are
+    # combined; on categoricals it costs one segmentation per distinct value.
+    with span("segment_words", rows=len(df)) as s:
+        segment = make_segmenter(*build_vocabulary(distinct_text_values(df)))
+        df, segmented = segment_columns(df, segment)
+        s["values_changed"] = segmented
+    print(f"Values with glued words repaired: {segmented}")
+    report_progress(3, "segment_words")
+
+    # Infer missing nr_crt values using stable CUI -> nr_crt mapping
+    # based on rows where the identifier is already present.
+    if 'nr_crt' in df.columns and 'cui' in df.columns:
+        with span("nr_crt_inference", rows=len(df)):
+            df = fill_nr_crt(df, build_cui_to_nrcrt(df))
+    else:
+        print("Warning: Missing 'nr_crt' or 'cui' column — skipping identifier inference.")
+    report_progress(4, "nr_crt_inference")
+
+    df = order_columns(df)
+    report_memory(df)
+
+    print(f"Final cleaned row count: {len(df)}")
+    print(f"Final columns: {list(df.columns)}")
+
+    # Persist cleaned dataset as a stable, versionable artifact for downstream processing
+    with span("write_csv", rows=len(df)), open_artifact(CLEAN_PATH, "w") as clean_file:
+        df.to_csv(clean_file, index=False)
+    print(f"Cleaned CSV saved to {CLEAN_PATH}")
+    report_progress(5, "write")
+    print(f"[metrics] rows_processed={len(df)} segmented_values={segmented}")
+
+if __name__ == "__main__":
+    main()
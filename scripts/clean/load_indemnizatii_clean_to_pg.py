@@ -2,23 +2,37 @@
 # Ensures schema exists, truncates target table, and bulk loads data via COPY.
 
 from pathlib import Path
+import csv
 import os
 import psycopg2
+import re
 import sys
 
+from scripts.common.artifacts import open_artifact, resolve_artifact
+
 # Resolve project root to construct portable, repo-relative file paths
 PROJECT_ROOT = Path(__file__).resolve().parents[2]
 
-csv_path = PROJECT_ROOT / "data" / "indemnizatii_clean.csv"
+# PIPELINE_DATA_DIR relocates the data artifacts (benchmarks, sample runs)
+DATA_DIR = Path(os.getenv("PIPELINE_DATA_DIR") or PROJECT_ROOT / "data")
+
+# The validate stage's output: it is only written when no error-severity
+# quality rule fails, so a failed validation leaves nothing to load.
+# Plain, .gz or .zst; compressed files are decompressed straight into COPY.
+csv_path = resolve_artifact(DATA_DIR / "indemnizatii_clean_validated.csv")
 ddl_path = PROJECT_ROOT / "sql" / "schema" / "create_table_indemnizatii_clean.sql"
 
+# Target schema; sample runs (run_pipeline.py --sample) load into raw_sample
+RAW_SCHEMA = "raw" + (os.getenv("PIPELINE_SCHEMA_SUFFIX") or "")
+
 # Ensure required input artifacts exist before proceeding
 if not ddl_path.exists():
     raise FileNotFoundError(f"DDL file not found: {ddl_path}")
 
 if not csv_path.exists():
     raise FileNotFoundError(
-        f"CSV not found: {csv_path}. Did you run the cleaning/export step first?"
+        f"CSV not found: {csv_path}. Run the validate stage first; it withholds "
+        "this file when an error-severity quality rule fails."
     )
 
 # Build connection parameters from environment variables (libpq-compatible)
@@ -52,26 +66,64 @@ if host not in LOCAL_HOSTS and allow_cloud:
     print("WARNING: destructive cloud reload enabled via ALLOW_CLOUD_TRUNCATE=true", file=sys.stderr)
 
 # Full reload strategy: remove all existing rows and reset identity sequence
-truncate_sql = "TRUNCATE TABLE raw.indemnizatii_clean RESTART IDENTITY;"
+truncate_sql = f"TRUNCATE TABLE {RAW_SCHEMA}.indemnizatii_clean RESTART IDENTITY;"
+
+# Columns of raw.indemnizatii_clean filled from the CSV. person_key is added
+# by the match_persons stage, so a CSV straight from clean does not have it.
+LOAD_COLUMNS = [
+    "nr_crt",
+    "autoritate_tutelara",
+    "intreprindere",
+    "cui",
+    "personal",
+    "person_key",
+    "calitate_membru",
+    "suma",
+    "indemnizatie_variabila",
+    "suma_num",
+    "indemnizatie_variabila_num",
+    "source_line",
+    "raw_hash",
+]
+
+# COPY maps CSV fields by position, so the column list follows the file's
+# header. A header that is not exactly LOAD_COLUMNS (in any order) is
+# rejected before the table is truncated, instead of loading shifted or
+# partial rows.
+def read_header(path: Path) -> list[str]:
+    with open_artifact(path) as f:
+        return next(csv.reader([f.readline()]), [])
+
+def check_header(header: list[str], path: Path) -> None:
+    missing = [c for c in LOAD_COLUMNS if c not in header]
+    if missing == ["person_key"]:
+        raise RuntimeError(
+            f"{path.name} has no person_key column. Run the match_persons stage first."
+        )
+    unexpected = [c for c in header if c not in LOAD_COLUMNS]
+    if missing or unexpected or len(header) != len(LOAD_COLUMNS):
+        raise RuntimeError(
+            f"{path.name} columns do not match {RAW_SCHEMA}.indemnizatii_clean: "
+            f"missing={missing} unexpected={unexpected}"
+        )
 
 # Bulk load using PostgreSQL COPY for efficient ingestion from CSV
-copy_sql = """
-COPY raw.indemnizatii_clean (
-    nr_crt,
-    autoritate_tutelara,
-    intreprindere,
-    cui,
-    personal,
-    calitate_membru,
-    suma,
-    indemnizatie_variabila,
-    suma_num,
-    indemnizatie_variabila_num
+# (the header line has already been consumed by the caller). The validated
+# file quotes every field; FORCE_NULL reads a quoted empty field as NULL, as
+# COPY does for an unquoted one.
+def copy_sql(columns: list[str]) -> str:
+    column_list = ",\n    ".join(columns)
+    return f"""
+COPY {RAW_SCHEMA}.indemnizatii_clean (
+    {column_list}
 )
 FROM STDIN
-DELIMITER ','
-CSV HEADER
-ENCODING 'UTF8';
+WITH (
+    FORMAT csv,
+    DELIMITER ',',
+    FORCE_NULL ({", ".join(columns)}),
+    ENCODING 'UTF8'
+);
 """
 
 # Create a new PostgreSQL connection using resolved environment configuration
@@ -81,6 +133,8 @@ def get_connection():
 # Ensure target schema and table exist by executing DDL script
 def ensure_schema(cur):
     sql = ddl_path.read_text(encoding="utf-8")
+    if RAW_SCHEMA != "raw":
+        sql = re.sub(r"\braw(?=[.;])", RAW_SCHEMA, sql)
     cur.execute(sql)
     print("Schema/table ensured (DDL executed).")
 
@@ -89,22 +143,28 @@ def truncate_table(cur):
     cur.execute(truncate_sql)
     print("Table truncated successfully (full reload mode).")
 
-# Load CSV data into target table using COPY for performance and consistency
-def load_csv_to_table(cur, path: Path):
-    with open(path, "r", encoding="utf-8") as f:
-        cur.copy_expert(copy_sql, f)
-    print("Data reloaded successfully from CSV.")
+# Load CSV data into target table using COPY for performance and consistency.
+# Compressed artifacts are streamed through the decompressor, no temp copy.
+def load_csv_to_table(cur, path: Path, columns: list[str]):
+    with open_artifact(path) as f:
+        f.readline()  # header, already checked
+        cur.copy_expert(copy_sql(columns), f)
+    print(f"Data reloaded successfully from {path.name}.")
+    print(f"[metrics] rows_processed={cur.rowcount}")
 
 # Entry point for load stage: ensures schema, truncates table, and loads fresh data
 def main():
     try:
+        header = read_header(csv_path)
+        check_header(header, csv_path)
+
         conn = get_connection()
         conn.autocommit = True
         cur = conn.cursor()
 
         ensure_schema(cur)
         truncate_table(cur)
-        load_csv_to_table(cur, csv_path)
+        load_csv_to_table(cur, csv_path, header)
     
     # Fail fast on any error and propagate non-zero exit code for pipeline orchestration
     except Exception as e:
@@ -0,0 +1,300 @@
+# Person matching: resolves spelling variants of the same person's name to
+# one stable person_key and writes it into the cleaned artifact.
+#
+# Variants come from the PDF export and from manual entry across years:
+# case and diacritics ("Chiriac Petronel" / "CHIRIAC PETRONEL "), swapped
+# given/family name order, glued tokens and small typos.
+#
+# Never compares all pairs of names:
+#   1. names are normalized (ASCII, lowercase, sorted tokens) and deduplicated,
+#      so exact variants collapse before any comparison
+#   2. candidate pairs come from token blocking (names sharing a rare token)
+#      and MinHash/LSH over character 3-grams (catches glued tokens and typos)
+#   3. candidates are scored token by token (exact tokens, glued tokens, one
+#      substituted letter) and pairs >= PERSON_MATCH_THRESHOLD are merged
+#      (union-find). A substituted letter alone is not proof ("Dobra" and
+#      "Dobre" are different surnames), so such pairs only merge when the
+#      names also appear under a shared CUI
+#   4. each cluster gets the key already recorded for one of its names in
+#      the person registry, or a new key derived from its first name, so keys
+#      stay stable as the roster grows across runs
+
+import csv
+import hashlib
+import os
+import re
+import unicodedata
+import zlib
+from collections import Counter
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from scripts.common.artifacts import open_artifact, resolve_artifact
+from scripts.common.schema import read_clean_csv
+
+BASE_DIR = Path(__file__).resolve().parents[2]  # repo root
+# PIPELINE_DATA_DIR relocates the data artifacts (benchmarks, sample runs)
+DATA_DIR = Path(os.getenv("PIPELINE_DATA_DIR") or BASE_DIR / "data")
+CLEAN_PATH = resolve_artifact(DATA_DIR / "indemnizatii_clean.csv")
+REGISTRY_PATH = DATA_DIR / "person_registry.csv"
+
+# Minimum similarity (see similarity()) for two names to be the same person;
+# 0.8 admits one substituted letter in tokens of 5+ letters.
+MATCH_THRESHOLD = float(os.getenv("PERSON_MATCH_THRESHOLD", "0.8"))
+
+# Tokens shared by more names than this (common given names) are not used as
+# blocks; the LSH pass still covers those names.
+MAX_BLOCK_SIZE = 50
+
+# MinHash signature: BANDS x ROWS_PER_BAND values. Two names become candidates
+# when all rows of any band agree, i.e. from roughly 0.5 Jaccard similarity.
+BANDS = 16
+ROWS_PER_BAND = 4
+SHINGLE = 3
+MINHASH_PRIME = (1 << 31) - 1
+MINHASH_SEED = 20240901
+
+PROGRESS_STEPS = 4
+def report_progress(done: int, step: str) -> None:
+    print(f"[progress] done={done} total={PROGRESS_STEPS} unit=steps step={step}")
+
+def name_tokens(name: str) -> list[str]:
+    ascii_name = unicodedata.normalize("NFKD", name).encode("ascii", "ignore").decode()
+    return re.sub(r"[^a-z]+", " ", ascii_name.lower()).split()
+
+# Order-insensitive form: "Petronel CHIRIAC" and "Chiriac Petronel" -> "chiriac petronel"
+def canonical_name(name: str) -> str:
+    return " ".join(sorted(name_tokens(name)))
+
+def shingles(canonical: str) -> set[int]:
+    grams = set()
+    for token in canonical.split():
+        padded = f" {token} "
+        grams.update(padded[i:i + SHINGLE] for i in range(len(padded) - SHINGLE + 1))
+    return {zlib.crc32(g.encode("ascii")) for g in grams}
+
+# Token-level similarity: 1.0 for equal tokens, 1 - 1/len for a single
+# substituted letter in a token of at least 5 letters ("petronel" /
+# "petronal"), otherwise 0. Insertions and deletions do not count as typos: they separate
+# distinct given names ("oana" / "ioana", "maria" / "marian").
+def token_similarity(x: str, y: str) -> float:
+    if x == y:
+        return 1.0
+    if len(x) != len(y) or len(x) < 5:
+        return 0.0
+    mismatches = sum(1 for cx, cy in zip(x, y) if cx != cy)
+    return 1.0 - 1.0 / len(x) if mismatches == 1 else 0.0
+
+# Split glued tokens ("avramescubogdan") that are the concatenation of two
+# tokens of the other name, in either order.
+def split_glued(tokens: list[str], other: list[str]) -> list[str]:
+    vocabulary = set(other)
+    result = []
+    for token in tokens:
+        if token not in vocabulary:
+            for cut in range(2, len(token) - 1):
+                head, tail = token[:cut], token[cut:]
+                if head in vocabulary and tail in vocabulary:
+                    result.extend([head, tail])
+                    break
+            else:
+                result.append(token)
+        else:
+            result.append(token)
+    return result
+
+# Similarity of two canonical names, after undoing glued tokens. Names must
+# agree on every token except at most one pair, scored by token_similarity;
+# one extra token of up to 2 letters (an initial, "(FP)") is tolerated.
+def similarity(a: str, b: str) -> float:
+    ta, tb = a.split(), b.split()
+    ta, tb = split_glued(ta, tb), split_glued(tb, ta)
+    only_a, only_b = Counter(ta) - Counter(tb), Counter(tb) - Counter(ta)
+    extra_a, extra_b = sum(only_a.values()), sum(only_b.values())
+
+    if extra_a == 0 and extra_b == 0:
+        return 1.0
+    if extra_a + extra_b == 1:
+        (token,) = (only_a or only_b).elements()
+        shared = min(len(ta), len(tb))
+        return 1.0 if len(token) <= 2 and shared >= 2 else 0.0
+    if extra_a == 1 and extra_b == 1:
+        (x,), (y,) = only_a.elements(), only_b.elements()
+        return token_similarity(x, y)
+    return 0.0
+
+def token_block_pairs(names: list[str]) -> set[tuple[int, int]]:
+    blocks: dict[str, list[int]] = {}
+    for i, name in enumerate(names):
+        for token in set(name.split()):
+            blocks.setdefault(token, []).append(i)
+
+    pairs = set()
+    for members in blocks.values():
+        if 1 < len(members) <= MAX_BLOCK_SIZE:
+            pairs.update(
+                (members[x], members[y])
+                for x in range(len(members))
+                for y in range(x + 1, len(members))
+            )
+    return pairs
+
+def lsh_pairs(names: list[str]) -> set[tuple[int, int]]:
+    rng = np.random.default_rng(MINHASH_SEED)
+    num_perm = BANDS * ROWS_PER_BAND
+    a = rng.integers(1, MINHASH_PRIME, size=num_perm, dtype=np.int64)
+    b = rng.integers(0, MINHASH_PRIME, size=num_perm, dtype=np.int64)
+
+    buckets: dict[tuple, list[int]] = {}
+    for i, name in enumerate(names):
+        grams = shingles(name)
+        if not grams:
+            continue
+        x = np.fromiter(grams, dtype=np.int64, count=len(grams)) % MINHASH_PRIME
+        signature = ((np.outer(a, x) + b[:, None]) % MINHASH_PRIME).min(axis=1)
+        for band in range(BANDS):
+            rows = signature[band * ROWS_PER_BAND:(band + 1) * ROWS_PER_BAND]
+            buckets.setdefault((band, *rows.tolist()), []).append(i)
+
+    pairs = set()
+    for members in buckets.values():
+        if 1 < len(members) <= MAX_BLOCK_SIZE:
+            pairs.update(
+                (members[x], members[y])
+                for x in range(len(members))
+                for y in range(x + 1, len(members))
+            )
+    return pairs
+
+def find(parent: list[int], i: int) -> int:
+    while parent[i] != i:
+        parent[i] = parent[parent[i]]
+        i = parent[i]
+    return i
+
+def new_person_key(canonical: str) -> str:
+    return hashlib.blake2b(canonical.encode("utf-8"), digest_size=8).hexdigest()
+
+def load_registry(path: Path) -> dict[str, str]:
+    if not path.exists():
+        return {}
+    with path.open(encoding="utf-8", newline="") as f:
+        return {row["canonical_name"]: row["person_key"] for row in csv.DictReader(f)}
+
+def save_registry(path: Path, registry: dict[str, str]) -> None:
+    tmp = path.with_name(f".tmp-{path.name}")
+    with tmp.open("w", encoding="utf-8", newline="") as f:
+        writer = csv.writer(f, lineterminator="\n")
+        writer.writerow(["canonical_name", "person_key"])
+        writer.writerows(sorted(registry.items()))
+    tmp.replace(path)
+
+# CUIs each canonical name appears under; a fuzzy match needs the two names
+# to share one. The supervising authority is too coarse for this (one
+# ministry oversees over a fifth of all rows).
+def name_contexts(df: pd.DataFrame, canonical_of_code: np.ndarray) -> dict[str, set[str]]:
+    pairs = pd.DataFrame({
+        "code": df["personal"].cat.codes.to_numpy(),
+        "cui": df["cui"].astype(str).str.strip().to_numpy(),
+    })
+    pairs = pairs[(pairs["code"] >= 0) & (pairs["cui"] != "")].drop_duplicates()
+    contexts: dict[str, set[str]] = {}
+    for code, cui in zip(pairs["code"], pairs["cui"]):
+        contexts.setdefault(canonical_of_code[code], set()).add(cui)
+    return contexts
+
+# Cluster distinct canonical names. Returns canonical name -> person_key, the
+# number of candidate pairs scored and how many of them matched. Exact and
+# glued-token matches (similarity 1.0) merge on the name alone; fuzzier ones
+# only when contexts shows a shared CUI. When a cluster joins
+# names that already had different keys, the smallest key wins and the
+# registry is rewritten to it.
+def resolve_person_keys(
+    names: list[str], registry: dict[str, str], contexts: dict[str, set] | None = None
+) -> tuple[dict[str, str], int, int]:
+    candidates = token_block_pairs(names) | lsh_pairs(names)
+
+    parent = list(range(len(names)))
+    matched = 0
+    for i, j in candidates:
+        score = similarity(names[i], names[j])
+        if score < 1.0 and contexts is not None and not (
+            contexts.get(names[i], set()) & contexts.get(names[j], set())
+        ):
+            continue
+        if score >= MATCH_THRESHOLD:
+            matched += 1
+            ri, rj = find(parent, i), find(parent, j)
+            if ri != rj:
+                parent[max(ri, rj)] = min(ri, rj)
+
+    clusters: dict[int, list[str]] = {}
+    for i, name in enumerate(names):
+        clusters.setdefault(find(parent, i), []).append(name)
+
+    # A registry key shared by clusters that no longer match (an earlier
+    # run merged them) stays with the first cluster; the others get a key
+    # of their own
+    keys = {}
+    taken: set[str] = set()
+    for members in sorted(clusters.values(), key=min):
+        known = sorted({registry[m] for m in members if m in registry} - taken)
+        key = known[0] if known else new_person_key(min(members))
+        taken.add(key)
+        for m in members:
+            keys[m] = key
+    return keys, len(candidates), matched
+
+def main() -> None:
+    with open_artifact(CLEAN_PATH) as f:
+        df = read_clean_csv(f, keep_default_na=False)
+    df = df.drop(columns=["person_key"], errors="ignore")
+    report_progress(1, "read")
+
+    # Work on distinct spellings only; the frame maps back through them
+    spellings = pd.Series(df["personal"].cat.categories.astype(str))
+    canonical = spellings.map(canonical_name)
+    names = sorted(set(canonical) - {""})
+    print(f"Distinct spellings: {len(spellings)}, distinct normalized names: {len(names)}")
+    report_progress(2, "normalize")
+
+    registry = load_registry(REGISTRY_PATH)
+    contexts = name_contexts(df, canonical.to_numpy())
+    keys, candidate_pairs, matched_pairs = resolve_person_keys(names, registry, contexts)
+    clusters = len(set(keys.values()))
+    print(f"Candidate pairs: {candidate_pairs}, matched: {matched_pairs}, person keys: {clusters}")
+    report_progress(3, "match")
+
+    # Show a few merged groups for review
+    by_key: dict[str, list[str]] = {}
+    for spelling, canon in zip(spellings, canonical):
+        if canon:
+            by_key.setdefault(keys[canon], []).append(spelling)
+    merged = [group for group in by_key.values() if len({canonical_name(s) for s in group}) > 1]
+    for group in merged[:10]:
+        print(f"  merged: {sorted(group)}")
+
+    spelling_keys = canonical.map(lambda c: keys.get(c, "")).to_numpy()
+    codes = df["personal"].cat.codes.to_numpy()
+    person_key = np.where(codes >= 0, spelling_keys[codes], "")
+    df.insert(df.columns.get_loc("personal") + 1, "person_key", pd.Categorical(person_key))
+
+    registry.update(keys)
+    save_registry(REGISTRY_PATH, registry)
+
+    tmp = CLEAN_PATH.with_name(f".tmp-{CLEAN_PATH.name}")
+    with open_artifact(tmp, "w") as f:
+        df.to_csv(f, index=False)
+    tmp.replace(CLEAN_PATH)
+    print(f"person_key written to {CLEAN_PATH}")
+    report_progress(4, "write")
+
+    print(
+        f"[metrics] rows_processed={len(df)} distinct_names={len(names)} "
+        f"candidate_pairs={candidate_pairs} person_keys={clusters} merged_groups={len(merged)}"
+    )
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,32 @@
+# PDF-to-Postgres ETL used by `make etl` and scripts/ingest/run_ingest.py:
+# optional PDF extraction, then clean -> match persons -> validate -> load, each as its own
+# `python -m` subprocess that must succeed before the next one runs.
+#
+# Extraction runs when PIPELINE_PDF_PATH points at the AMEPIP PDF;
+# otherwise the existing data/indemnizatii.csv is cleaned as-is.
+
+import os
+
+from scripts.ingest.run_ingest import run_stage
+
+STAGES = [
+    ("Clean", "scripts.clean.data_clean"),
+    ("Match persons", "scripts.clean.match_persons"),
+    ("Validate", "scripts.clean.validate_and_export"),
+    ("Load", "scripts.clean.load_indemnizatii_clean_to_pg"),
+]
+
+def main():
+    stages = list(STAGES)
+    if os.getenv("PIPELINE_PDF_PATH"):
+        stages.insert(0, ("PDF extract", "scripts.ingest.extract_pdf"))
+    else:
+        print("PIPELINE_PDF_PATH not set; using the existing raw CSV.")
+
+    for name, module in stages:
+        run_stage(name, module)
+
+    print("\nClean pipeline complete.")
+
+if __name__ == "__main__":
+    main()
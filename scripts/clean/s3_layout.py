@@ -0,0 +1,115 @@
+# Period-partitioned S3 layout for cleaned compensation artifacts.
+#
+#   <dataset>/period=<period>/part-00000-<sha256 prefix>.parquet
+#   <dataset>/_manifest.json
+#
+# The pipeline's upload stage writes the matched dataset (with person_key)
+# under DATASET_PREFIX; the S3-triggered Lambda, which has no person
+# registry, writes under indemnizatii_unmatched. Each dataset has its own
+# manifest, so the two writers never replace each other's parts.
+#
+# The manifest lists every partition with its files, row counts and content
+# checksums. Writers use it to upload only partitions whose content changed;
+# readers use it to fetch just the periods they need without LIST calls.
+#
+# Readers never see a manifest entry whose files are missing or changed:
+# part keys carry their content checksum, so a new version is written under
+# new keys and never overwrites a key the current manifest lists; the
+# manifest is saved next, and the keys it no longer lists are deleted last.
+
+import gzip
+import hashlib
+import io
+import json
+from datetime import datetime, timezone
+
+DATASET_PREFIX = "indemnizatii"
+MANIFEST_KEY = f"{DATASET_PREFIX}/_manifest.json"
+
+# Supported part formats and their file suffix
+FORMATS = {
+    "parquet": ".parquet",
+    "csv.gz": ".csv.gz",
+}
+
+def manifest_key(dataset: str = DATASET_PREFIX) -> str:
+    return f"{dataset}/_manifest.json"
+
+def partition_prefix(period: str, dataset: str = DATASET_PREFIX) -> str:
+    return f"{dataset}/period={period}/"
+
+# Content-addressed: sha is the part's content_sha256
+def part_key(period: str, index: int, fmt: str, sha: str, dataset: str = DATASET_PREFIX) -> str:
+    return f"{partition_prefix(period, dataset)}part-{index:05d}-{sha[:16]}{FORMATS[fmt]}"
+
+# Checksum over the canonical CSV rendering of a part (a pandas DataFrame),
+# so change detection does not depend on serializer details (parquet
+# metadata, gzip timestamps).
+def content_sha256(frame) -> str:
+    return hashlib.sha256(frame.to_csv(index=False).encode("utf-8")).hexdigest()
+
+def serialize(frame, fmt: str) -> bytes:
+    if fmt == "parquet":
+        buf = io.BytesIO()
+        frame.to_parquet(buf, index=False, compression="zstd")
+        return buf.getvalue()
+    return gzip.compress(frame.to_csv(index=False).encode("utf-8"), mtime=0)
+
+# Partition checksum: hash of the ordered part checksums
+def partition_sha256(part_hashes: list[str]) -> str:
+    return hashlib.sha256("".join(part_hashes).encode("ascii")).hexdigest()
+
+def partition_entry(period: str, fmt: str, files: list[dict]) -> dict:
+    return {
+        "period": period,
+        "format": fmt,
+        "rows": sum(f["rows"] for f in files),
+        "sha256": partition_sha256([f["sha256"] for f in files]),
+        "files": files,
+    }
+
+# Keys of the previous version of a partition that the new one no longer
+# lists. They come from the old manifest entry, so no LIST call is needed.
+def stale_keys(previous: dict | None, files: list[dict]) -> list[str]:
+    new_keys = {f["key"] for f in files}
+    return [f["key"] for f in (previous or {}).get("files", []) if f["key"] not in new_keys]
+
+# Delete superseded parts; call only after the manifest that drops them is saved
+def delete_keys(s3, bucket: str, keys: list[str]) -> None:
+    for start in range(0, len(keys), 1000):  # delete_objects takes up to 1000 keys
+        batch = keys[start:start + 1000]
+        s3.delete_objects(Bucket=bucket, Delete={"Objects": [{"Key": k} for k in batch]})
+
+def empty_manifest(dataset: str = DATASET_PREFIX) -> dict:
+    return {"dataset": dataset, "updated_at_utc": None, "partitions": {}}
+
+def load_manifest(s3, bucket: str, dataset: str = DATASET_PREFIX) -> dict:
+    from botocore.exceptions import ClientError
+
+    try:
+        obj = s3.get_object(Bucket=bucket, Key=manifest_key(dataset))
+    except ClientError as e:
+        if e.response.get("Error", {}).get("Code") in {"404", "NoSuchKey", "NotFound"}:
+            return empty_manifest(dataset)
+        raise
+    return json.loads(obj["Body"].read().decode("utf-8"))
+
+# Written after all partition files are in place and before superseded
+# parts are deleted (see delete_keys).
+# The key follows the manifest's own "dataset" field.
+def save_manifest(s3, bucket: str, manifest: dict) -> None:
+    manifest["updated_at_utc"] = (
+        datetime.now(timezone.utc).replace(microsecond=0).isoformat().replace("+00:00", "Z")
+    )
+    s3.put_object(
+        Bucket=bucket,
+        Key=manifest_key(manifest.get("dataset", DATASET_PREFIX)),
+        Body=json.dumps(manifest, indent=2, sort_keys=True).encode("utf-8"),
+        ContentType="application/json",
+    )
+
+# Pick partition entries for the requested periods (all when none given).
+def select_partitions(manifest: dict, periods: list[str] | None = None) -> list[dict]:
+    partitions = manifest.get("partitions", {})
+    wanted = periods or sorted(partitions)
+    return [partitions[p] for p in wanted if p in partitions]
@@ -0,0 +1,152 @@
+# Repair of words glued together by PDF extraction, e.g.
+#   "AGENTIA NATIONALA PENTRU PESCUIT SIACVACULTURA"
+#       -> "AGENTIA NATIONALA PENTRU PESCUIT SI ACVACULTURA"
+#
+# The dictionary is built from the corpus itself: a word's weight is the
+# number of distinct (case- and diacritic-folded) values it appears in.
+# A letter run is only split when it is not a dictionary word itself and it
+# can be covered entirely by dictionary words; the split with the fewest
+# parts wins, ties go to the most frequent parts (dynamic programming over
+# split points).
+#
+# Segmentation is memoized per distinct value and per token, so the cost
+# grows with the number of unique strings, not with the number of rows.
+
+import math
+import re
+import unicodedata
+from collections import Counter
+from functools import lru_cache
+from typing import Callable, Iterable
+
+import numpy as np
+import pandas as pd
+
+from scripts.common.schema import is_categorical
+
+# Text columns repaired by the clean step (names are left to match_persons)
+SEGMENT_COLUMNS = ("autoritate_tutelara", "intreprindere", "calitate_membru")
+
+LETTER_RUN = re.compile(r"[^\W\d_]+")
+
+# Only runs this long are considered glued; shorter ones are left alone
+MIN_GLUED_LENGTH = 6
+# A run appearing in at least this many distinct values is a word, not a glue error
+MIN_WORD_FREQ = 2
+
+@lru_cache(maxsize=None)
+def fold_char(ch: str) -> str:
+    return unicodedata.normalize("NFKD", ch)[0].lower()[0]
+
+# Case- and diacritic-folded copy of text, one character per character, so
+# split points found on the folded form apply to the original.
+def fold(text: str) -> str:
+    return "".join(fold_char(ch) for ch in text)
+
+# Word and adjacent-word-pair counts over distinct folded values
+def build_vocabulary(values: Iterable[str]) -> tuple[Counter, Counter]:
+    words, pairs = Counter(), Counter()
+    for value in {fold(v) for v in values if v}:
+        runs = LETTER_RUN.findall(value)
+        words.update(set(runs))
+        pairs.update(set(zip(runs, runs[1:])))
+    return words, pairs
+
+# Distinct non-empty strings of the text columns, the input to build_vocabulary
+def distinct_text_values(df: pd.DataFrame, columns: Iterable[str] = SEGMENT_COLUMNS) -> set[str]:
+    values = set()
+    for col in columns:
+        if col in df.columns:
+            s = df[col]
+            uniques = s.cat.categories if is_categorical(s) else s.dropna().unique()
+            values.update(v for v in uniques if isinstance(v, str) and v)
+    return values
+
+# Returns a memoized function that repairs glued words in one value,
+# inserting sep at the split points.
+def make_segmenter(
+    words: Counter, pairs: Counter, sep: str = " ", min_word_freq: int = MIN_WORD_FREQ
+) -> Callable[[str], str]:
+    max_len = max((len(w) for w in words), default=0)
+
+    # Split offsets for a folded run, or () when it stays whole. Every part
+    # must be a known word of 2+ letters and every two adjacent parts must
+    # occur side by side elsewhere in the corpus, which keeps compounds like
+    # "automecanica" whole unless "auto mecanica" is attested.
+    # states[i] maps the start of the last part of a segmentation of
+    # token[:i] to its best (parts, -weight, offsets).
+    @lru_cache(maxsize=None)
+    def split_points(token: str) -> tuple[int, ...]:
+        n = len(token)
+        if n < MIN_GLUED_LENGTH or words.get(token, 0) >= min_word_freq:
+            return ()
+
+        states: list[dict[int, tuple]] = [{} for _ in range(n + 1)]
+        states[0][-1] = (0, 0.0, ())
+        for end in range(2, n + 1):
+            for start in range(max(0, end - max_len), end - 1):
+                if not states[start] or (start == 0 and end == n):
+                    continue
+                word = token[start:end]
+                count = words.get(word, 0)
+                if not count:
+                    continue
+                for prev_start, (parts, neg_weight, offsets) in states[start].items():
+                    if prev_start >= 0 and not pairs.get((token[prev_start:start], word)):
+                        continue
+                    candidate = (parts + 1, neg_weight - math.log(count), offsets + (start,))
+                    current = states[end].get(start)
+                    if current is None or candidate < current:
+                        states[end][start] = candidate
+
+        if not states[n]:
+            return ()
+        return min(states[n].values())[2][1:]
+
+    @lru_cache(maxsize=None)
+    def segment(value: str) -> str:
+        folded = fold(value)
+        out = []
+        last = 0
+        for m in LETTER_RUN.finditer(folded):
+            for offset in split_points(m.group()):
+                cut = m.start() + offset
+                out.append(value[last:cut])
+                out.append(sep)
+                last = cut
+        if not out:
+            return value
+        out.append(value[last:])
+        return "".join(out)
+
+    return segment
+
+# Apply segment to every distinct value of the given columns. Categorical
+# columns are remapped through their categories (variants that become equal
+# share one category); other columns through their unique values.
+# Returns the frame and the number of distinct values that changed.
+def segment_columns(
+    df: pd.DataFrame, segment: Callable[[str], str], columns: Iterable[str] = SEGMENT_COLUMNS
+) -> tuple[pd.DataFrame, int]:
+    changed = 0
+    for col in columns:
+        if col not in df.columns:
+            continue
+        s = df[col]
+        if is_categorical(s):
+            old = s.cat.categories.astype(str)
+            new = [segment(v) for v in old]
+            changed += sum(a != b for a, b in zip(old, new))
+            categories = pd.Index(new).unique()
+            codes = categories.get_indexer(new)
+            old_codes = s.cat.codes.to_numpy()
+            df[col] = pd.Categorical.from_codes(
+                np.where(old_codes >= 0, codes[old_codes], -1), categories=categories
+            )
+        else:
+            repairs = {v: segment(v) for v in s.dropna().unique() if isinstance(v, str)}
+            repairs = {k: v for k, v in repairs.items() if k != v}
+            changed += len(repairs)
+            if repairs:
+                df[col] = s.replace(repairs)
+    return df, changed
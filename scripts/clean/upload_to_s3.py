@@ -1,37 +1,193 @@
-# Upload cleaned dataset to S3 as a stable ingestion artifact.
+# Upload cleaned dataset to S3 as period-partitioned ingestion artifacts.
+#
+# Layout (see scripts/clean/s3_layout.py):
+#   indemnizatii/period=<period>/part-00000-<sha256 prefix>.parquet
+#   indemnizatii/_manifest.json
+#
+# Each partition's content checksum is compared with the manifest, so only
+# partitions whose content changed are uploaded; repeated runs send nothing
+# but the manifest read when the data is unchanged. Within a changed
+# partition, parts whose content-addressed key is already listed are kept.
+# Superseded parts are deleted only after the new manifest is saved.
+#
+# boto3 and dotenv are imported in main() so importing this module (or
+# running --help) stays cheap.
 
-from dotenv import load_dotenv
-load_dotenv()   # Load environment variables from .env for local development
-
-import boto3
+import argparse
+import io
+import pandas as pd
 from pathlib import Path
 import os
 
+from scripts.clean.s3_layout import (
+    FORMATS,
+    MANIFEST_KEY,
+    content_sha256,
+    delete_keys,
+    load_manifest,
+    part_key,
+    partition_entry,
+    partition_sha256,
+    save_manifest,
+    serialize,
+    stale_keys,
+)
+from scripts.common.artifacts import open_artifact, resolve_artifact
+
 BASE_DIR = Path(__file__).resolve().parents[2]
-FILE_PATH = BASE_DIR / "data" / "indemnizatii_clean.csv"
+# PIPELINE_DATA_DIR relocates the data artifacts (benchmarks, sample runs)
+DATA_DIR = Path(os.getenv("PIPELINE_DATA_DIR") or BASE_DIR / "data")
+FILE_PATH = resolve_artifact(DATA_DIR / "indemnizatii_clean.csv")
+
+# Column holding the reporting period when the artifact spans several periods.
+# Single-period artifacts (the current AMEPIP publication) use --period instead.
+PERIOD_COLUMN = "reporting_period"
+
+# Object metadata key holding the SHA-256 of the part's canonical CSV content
+CHECKSUM_METADATA_KEY = "sha256"
+
+MB = 1024 * 1024
+
+# Multipart tuning: large parts uploaded concurrently saturate the link,
+# small files still go up in a single PUT.
+def transfer_config():
+    from boto3.s3.transfer import TransferConfig
 
-BUCKET = os.environ["S3_ARTIFACTS_BUCKET"]
-if not BUCKET:
-    raise RuntimeError("S3_ARTIFACTS_BUCKET environments variable is not set")
+    return TransferConfig(
+        multipart_threshold=int(os.getenv("S3_MULTIPART_THRESHOLD_MB", "16")) * MB,
+        multipart_chunksize=int(os.getenv("S3_MULTIPART_CHUNK_MB", "16")) * MB,
+        max_concurrency=int(os.getenv("S3_MAX_CONCURRENCY", "10")),
+        use_threads=True,
+    )
+
+def split_periods(df: pd.DataFrame, default_period: str) -> dict[str, pd.DataFrame]:
+    if PERIOD_COLUMN in df.columns:
+        return {str(p): g for p, g in df.groupby(PERIOD_COLUMN, sort=True)}
+    return {default_period: df}
+
+# Upload one partition if its content changed; returns (manifest entry, bytes
+# sent, keys of the previous version to delete once the manifest is saved).
+def sync_partition(
+    s3,
+    bucket: str,
+    config,
+    period: str,
+    frame: pd.DataFrame,
+    fmt: str,
+    rows_per_part: int,
+    previous: dict | None,
+    force: bool,
+) -> tuple[dict, int, list[str]]:
+    frame = frame.reset_index(drop=True)
+    chunks = [frame.iloc[i:i + rows_per_part] for i in range(0, max(len(frame), 1), rows_per_part)]
+    part_hashes = [content_sha256(c) for c in chunks]
+    partition_sha = partition_sha256(part_hashes)
 
-KEY = "indemnizatii/indemnizatii_clean.csv"
+    if (
+        not force
+        and previous is not None
+        and previous.get("sha256") == partition_sha
+        and previous.get("format") == fmt
+    ):
+        print(f"period={period}: unchanged (sha256={partition_sha[:12]}), skipping")
+        return previous, 0, []
+
+    existing = {f["key"]: f for f in (previous or {}).get("files", [])}
+    files = []
+    bytes_sent = 0
+    for index, (chunk, sha) in enumerate(zip(chunks, part_hashes)):
+        key = part_key(period, index, fmt, sha)
+        if key in existing and not force:
+            files.append(existing[key])
+            continue
+        body = serialize(chunk, fmt)
+        s3.upload_fileobj(
+            io.BytesIO(body),
+            bucket,
+            key,
+            ExtraArgs={"Metadata": {CHECKSUM_METADATA_KEY: sha}},
+            Config=config,
+        )
+        files.append({"key": key, "rows": int(len(chunk)), "sha256": sha, "bytes": len(body)})
+        bytes_sent += len(body)
+
+    uploaded = sum(1 for f in files if f["key"] not in existing or force)
+    print(f"period={period}: uploaded {uploaded} of {len(files)} part(s), {len(frame)} rows, {bytes_sent} bytes")
+    return partition_entry(period, fmt, files), bytes_sent, stale_keys(previous, files)
 
 def main():
+    from dotenv import load_dotenv
+    load_dotenv()   # Load environment variables from .env for local development
+
+    parser = argparse.ArgumentParser(description="Upload the cleaned dataset to S3 as period partitions")
+    parser.add_argument(
+        "--period",
+        default=os.getenv("REPORTING_PERIOD", "2025"),
+        help="reporting period for single-period artifacts (default: REPORTING_PERIOD or 2025)",
+    )
+    parser.add_argument(
+        "--format",
+        choices=sorted(FORMATS),
+        default=os.getenv("S3_UPLOAD_FORMAT", "parquet"),
+        help="part file format (default: parquet)",
+    )
+    parser.add_argument(
+        "--rows-per-part",
+        type=int,
+        default=int(os.getenv("S3_ROWS_PER_PART", "500000")),
+    )
+    parser.add_argument(
+        "--force",
+        action="store_true",
+        help="upload every partition even when its checksum matches the manifest",
+    )
+    args = parser.parse_args()
+
     # Ensure cleaned dataset exists before attempting upload
     if not FILE_PATH.exists():
         raise FileNotFoundError(f"File not found: {FILE_PATH}")
-    
-    # Create S3 client using configured AWS credentials (env/profile)
-    s3 = boto3.client("s3")
-
-    # Upload file as a versionable artifact for downstream consumption
-    s3.upload_file(
-        Filename=str(FILE_PATH),
-        Bucket=BUCKET,
-        Key=KEY
-    )
 
-    print(f"File uploaded to s3://{BUCKET}/{KEY}")
+    bucket = os.getenv("S3_ARTIFACTS_BUCKET")
+    if not bucket:
+        raise RuntimeError("S3_ARTIFACTS_BUCKET environment variable is not set")
+
+    import boto3
+
+    # Create S3 client using configured AWS credentials (env/profile).
+    # S3_ENDPOINT_URL points at a local S3 stand-in (MinIO / moto server).
+    s3 = boto3.client("s3", endpoint_url=os.getenv("S3_ENDPOINT_URL") or None)
+    config = transfer_config()
+
+    with open_artifact(FILE_PATH) as f:
+        df = pd.read_csv(f, dtype=str, keep_default_na=False)
+    manifest = load_manifest(s3, bucket)
+
+    total_bytes = 0
+    changed = False
+    superseded: list[str] = []
+    for period, frame in split_periods(df, args.period).items():
+        previous = manifest["partitions"].get(period)
+        entry, sent, stale = sync_partition(
+            s3, bucket, config, period, frame, args.format, args.rows_per_part, previous, args.force
+        )
+        if entry is not previous:
+            manifest["partitions"][period] = entry
+            changed = True
+        total_bytes += sent
+        superseded.extend(stale)
+
+    if changed:
+        save_manifest(s3, bucket, manifest)
+        print(f"Manifest updated: s3://{bucket}/{MANIFEST_KEY}")
+        # Only now can no reader be directed to the superseded parts
+        delete_keys(s3, bucket, superseded)
+        if superseded:
+            print(f"Deleted {len(superseded)} superseded part(s)")
+    else:
+        print("All partitions unchanged; manifest left as-is.")
+
+    print(f"[metrics] rows_processed={len(df)}")
+    print(f"[metrics] bytes_uploaded={total_bytes}")
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
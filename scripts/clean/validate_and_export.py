@@ -2,33 +2,64 @@
 # Ensures structural consistency and prevents issues during PostgreSQL COPY ingestion.
 
 import csv
+import os
 import sys
 import json
-import pandas as pd
+import time
 from pathlib import Path
 from datetime import datetime, timezone
 
+from scripts.common.artifacts import COMPRESSION_SUFFIXES, artifact_path, open_artifact, resolve_artifact
+from scripts.common.rule_engine import evaluate, load_rules
+from scripts.common.schema import read_clean_csv, report_memory
+from scripts.common.tracing import span
+
 
 # Resolve repo root (scripts/clean/... -> project root)
 BASE_DIR = Path(__file__).resolve().parents[2]
+# PIPELINE_DATA_DIR relocates the data artifacts (benchmarks, sample runs)
+DATA_DIR = Path(os.getenv("PIPELINE_DATA_DIR") or BASE_DIR / "data")
+
+# Input may be plain, .gz or .zst; PIPELINE_COMPRESSION selects the output suffix
+input_path = resolve_artifact(DATA_DIR / "indemnizatii_clean.csv")
+output_path = artifact_path(DATA_DIR / "indemnizatii_clean_validated.csv")
+
+# The load stage reads the validated file, so a previous run's copy must not
+# outlive this validation: remove every variant before checking anything.
+for stale in {artifact_path(output_path, c) for c in COMPRESSION_SUFFIXES}:
+    stale.unlink(missing_ok=True)
+
+# Declarative quality rules (scripts/common/rule_engine.py)
+RULES_PATH = Path(os.getenv("PIPELINE_QUALITY_RULES") or Path(__file__).with_name("quality_rules.yml"))
 
-input_path = BASE_DIR / "data" / "indemnizatii_clean.csv"
-output_path = BASE_DIR / "data" / "indemnizatii_clean_validated.csv"
+def repo_relative(p: Path) -> str:
+    try:
+        return str(p.relative_to(BASE_DIR))
+    except ValueError:
+        return str(p)
 
-# Load CSV with a forgiving parser to avoid breaking on minor formatting issues
-df = pd.read_csv(input_path, dtype=str, on_bad_lines="skip", encoding="utf-8").fillna("")
+# Load CSV with a forgiving parser to avoid breaking on minor formatting issues.
+# Repetitive text is held as categoricals and amounts as Int32 (scripts/common/schema.py).
+with open_artifact(input_path) as f:
+    df = read_clean_csv(f, on_bad_lines="skip")
 
-print(f"Loaded {len(df)} rows and {len(df.columns)} columns.\n")
+print(f"Loaded {len(df)} rows and {len(df.columns)} columns.")
+report_memory(df)
+print()
 
 # Validate raw file structure using csv.reader to detect inconsistent row lengths
 # that pandas may silently tolerate or skip
 print("Checking for inconsistent row lengths in raw CSV")
 expected_cols = len(df.columns)
 bad_line_count = 0
+PROGRESS_EVERY = 100_000
 
-with open(input_path, encoding="utf-8", newline="") as f:
+with open_artifact(input_path) as f:
     reader = csv.reader(f)
     for i, row in enumerate(reader, start=1):
+        # Heartbeat for the orchestrator on large files
+        if i % PROGRESS_EVERY == 0:
+            print(f"[progress] done={i} total={len(df) + 1} unit=rows")
         if len(row) != expected_cols:
             bad_line_count += 1
             print(f"Line {i} has {len(row)} columns instead of {expected_cols}: {row}")
@@ -39,46 +70,50 @@ print(f"\nRaw CSV rows with inconsistent column counts: {bad_line_count}")
 print("\n=== Data Quality Summary ===")
 print(f"Total rows: {len(df)}")
 
-critical_cols = ["autoritate_tutelara", "intreprindere", "cui", "personal", "calitate_membru"]
-missing_critical_cols = [col for col in critical_cols if col not in df.columns]
+ruleset = load_rules(RULES_PATH)
+missing_critical_cols = [col for col in ruleset.required_columns if col not in df.columns]
 
 if missing_critical_cols:
     print(f"Missing critical columns: {missing_critical_cols}")
     sys.exit(1)
 
-rows_with_missing_fields = df[df[critical_cols].apply(lambda x: x.str.strip().eq("").any(), axis=1)]
-print(f"Rows with missing critical fields: {len(rows_with_missing_fields)}")
+# All rules in one pass: masks shared between rules are computed once
+started = time.perf_counter()
+with span("quality_rules", rows=len(df), rules=len(ruleset.rules)):
+    rule_results = evaluate(ruleset, df)
+rules_ms = (time.perf_counter() - started) * 1000
 
-names_with_multiple_cui = 0
+for r in rule_results:
+    if r.status == "skipped":
+        print(f"[{r.severity}] {r.name}: skipped, missing columns {r.missing_columns}")
+        continue
+    groups = f" in {r.failed_groups} groups" if r.failed_groups is not None else ""
+    print(f"[{r.severity}] {r.name}: {r.failed_rows} rows{groups} - {r.description}")
+    if r.failed_rows:
+        print(f"    sample ids: {r.sample_ids}")
 
-if {"personal", "cui"}.issubset(df.columns):
-    person_cui_counts = (
-        df.assign(
-            personal_clean=df["personal"].str.strip().str.lower(),
-            cui_clean=df["cui"].str.strip()
-        )
-        .query("personal_clean != '' and cui_clean != ''")
-        .groupby("personal_clean")["cui_clean"]
-        .nunique()
-    )
+failed_errors = [r.name for r in rule_results if r.severity == "error" and r.status == "failed"]
+rules_failed = sum(r.status == "failed" for r in rule_results)
+print(f"Evaluated {len(rule_results)} rules from {repo_relative(RULES_PATH)} in {rules_ms:.1f} ms ({rules_failed} with failures)")
 
-    names_with_multiple_cui = int((person_cui_counts > 1).sum())
-    print(f"Names appearing under multiple CUI values: {names_with_multiple_cui}")
+def failed_rows(name: str) -> int:
+    return next((r.failed_rows for r in rule_results if r.name == name), 0)
 
-blank_nr_crt = 0
-if "nr_crt" in df.columns:
-    blank_nr_crt = int((df["nr_crt"].str.strip() == "").sum())
-    print(f"Blank nr_crt values: {blank_nr_crt}")
+def failed_groups(name: str) -> int:
+    return next((r.failed_groups or 0 for r in rule_results if r.name == name), 0)
 
 # Re-export CSV with strict quoting and normalized line endings
-# to ensure compatibility with PostgreSQL COPY ingestion
-df.to_csv(
-    output_path,
-    index=False,
-    encoding="utf-8",
-    quoting=csv.QUOTE_ALL,
-    lineterminator="\n"
-)
+# to ensure compatibility with PostgreSQL COPY ingestion.
+# A failing error-severity rule withholds the export; the load stage reads
+# this file, so it has nothing to load.
+if not failed_errors:
+    with open_artifact(output_path, "w") as f:
+        df.to_csv(
+            f,
+            index=False,
+            quoting=csv.QUOTE_ALL,
+            lineterminator="\n"
+        )
 
 quality_dir = BASE_DIR / "logs" / "quality"
 quality_dir.mkdir(parents=True, exist_ok=True)
@@ -90,16 +125,20 @@ quality_report = {
         .replace(microsecond=0)
         .isoformat()
         .replace("+00:00", "Z"),
-    "input_file": str(input_path.relative_to(BASE_DIR)),
-    "output_file": str(output_path.relative_to(BASE_DIR)),
+    "input_file": repo_relative(input_path),
+    "output_file": repo_relative(output_path),
     "row_count": int(len(df)),
     "column_count": int(len(df.columns)),
     "bad_line_count": int(bad_line_count),
     "missing_critical_columns": missing_critical_cols,
-    "rows_with_missing_fields": int(len(rows_with_missing_fields)),
-    "names_with_multiple_cui_review_count": int(names_with_multiple_cui),
-    "blank_nr_crt": int(blank_nr_crt),
-    "status": "success",    
+    "rows_with_missing_fields": failed_rows("missing_critical_fields"),
+    "names_with_multiple_cui_review_count": failed_groups("names_with_multiple_cui"),
+    "blank_nr_crt": failed_rows("blank_nr_crt"),
+    "rules_file": repo_relative(RULES_PATH),
+    "rules_eval_ms": round(rules_ms, 1),
+    "rules": [r.to_dict() for r in rule_results],
+    "failed_error_rules": failed_errors,
+    "status": "failed" if failed_errors else "success",
 }
 
 report_path = quality_dir / f"quality_report_{timestamp}.json"
@@ -109,6 +148,11 @@ with report_path.open("w", encoding="utf-8") as f:
 
 print(f"Quality report written to: {report_path}")
 
+if failed_errors:
+    print(f"Error-severity rules failed: {failed_errors}; validated file not written.")
+    sys.exit(1)
+
 print("\nCSV exported safely with full quoting and normalized line endings.")
 print(f"Validated file written to: {output_path}")
+print(f"[metrics] rows_processed={len(df)} rules_evaluated={len(rule_results)} rules_failed={rules_failed}")
 print("Ready for PostgreSQL import using the \\copy command.\n")
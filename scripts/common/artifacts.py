@@ -0,0 +1,105 @@
+# Compressed artifact I/O shared by the pipeline stages and tools.
+#
+# Compression is selected by file extension:
+#   .csv      plain text
+#   .csv.gz   gzip (stdlib)
+#   .csv.zst  zstandard (optional `zstandard` package, imported lazily)
+#
+# Writers pick the suffix from PIPELINE_COMPRESSION (none | gz | zst);
+# readers accept whichever variant of an artifact exists on disk, so stages
+# keep working when the compression setting changes between runs.
+
+import gzip
+import io
+import os
+from pathlib import Path
+
+COMPRESSION_SUFFIXES = {
+    "none": "",
+    "gz": ".gz",
+    "zst": ".zst",
+}
+
+# Fast levels: artifacts are rewritten on every run, so throughput matters
+# more than the last few percent of ratio.
+GZIP_LEVEL = 6
+ZSTD_LEVEL = 3
+
+def compression_from_env() -> str:
+    value = (os.getenv("PIPELINE_COMPRESSION") or "none").strip().lower()
+    if value not in COMPRESSION_SUFFIXES:
+        raise ValueError(
+            f"PIPELINE_COMPRESSION={value!r} is not supported; expected one of {sorted(COMPRESSION_SUFFIXES)}"
+        )
+    return value
+
+def compression_suffix(path: Path) -> str:
+    suffix = Path(path).suffix
+    return suffix if suffix in {".gz", ".zst"} else ""
+
+def strip_compression(path: Path) -> Path:
+    path = Path(path)
+    suffix = compression_suffix(path)
+    return path.with_name(path.name[: -len(suffix)]) if suffix else path
+
+# Output path for an artifact, e.g. data/indemnizatii_clean.csv -> .csv.zst
+def artifact_path(base: Path, compression: str | None = None) -> Path:
+    base = strip_compression(base)
+    suffix = COMPRESSION_SUFFIXES[compression or compression_from_env()]
+    return base.with_name(base.name + suffix)
+
+# Input path for an artifact: the configured variant if present, otherwise
+# any other existing variant, otherwise the configured path (so the caller's
+# "not found" error names the file it expected).
+def resolve_artifact(base: Path) -> Path:
+    preferred = artifact_path(base)
+    if preferred.exists():
+        return preferred
+    for compression in COMPRESSION_SUFFIXES:
+        candidate = artifact_path(base, compression)
+        if candidate.exists():
+            return candidate
+    return preferred
+
+def _zstandard():
+    try:
+        import zstandard
+    except ImportError as e:
+        raise RuntimeError(
+            "zstd artifacts need the 'zstandard' package (pip install zstandard)"
+        ) from e
+    return zstandard
+
+# Wrap an open binary stream (local file, S3 response body, ...) with the
+# codec implied by `name`'s extension. Closing the result closes `fileobj`.
+def wrap_stream(fileobj, name: str, mode: str = "r", encoding: str = "utf-8", newline: str | None = ""):
+    binary = "b" in mode
+    writing = "w" in mode
+    suffix = compression_suffix(Path(name))
+
+    if suffix == ".gz":
+        if writing:
+            stream = gzip.GzipFile(fileobj=fileobj, mode="wb", compresslevel=GZIP_LEVEL)
+        else:
+            stream = gzip.GzipFile(fileobj=fileobj, mode="rb")
+        # GzipFile never closes a fileobj it was handed; make close() do it
+        stream.myfileobj = fileobj
+    elif suffix == ".zst":
+        zstd = _zstandard()
+        if writing:
+            stream = zstd.ZstdCompressor(level=ZSTD_LEVEL).stream_writer(fileobj, closefd=True)
+        else:
+            stream = zstd.ZstdDecompressor().stream_reader(fileobj, closefd=True)
+    else:
+        stream = fileobj
+
+    if binary:
+        return stream
+    return io.TextIOWrapper(stream, encoding=encoding, newline=newline)
+
+# Open an artifact for reading or writing, compressing by extension.
+# Text modes ("r"/"w", "rt"/"wt") return a text stream; "rb"/"wb" a binary one.
+def open_artifact(path: Path, mode: str = "r", encoding: str = "utf-8", newline: str | None = ""):
+    path = Path(path)
+    raw_mode = "wb" if "w" in mode else "rb"
+    return wrap_stream(open(path, raw_mode), path.name, mode, encoding=encoding, newline=newline)
@@ -0,0 +1,333 @@
+# Declarative data-quality rules compiled to vectorized checks.
+#
+# Rules live in a YAML file (scripts/clean/quality_rules.yml):
+#
+#   required_columns: [cui, personal]
+#   sample_size: 10
+#   rules:
+#     - name: cui_format
+#       description: CUI is digits, optionally prefixed with RO
+#       severity: warn                 # warn (report only) or error (fail the stage)
+#       check: {matches: {column: cui, pattern: "(RO)?\\d{2,10}"}}
+#     - name: variable_amount_parsed
+#       when: {not_blank: indemnizatie_variabila}     # rows the rule applies to
+#       check: {not_blank: indemnizatie_variabila_num}
+#     - name: person_under_multiple_cui
+#       when: {not_blank: [personal, cui]}
+#       group: {by: person_key, fallback_by: personal, distinct: cui, max: 1}
+#
+# Row predicates (each yields a per-row pass mask):
+#   not_blank: col | [cols]                 every listed column non-empty / non-NA
+#   matches: {column, pattern}              full regex match; blank values pass
+#   in: {column, values}                    value in the list; blank values pass
+#   between: {column, min, max}             numeric range (either bound optional); NA passes
+#   compare: {column, op, other}            cross-column numeric comparison; NA passes
+#   all: [preds] / any: [preds] / not: pred composition
+# Group rules flag every row of a group (rows passing `when`) that has more
+# than `max` distinct values of `distinct`, or more than `max_rows` rows.
+# `by` is a column or a list of columns (composite key); `fallback_by`
+# replaces it when the frame lacks one of the `by` columns.
+#
+# Every predicate compiles to a function of the frame, keyed by its spec. An
+# evaluation memoizes masks and category codes by key, so rules that share a
+# check (blank cui, say) reuse one mask, and adding a rule over columns that
+# are already checked does not rescan them. Text tests on categoricals run
+# once per distinct value and are mapped back through the codes.
+
+import json
+import operator
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Callable
+
+import numpy as np
+import pandas as pd
+
+from scripts.common.schema import is_categorical
+
+SEVERITIES = ("warn", "error")
+COMPARE_OPS = {
+    "=": operator.eq,
+    "!=": operator.ne,
+    "<": operator.lt,
+    "<=": operator.le,
+    ">": operator.gt,
+    ">=": operator.ge,
+}
+DEFAULT_SAMPLE_SIZE = 10
+
+@dataclass(frozen=True)
+class Predicate:
+    key: str
+    columns: frozenset
+    fn: Callable[["Evaluation"], np.ndarray]
+
+@dataclass(frozen=True)
+class Rule:
+    name: str
+    description: str
+    severity: str
+    when: Predicate | None
+    check: Predicate | None
+    group: dict | None
+
+    def columns(self, available) -> set[str]:
+        cols = set(self.when.columns if self.when else ())
+        if self.check:
+            cols |= self.check.columns
+        if self.group:
+            cols.update(group_key_columns(self.group, available))
+            cols.update(c for c in (self.group.get("distinct"),) if c)
+        return cols
+
+@dataclass(frozen=True)
+class RuleSet:
+    path: Path
+    required_columns: list[str]
+    sample_size: int
+    rules: list[Rule]
+
+@dataclass
+class RuleResult:
+    name: str
+    description: str
+    severity: str
+    status: str  # passed / failed / skipped
+    failed_rows: int = 0
+    failed_groups: int | None = None
+    sample_ids: list | None = None
+    missing_columns: list[str] | None = None
+
+    def to_dict(self) -> dict:
+        return {k: v for k, v in self.__dict__.items() if v is not None}
+
+# Per-frame evaluation state: memoized masks and per-column distinct values
+class Evaluation:
+    def __init__(self, df: pd.DataFrame):
+        self.df = df
+        self._cache: dict[str, np.ndarray] = {}
+        self._distinct: dict[str, tuple[np.ndarray, pd.Series]] = {}
+
+    def memo(self, key: str, compute: Callable[[], np.ndarray]) -> np.ndarray:
+        if key not in self._cache:
+            self._cache[key] = compute()
+        return self._cache[key]
+
+    # (code per row, stripped string per code) for a column; code -1
+    # (missing) indexes the trailing "". Categoricals already carry both;
+    # other columns are factorized once, so every text test on the column
+    # runs per distinct value instead of per row.
+    def distinct(self, col: str) -> tuple[np.ndarray, pd.Series]:
+        if col not in self._distinct:
+            s = self.df[col]
+            if is_categorical(s):
+                codes, uniques = s.cat.codes.to_numpy(), s.cat.categories
+            else:
+                codes, uniques = pd.factorize(s)
+            values = pd.Series([*pd.Index(uniques).astype(str), ""], dtype=object).str.strip()
+            self._distinct[col] = codes, values
+        return self._distinct[col]
+
+    def codes(self, col: str) -> np.ndarray:
+        return self.distinct(col)[0]
+
+    def per_value(self, key: str, col: str, test: Callable[[pd.Series], pd.Series]) -> np.ndarray:
+        def compute():
+            codes, values = self.distinct(col)
+            return np.asarray(test(values), dtype=bool)[codes]
+        return self.memo(key, compute)
+
+    def blank(self, col: str) -> np.ndarray:
+        return self.per_value(f"blank:{col}", col, lambda v: v.eq(""))
+
+    def numeric(self, col: str) -> np.ndarray:
+        def compute():
+            s = self.df[col]
+            if is_categorical(s) or s.dtype == object:
+                codes, values = self.distinct(col)
+                return pd.to_numeric(values.replace("", None), errors="coerce").to_numpy(dtype="float64")[codes]
+            return s.astype("Float64").to_numpy(dtype="float64", na_value=np.nan)
+        return self.memo(f"numeric:{col}", compute)
+
+def _as_list(value) -> list[str]:
+    return [value] if isinstance(value, str) else list(value)
+
+def _require(spec: dict, keys: tuple, where: str) -> None:
+    missing = [k for k in keys if k not in spec]
+    if missing:
+        raise ValueError(f"{where}: missing {missing}")
+
+def compile_predicate(spec, where: str) -> Predicate:
+    if not isinstance(spec, dict) or len(spec) != 1:
+        raise ValueError(f"{where}: a predicate is a mapping with exactly one key, got {spec!r}")
+    (kind, arg), = spec.items()
+    if kind == "not_blank":
+        arg = _as_list(arg)
+    # Equal specs share a key, and so one memoized mask
+    key = json.dumps(spec if kind != "not_blank" else {kind: arg}, sort_keys=True, default=str)
+
+    if kind == "not_blank":
+        cols = arg
+        def fn(ev):
+            return ~np.logical_or.reduce([ev.blank(c) for c in cols])
+        return Predicate(key, frozenset(cols), fn)
+
+    if kind in ("matches", "in"):
+        _require(arg, ("column", "pattern") if kind == "matches" else ("column", "values"), where)
+        col = arg["column"]
+        if kind == "matches":
+            pattern = str(arg["pattern"])
+            test = lambda v: v.str.fullmatch(pattern).fillna(False) | v.eq("")
+        else:
+            allowed = [str(v) for v in arg["values"]]
+            test = lambda v: v.isin(allowed) | v.eq("")
+        return Predicate(key, frozenset([col]), lambda ev: ev.per_value(key, col, test))
+
+    if kind == "between":
+        _require(arg, ("column",), where)
+        col, lo, hi = arg["column"], arg.get("min"), arg.get("max")
+        def fn(ev):
+            values = ev.numeric(col)
+            ok = np.isnan(values)
+            with np.errstate(invalid="ignore"):
+                inside = np.ones(len(values), dtype=bool)
+                if lo is not None:
+                    inside &= values >= lo
+                if hi is not None:
+                    inside &= values <= hi
+            return ok | inside
+        return Predicate(key, frozenset([col]), fn)
+
+    if kind == "compare":
+        _require(arg, ("column", "op", "other"), where)
+        if arg["op"] not in COMPARE_OPS:
+            raise ValueError(f"{where}: op must be one of {list(COMPARE_OPS)}")
+        col, other, op = arg["column"], arg["other"], COMPARE_OPS[arg["op"]]
+        def fn(ev):
+            left, right = ev.numeric(col), ev.numeric(other)
+            with np.errstate(invalid="ignore"):
+                return np.isnan(left) | np.isnan(right) | op(left, right)
+        return Predicate(key, frozenset([col, other]), fn)
+
+    if kind in ("all", "any"):
+        parts = [compile_predicate(p, f"{where}.{kind}[{i}]") for i, p in enumerate(arg)]
+        reduce = np.logical_and.reduce if kind == "all" else np.logical_or.reduce
+        def fn(ev):
+            return reduce([ev.memo(p.key, lambda p=p: p.fn(ev)) for p in parts])
+        return Predicate(key, frozenset().union(*(p.columns for p in parts)), fn)
+
+    if kind == "not":
+        inner = compile_predicate(arg, f"{where}.not")
+        return Predicate(key, inner.columns, lambda ev: ~ev.memo(inner.key, lambda: inner.fn(ev)))
+
+    raise ValueError(f"{where}: unknown predicate {kind!r}")
+
+def group_key_columns(group: dict, available) -> list[str]:
+    by = _as_list(group["by"])
+    if group.get("fallback_by") and not set(by).issubset(available):
+        return _as_list(group["fallback_by"])
+    return by
+
+def compile_rule(spec: dict, index: int) -> Rule:
+    name = spec.get("name") or f"rule_{index}"
+    where = f"rule {name!r}"
+    severity = spec.get("severity", "warn")
+    if severity not in SEVERITIES:
+        raise ValueError(f"{where}: severity must be one of {SEVERITIES}")
+    if ("check" in spec) == ("group" in spec):
+        raise ValueError(f"{where}: needs exactly one of 'check' or 'group'")
+
+    group = spec.get("group")
+    if group is not None:
+        _require(group, ("by",), f"{where}.group")
+        if ("distinct" in group) == ("max_rows" in group):
+            raise ValueError(f"{where}.group: needs exactly one of 'distinct' (with 'max') or 'max_rows'")
+
+    return Rule(
+        name=name,
+        description=spec.get("description", ""),
+        severity=severity,
+        when=compile_predicate(spec["when"], f"{where}.when") if "when" in spec else None,
+        check=compile_predicate(spec["check"], f"{where}.check") if "check" in spec else None,
+        group=group,
+    )
+
+def load_rules(path: Path) -> RuleSet:
+    import yaml
+
+    spec = yaml.safe_load(Path(path).read_text(encoding="utf-8")) or {}
+    rules = [compile_rule(r, i) for i, r in enumerate(spec.get("rules") or [], start=1)]
+    names = [r.name for r in rules]
+    duplicates = sorted({n for n in names if names.count(n) > 1})
+    if duplicates:
+        raise ValueError(f"{path}: duplicate rule names {duplicates}")
+    return RuleSet(
+        path=Path(path),
+        required_columns=list(spec.get("required_columns") or []),
+        sample_size=int(spec.get("sample_size", DEFAULT_SAMPLE_SIZE)),
+        rules=rules,
+    )
+
+# Failing-row mask and failing group count of a group rule
+def _group_failures(ev: Evaluation, rule: Rule, applies: np.ndarray) -> tuple[np.ndarray, int]:
+    group = rule.group
+    rows = np.flatnonzero(applies)
+    keys = [f"k{i}" for i, _ in enumerate(group_key_columns(group, ev.df.columns))]
+    frame = pd.DataFrame({
+        k: ev.codes(col)[rows] for k, col in zip(keys, group_key_columns(group, ev.df.columns))
+    })
+    if "distinct" in group:
+        frame["v"] = ev.codes(group["distinct"])[rows]
+        counts = frame.groupby(keys)["v"].transform("nunique").to_numpy()
+        limit = group.get("max", 1)
+    else:
+        counts = frame.groupby(keys)[keys[0]].transform("size").to_numpy()
+        limit = group["max_rows"]
+
+    bad = counts > limit
+    failed = np.zeros(len(ev.df), dtype=bool)
+    failed[rows[bad]] = True
+    return failed, int(len(frame.loc[bad, keys].drop_duplicates()))
+
+def _sample(failed: np.ndarray, ids: np.ndarray, size: int) -> list:
+    positions = np.flatnonzero(failed)
+    if len(positions) > size:
+        # Evenly spread over the frame rather than the first few rows
+        positions = positions[np.linspace(0, len(positions) - 1, size).astype(int)]
+    return [v.item() if hasattr(v, "item") else v for v in ids[positions]]
+
+# Evaluate every rule against df. Rows are identified by id_column when the
+# frame has it (lineage source_line), otherwise by row position.
+def evaluate(ruleset: RuleSet, df: pd.DataFrame, id_column: str = "source_line") -> list[RuleResult]:
+    ev = Evaluation(df)
+    if id_column in df.columns:
+        ids = df[id_column].astype("Int64").to_numpy(dtype=object, na_value=None)
+    else:
+        ids = np.arange(len(df))
+    all_rows = np.ones(len(df), dtype=bool)
+
+    results = []
+    for rule in ruleset.rules:
+        missing = sorted(rule.columns(df.columns) - set(df.columns))
+        if missing:
+            results.append(RuleResult(rule.name, rule.description, rule.severity, "skipped", missing_columns=missing))
+            continue
+
+        applies = ev.memo(rule.when.key, lambda: rule.when.fn(ev)) if rule.when else all_rows
+        groups = None
+        if rule.group:
+            failed, groups = _group_failures(ev, rule, applies)
+        else:
+            failed = applies & ~ev.memo(rule.check.key, lambda: rule.check.fn(ev))
+
+        count = int(failed.sum())
+        results.append(RuleResult(
+            rule.name,
+            rule.description,
+            rule.severity,
+            "failed" if count else "passed",
+            failed_rows=count,
+            failed_groups=groups,
+            sample_ids=_sample(failed, ids, ruleset.sample_size),
+        ))
+    return results
@@ -0,0 +1,259 @@
+# Indexed SQLite mirror of logs/pipeline/pipeline_runs.jsonl.
+#
+# The JSONL file stays the append-only source of truth. This store is a
+# derived index: sync() ingests only the bytes appended since the last
+# sync (offset kept in the meta table), so keeping it current costs one
+# record per run, and deleting the .sqlite file just triggers a rebuild.
+# Queries for trends, percentiles and failure rates then hit indexed
+# tables instead of re-parsing the whole JSONL.
+#
+# Development runs on a sample (run_pipeline.py --sample) are stored with
+# sample = 1 and left out of the statistics unless include_sample is set:
+# their second-long durations would skew percentiles and regressions.
+
+import json
+import sqlite3
+from pathlib import Path
+
+# Bump when the tables change; an older store is dropped and rebuilt from
+# the JSONL on connect
+SCHEMA_VERSION = "2"
+
+META_SCHEMA = """
+CREATE TABLE IF NOT EXISTS meta (
+    key   TEXT PRIMARY KEY,
+    value TEXT NOT NULL
+);
+"""
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS runs (
+    run_id           TEXT PRIMARY KEY,
+    completed_at_utc TEXT,
+    run_date         TEXT,
+    status           TEXT,
+    duration_seconds REAL,
+    git_sha          TEXT,
+    host             TEXT,
+    failed_step      TEXT,
+    sample           INTEGER NOT NULL DEFAULT 0
+);
+CREATE INDEX IF NOT EXISTS ix_runs_status ON runs (status);
+CREATE INDEX IF NOT EXISTS ix_runs_date ON runs (run_date);
+
+CREATE TABLE IF NOT EXISTS stage_runs (
+    run_id           TEXT NOT NULL,
+    stage            TEXT NOT NULL,
+    status           TEXT,
+    started_at_utc   TEXT,
+    run_date         TEXT,
+    duration_seconds REAL,
+    exit_code        INTEGER,
+    timed_out        INTEGER,
+    rows_processed   INTEGER,
+    peak_rss_mb      REAL,
+    cpu_user_seconds REAL,
+    sample           INTEGER NOT NULL DEFAULT 0,
+    PRIMARY KEY (run_id, stage)
+);
+CREATE INDEX IF NOT EXISTS ix_stage_runs_stage_started ON stage_runs (stage, started_at_utc);
+CREATE INDEX IF NOT EXISTS ix_stage_runs_status ON stage_runs (status);
+CREATE INDEX IF NOT EXISTS ix_stage_runs_date ON stage_runs (run_date);
+"""
+
+def connect(db_path: Path) -> sqlite3.Connection:
+    db_path.parent.mkdir(parents=True, exist_ok=True)
+    conn = sqlite3.connect(str(db_path))
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.executescript(META_SCHEMA)
+    row = conn.execute("SELECT value FROM meta WHERE key = 'schema_version'").fetchone()
+    if row is None or row[0] != SCHEMA_VERSION:
+        with conn:
+            conn.execute("DROP TABLE IF EXISTS stage_runs")
+            conn.execute("DROP TABLE IF EXISTS runs")
+            conn.execute("DELETE FROM meta")
+            conn.execute(
+                "INSERT INTO meta (key, value) VALUES ('schema_version', ?)", (SCHEMA_VERSION,)
+            )
+    conn.executescript(SCHEMA)
+    return conn
+
+def _insert_record(conn: sqlite3.Connection, record: dict) -> None:
+    run_id = record.get("run_id")
+    if not run_id:
+        return
+    completed = record.get("completed_at_utc") or ""
+    sample = int(bool(record.get("sample")))
+    conn.execute(
+        "INSERT OR REPLACE INTO runs VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+        (
+            run_id,
+            completed,
+            completed[:10] or None,
+            record.get("status"),
+            record.get("duration_seconds"),
+            record.get("git_sha"),
+            record.get("host"),
+            record.get("failed_step"),
+            sample,
+        ),
+    )
+    for s in record.get("stages") or []:
+        started = s.get("started_at_utc") or ""
+        resources = s.get("resources") or {}
+        counters = s.get("counters") or {}
+        conn.execute(
+            "INSERT OR REPLACE INTO stage_runs VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+            (
+                run_id,
+                s.get("stage"),
+                s.get("status"),
+                started,
+                started[:10] or None,
+                s.get("duration_seconds"),
+                s.get("exit_code"),
+                int(bool(s.get("timed_out"))),
+                counters.get("rows_processed"),
+                resources.get("peak_rss_mb"),
+                resources.get("cpu_user_seconds"),
+                sample,
+            ),
+        )
+
+# Ingest JSONL records appended since the last sync. If the JSONL shrank
+# (rotated or rewritten) the store is rebuilt from the start.
+def sync(conn: sqlite3.Connection, jsonl_path: Path) -> int:
+    if not jsonl_path.exists():
+        return 0
+    row = conn.execute("SELECT value FROM meta WHERE key = 'jsonl_offset'").fetchone()
+    offset = int(row[0]) if row else 0
+    size = jsonl_path.stat().st_size
+    if offset > size:
+        with conn:
+            conn.execute("DELETE FROM stage_runs")
+            conn.execute("DELETE FROM runs")
+            conn.execute("INSERT OR REPLACE INTO meta (key, value) VALUES ('jsonl_offset', '0')")
+        offset = 0
+    if offset == size:
+        return 0
+
+    ingested = 0
+    with jsonl_path.open("rb") as f, conn:
+        f.seek(offset)
+        for line in f:
+            # A trailing line without newline may still be being written
+            if not line.endswith(b"\n"):
+                break
+            offset += len(line)
+            if not line.strip():
+                continue
+            try:
+                _insert_record(conn, json.loads(line))
+            except (json.JSONDecodeError, sqlite3.Error, TypeError, AttributeError):
+                continue
+            ingested += 1
+        conn.execute(
+            "INSERT OR REPLACE INTO meta (key, value) VALUES ('jsonl_offset', ?)", (str(offset),)
+        )
+    return ingested
+
+def percentile(sorted_values: list[float], q: float) -> float | None:
+    if not sorted_values:
+        return None
+    # Linear interpolation between closest ranks (same as numpy's default)
+    pos = (len(sorted_values) - 1) * q
+    lo = int(pos)
+    hi = min(lo + 1, len(sorted_values) - 1)
+    return round(sorted_values[lo] + (sorted_values[hi] - sorted_values[lo]) * (pos - lo), 3)
+
+# Per-stage statistics over each stage's last `last` executions.
+# A regression is flagged when the median of the `recent` newest runs is
+# more than `tolerance` slower than the median of the runs before them.
+def stage_stats(
+    conn: sqlite3.Connection,
+    *,
+    stage: str | None = None,
+    last: int = 100,
+    recent: int = 10,
+    tolerance: float = 0.25,
+    since: str | None = None,
+    include_sample: bool = False,
+) -> list[dict]:
+    if stage:
+        stages = [stage]
+    else:
+        stages = [
+            r[0] for r in conn.execute(
+                "SELECT DISTINCT stage FROM stage_runs WHERE ? OR sample = 0 ORDER BY stage",
+                (include_sample,),
+            )
+        ]
+
+    results = []
+    for name in stages:
+        rows = conn.execute(
+            """
+            SELECT status, duration_seconds
+            FROM stage_runs
+            WHERE stage = ? AND started_at_utc >= ? AND (? OR sample = 0)
+            ORDER BY started_at_utc DESC
+            LIMIT ?
+            """,
+            (name, since or "", include_sample, last),
+        ).fetchall()
+        if not rows:
+            continue
+
+        failures = sum(1 for status, _ in rows if status != "success")
+        ok = [d for status, d in rows if status == "success" and d is not None]
+        ok_sorted = sorted(ok)
+
+        recent_ok = sorted(ok[:recent])
+        prior_ok = sorted(ok[recent:])
+        recent_p50 = percentile(recent_ok, 0.5)
+        prior_p50 = percentile(prior_ok, 0.5)
+        regression = bool(
+            recent_p50 is not None
+            and prior_p50
+            and len(prior_ok) >= recent
+            and recent_p50 > prior_p50 * (1 + tolerance)
+        )
+
+        results.append({
+            "stage": name,
+            "runs": len(rows),
+            "failures": failures,
+            "failure_rate": round(failures / len(rows), 3),
+            "p50_seconds": percentile(ok_sorted, 0.5),
+            "p90_seconds": percentile(ok_sorted, 0.9),
+            "p95_seconds": percentile(ok_sorted, 0.95),
+            "max_seconds": ok_sorted[-1] if ok_sorted else None,
+            "recent_p50_seconds": recent_p50,
+            "prior_p50_seconds": prior_p50,
+            "regression": regression,
+        })
+    return results
+
+# Run-level totals (dry runs excluded) over the last `last` runs.
+def run_totals(
+    conn: sqlite3.Connection, *, last: int = 100, since: str | None = None, include_sample: bool = False
+) -> dict:
+    rows = conn.execute(
+        """
+        SELECT status, duration_seconds
+        FROM runs
+        WHERE status != 'dry_run' AND completed_at_utc >= ? AND (? OR sample = 0)
+        ORDER BY completed_at_utc DESC
+        LIMIT ?
+        """,
+        (since or "", include_sample, last),
+    ).fetchall()
+    durations = sorted(d for s, d in rows if s == "success" and d is not None)
+    failures = sum(1 for s, _ in rows if s != "success")
+    return {
+        "runs": len(rows),
+        "failures": failures,
+        "failure_rate": round(failures / len(rows), 3) if rows else None,
+        "p50_seconds": percentile(durations, 0.5),
+        "p95_seconds": percentile(durations, 0.95),
+    }
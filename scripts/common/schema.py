@@ -0,0 +1,124 @@
+# Compact in-memory dtypes for compensation frames, shared by the clean,
+# validate and anomaly review stages.
+#
+# Repetitive text (authority, enterprise, role, CUI, names, raw amount
+# strings) is held as pandas categoricals, i.e. dictionary-encoded: one copy
+# of each distinct string plus small integer codes per row. Amounts and line
+# numbers are nullable Int32, matching the INT columns in Postgres.
+# Values are only rendered back to strings when a frame is written out
+# (to_csv handles both dtypes), so there is no str round-trip in between.
+
+import sys
+from collections import defaultdict
+
+import numpy as np
+import pandas as pd
+
+CATEGORY_COLUMNS = (
+    "autoritate_tutelara",
+    "intreprindere",
+    "cui",
+    "personal",
+    "person_key",
+    "calitate_membru",
+    "suma",
+    "indemnizatie_variabila",
+    # anomaly review frames
+    "company_id",
+    "person_id",
+)
+
+INT32_COLUMNS = (
+    "suma_num",
+    "indemnizatie_variabila_num",
+    "source_line",
+    # anomaly review frames
+    "suma_clean",
+    "variabila_clean",
+    "total_ron",
+    "year",
+)
+
+def is_categorical(s: pd.Series) -> bool:
+    return isinstance(s.dtype, pd.CategoricalDtype)
+
+# Convert the known columns of df in place and return it
+def compact(df: pd.DataFrame) -> pd.DataFrame:
+    for col in df.columns:
+        s = df[col]
+        if col in CATEGORY_COLUMNS and not is_categorical(s):
+            df[col] = s.astype("category")
+        elif col in INT32_COLUMNS and s.dtype != "Int32":
+            if s.dtype == object:
+                s = pd.to_numeric(s.replace("", None))
+            df[col] = s.astype("Int32")
+    return df
+
+# Concatenate compacted chunks. Categoricals only stay categorical when every
+# chunk shares the same categories, so align them to their union first.
+def concat_compact(frames: list[pd.DataFrame]) -> pd.DataFrame:
+    if len(frames) == 1:
+        return frames[0]
+    for col in frames[0].columns:
+        if is_categorical(frames[0][col]):
+            categories = pd.api.types.union_categoricals(
+                [f[col] for f in frames], ignore_order=True
+            ).categories
+            for f in frames:
+                f[col] = f[col].cat.set_categories(categories)
+    return pd.concat(frames, ignore_index=True)
+
+# Read a cleaned CSV artifact straight into compact dtypes. Missing text
+# values become "" (as with dtype=str + fillna("")); missing amounts stay NA
+# and are written back as empty fields.
+def read_clean_csv(f, **kwargs) -> pd.DataFrame:
+    dtype = defaultdict(lambda: str, {c: "category" for c in CATEGORY_COLUMNS})
+    dtype.update({c: "Int32" for c in INT32_COLUMNS})
+    df = pd.read_csv(f, dtype=dtype, **kwargs)
+
+    for col in df.columns:
+        s = df[col]
+        if is_categorical(s):
+            if s.isna().any():
+                if "" not in s.cat.categories:
+                    s = s.cat.add_categories([""])
+                df[col] = s.fillna("")
+        elif col not in INT32_COLUMNS:
+            df[col] = s.fillna("")
+    return df
+
+# Rows whose value is empty or whitespace only; for categoricals the test
+# runs once per distinct value instead of once per row.
+def blank_mask(s: pd.Series) -> pd.Series:
+    if is_categorical(s):
+        categories = s.cat.categories
+        return s.isin(categories[categories.astype(str).str.strip() == ""])
+    return s.fillna("").astype(str).str.strip().eq("")
+
+def memory_mb(df: pd.DataFrame) -> float:
+    return df.memory_usage(deep=True).sum() / (1024 * 1024)
+
+# Size the same frame would have with every column held as Python strings,
+# computed without materializing it (categoricals: per-row pointer plus the
+# size of the string each code refers to).
+def object_memory_mb(df: pd.DataFrame) -> float:
+    total = df.index.memory_usage()
+    for col in df.columns:
+        s = df[col]
+        if is_categorical(s):
+            sizes = np.array(
+                [sys.getsizeof(str(c)) for c in s.cat.categories] + [sys.getsizeof(float("nan"))],
+                dtype=np.int64,
+            )
+            # code -1 (missing) picks the trailing NaN entry
+            total += 8 * len(s) + int(sizes[s.cat.codes.to_numpy()].sum())
+        elif s.dtype == object:
+            total += s.memory_usage(deep=True, index=False)
+        else:
+            total += s.astype(str).memory_usage(deep=True, index=False)
+    return total / (1024 * 1024)
+
+def report_memory(df: pd.DataFrame) -> None:
+    as_object, compacted = object_memory_mb(df), memory_mb(df)
+    print(f"Frame memory: {as_object:.1f} MB as object strings -> {compacted:.1f} MB compact")
+    print(f"[metrics] frame_mb_object={as_object:.1f} frame_mb_compact={compacted:.1f}")
@@ -0,0 +1,145 @@
+# Lightweight span tracing for the hot paths inside a stage.
+#
+#   from scripts.common.tracing import span
+#
+#   with span("parse_salaries", rows=len(df)) as s:
+#       df = parse_salaries(df)
+#       s["rows_out"] = len(df)
+#
+# Spans nest by time (a span opened inside another is drawn beneath it) and
+# carry their keyword arguments, conventionally a row count. They are only
+# recorded when PIPELINE_TRACE_DIR is set, which run_pipeline does per run;
+# otherwise span() costs one check, so library code (also used by the
+# Lambda handler) can stay instrumented.
+#
+# Each process writes its spans at exit as Chrome trace events (complete "X"
+# events, wall-clock microsecond timestamps) to
+# <PIPELINE_TRACE_DIR>/<stage>-<pid>.json. run_pipeline merges those with its
+# own stage spans into one file per run, viewable in chrome://tracing or
+# https://ui.perfetto.dev.
+#
+# Standard library only: run_pipeline imports this at run time and must stay
+# cheap to start (see tools/check_startup_time.py).
+
+import atexit
+import json
+import os
+import sys
+import threading
+import time
+from contextlib import contextmanager
+from pathlib import Path
+
+TRACE_DIR_ENV = "PIPELINE_TRACE_DIR"
+TRACE_STAGE_ENV = "PIPELINE_TRACE_STAGE"
+
+_events: list[dict] = []
+_lock = threading.Lock()
+_flush_registered = False
+
+def trace_dir() -> Path | None:
+    value = os.getenv(TRACE_DIR_ENV)
+    return Path(value) if value else None
+
+def _process_name() -> str:
+    return os.getenv(TRACE_STAGE_ENV) or Path(sys.argv[0]).stem or "python"
+
+def _record(event: dict) -> None:
+    global _flush_registered
+    with _lock:
+        _events.append(event)
+        if not _flush_registered:
+            atexit.register(flush)
+            _flush_registered = True
+
+@contextmanager
+def span(name: str, **args):
+    if not os.getenv(TRACE_DIR_ENV):
+        yield args
+        return
+
+    ts = time.time_ns() // 1000
+    start = time.perf_counter_ns()
+    try:
+        yield args
+    except BaseException as e:
+        args["error"] = type(e).__name__
+        raise
+    finally:
+        _record({
+            "name": name,
+            "ph": "X",
+            "ts": ts,
+            "dur": (time.perf_counter_ns() - start) // 1000,
+            "pid": os.getpid(),
+            "tid": threading.get_native_id(),
+            "args": args,
+        })
+
+# Write this process's spans to the trace directory. Called at exit; safe
+# to call earlier (spans recorded afterwards go to the same file).
+def flush() -> Path | None:
+    out_dir = trace_dir()
+    with _lock:
+        if out_dir is None or not _events:
+            return None
+        events = list(_events)
+
+    name = _process_name()
+    metadata = {"name": "process_name", "ph": "M", "pid": os.getpid(), "args": {"name": name}}
+    out_dir.mkdir(parents=True, exist_ok=True)
+    path = out_dir / f"{name}-{os.getpid()}.json"
+    tmp = path.with_name(f".tmp-{path.name}")
+    tmp.write_text(json.dumps({"traceEvents": [metadata, *events]}), encoding="utf-8")
+    tmp.replace(path)
+    return path
+
+# Merge the per-process span files in parts_dir with the orchestrator's
+# stage spans (stage, start in epoch seconds, duration in seconds) into one
+# Chrome trace at out_path. Returns total span time per stage and span name
+# in milliseconds, for the run record.
+def merge_traces(
+    parts_dir: Path, stage_spans: list[tuple[str, float, float]], out_path: Path, run_id: str
+) -> dict[str, dict[str, float]]:
+    pid = os.getpid()
+    events: list[dict] = [{"name": "process_name", "ph": "M", "pid": pid, "args": {"name": "run_pipeline"}}]
+    # One track per stage: stages overlap on the worker pool
+    for tid, (stage, started, duration) in enumerate(stage_spans, start=1):
+        events.append({"name": "thread_name", "ph": "M", "pid": pid, "tid": tid, "args": {"name": stage}})
+        events.append({
+            "name": stage,
+            "ph": "X",
+            "ts": int(started * 1_000_000),
+            "dur": int(duration * 1_000_000),
+            "pid": pid,
+            "tid": tid,
+            "args": {},
+        })
+
+    totals: dict[str, dict[str, float]] = {}
+    for part in sorted(parts_dir.glob("*.json")) if parts_dir.exists() else []:
+        try:
+            part_events = json.loads(part.read_text(encoding="utf-8"))["traceEvents"]
+        except (OSError, ValueError, KeyError):
+            continue
+        stage = part.stem.rsplit("-", 1)[0]
+        for e in part_events:
+            if e.get("ph") == "X":
+                per_stage = totals.setdefault(stage, {})
+                per_stage[e["name"]] = per_stage.get(e["name"], 0.0) + e["dur"] / 1000
+        events.extend(part_events)
+
+    out_path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = out_path.with_name(f".tmp-{out_path.name}")
+    tmp.write_text(
+        json.dumps({"traceEvents": events, "displayTimeUnit": "ms", "otherData": {"run_id": run_id}}),
+        encoding="utf-8",
+    )
+    tmp.replace(out_path)
+
+    for part in parts_dir.glob("*.json") if parts_dir.exists() else []:
+        part.unlink()
+    if parts_dir.exists() and not any(parts_dir.iterdir()):
+        parts_dir.rmdir()
+
+    return {stage: {k: round(v, 1) for k, v in spans.items()} for stage, spans in totals.items()}
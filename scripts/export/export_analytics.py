@@ -0,0 +1,305 @@
+# Export the dbt fact, dimension and mart tables to a local Parquet dataset
+# so read-heavy consumers (analysts, notebooks, tools/query_export.py) stop
+# hitting Postgres with the same aggregate queries.
+#
+# Layout (PIPELINE_EXPORT_DIR, default data/analytics/):
+#   v<export time>/<table>.parquet   one file per table of the dbt schema
+#   _manifest.json                   tables, their files, row counts, columns
+#                                    and sort order
+#
+# Each table is streamed out of Postgres with COPY (ordered by reporting year,
+# then company, in byte order) and written in row groups with min/max
+# statistics and a page index. Scans filtering on year or company can
+# therefore skip whole row groups and pages.
+#
+# Every export writes into a fresh version directory that no manifest lists
+# yet; the manifest is then replaced atomically and only after that are the
+# files it no longer lists deleted. Readers that resolve files through the
+# manifest (tools/query_export.py) see either the previous export or the new
+# one, never a mix.
+
+import argparse
+import json
+import os
+import shutil
+import tempfile
+from datetime import datetime, timezone
+from pathlib import Path
+
+import psycopg2
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.csv as pacsv
+import pyarrow.parquet as pq
+
+BASE_DIR = Path(__file__).resolve().parents[2]
+# PIPELINE_DATA_DIR relocates the data artifacts (benchmarks, sample runs)
+DATA_DIR = Path(os.getenv("PIPELINE_DATA_DIR") or BASE_DIR / "data")
+EXPORT_DIR = Path(os.getenv("PIPELINE_EXPORT_DIR") or DATA_DIR / "analytics")
+MANIFEST_NAME = "_manifest.json"
+
+# Schema dbt builds the marts into (profiles.yml; analytics_sample in sample runs)
+SOURCE_SCHEMA = os.getenv("PIPELINE_EXPORT_SCHEMA") or "analytics" + (os.getenv("PIPELINE_SCHEMA_SUFFIX") or "")
+
+# Sort keys, in order: the first column of each group present in a table
+SORT_KEYS = (
+    ("an_raportare",),
+    ("company_id", "companie", "denumire"),
+)
+
+# Rows per row group: small enough for year/company pruning to skip most of
+# a large fact table, large enough to keep per-group overhead low
+ROW_GROUP_ROWS = 64_000
+
+# Postgres data_type / udt_name -> Arrow type. numeric has no fixed scale in
+# these models and is exported as float64; unknown types stay text.
+PG_TYPES = {
+    "smallint": pa.int16(),
+    "integer": pa.int32(),
+    "bigint": pa.int64(),
+    "numeric": pa.float64(),
+    "real": pa.float32(),
+    "double precision": pa.float64(),
+    "boolean": pa.bool_(),
+    "date": pa.date32(),
+    "timestamp without time zone": pa.timestamp("us"),
+    "timestamp with time zone": pa.timestamp("us", tz="UTC"),
+}
+PG_ARRAY_TYPES = {
+    "_int2": pa.int16(),
+    "_int4": pa.int32(),
+    "_int8": pa.int64(),
+    "_numeric": pa.float64(),
+    "_float4": pa.float32(),
+    "_float8": pa.float64(),
+}
+
+def get_connection():
+    return psycopg2.connect(
+        host=os.getenv("PGHOST") or os.getenv("DB_HOST") or "localhost",
+        port=os.getenv("PGPORT") or os.getenv("DB_PORT") or "5432",
+        dbname=os.getenv("PGDATABASE") or os.getenv("DB_NAME"),
+        user=os.getenv("PGUSER") or os.getenv("DB_USER"),
+        password=os.getenv("PGPASSWORD") or os.getenv("DB_PASSWORD"),
+    )
+
+# Base tables of the schema (dbt views are staging/intermediate models) with
+# their columns as (name, data_type, udt_name)
+def list_tables(conn, schema: str) -> dict[str, list[tuple[str, str, str]]]:
+    with conn.cursor() as cur:
+        cur.execute(
+            """
+            select c.table_name, c.column_name, c.data_type, c.udt_name
+            from information_schema.columns c
+            join information_schema.tables t using (table_schema, table_name)
+            where c.table_schema = %s and t.table_type = 'BASE TABLE'
+            order by c.table_name, c.ordinal_position
+            """,
+            (schema,),
+        )
+        tables: dict[str, list[tuple[str, str, str]]] = {}
+        for table, column, data_type, udt_name in cur.fetchall():
+            tables.setdefault(table, []).append((column, data_type, udt_name))
+    return tables
+
+def sort_columns(columns: list[str]) -> list[str]:
+    keys = []
+    for group in SORT_KEYS:
+        found = next((c for c in group if c in columns), None)
+        if found:
+            keys.append(found)
+    return keys
+
+def quote_ident(name: str) -> str:
+    return '"' + name.replace('"', '""') + '"'
+
+# COPY query for one table: arrays flattened to comma-separated text (split
+# back into lists after reading), text sort keys ordered bytewise so the
+# order matches Parquet statistics.
+def copy_sql(schema: str, table: str, columns: list[tuple[str, str, str]], keys: list[str]) -> str:
+    select = []
+    for name, data_type, udt_name in columns:
+        col = quote_ident(name)
+        if data_type == "ARRAY":
+            select.append(f"nullif(array_to_string({col}, ','), '') as {col}")
+        else:
+            select.append(col)
+
+    text_types = {name for name, data_type, _ in columns if data_type not in PG_TYPES}
+    order = [
+        f'{quote_ident(k)} collate "C"' if k in text_types else quote_ident(k)
+        for k in keys
+    ]
+    order_by = f" order by {', '.join(order)}" if order else ""
+    return (
+        f"copy (select {', '.join(select)} from {quote_ident(schema)}.{quote_ident(table)}{order_by}) "
+        "to stdout with (format csv, header true)"
+    )
+
+def arrow_column_types(columns: list[tuple[str, str, str]]) -> dict[str, pa.DataType]:
+    return {
+        name: PG_TYPES.get(data_type, pa.string())
+        for name, data_type, _ in columns
+    }
+
+def split_arrays(batch: pa.RecordBatch, columns: list[tuple[str, str, str]]) -> pa.RecordBatch:
+    arrays = list(batch.columns)
+    for i, (_, data_type, udt_name) in enumerate(columns):
+        if data_type == "ARRAY":
+            items = pc.split_pattern(arrays[i], ",")
+            if udt_name in PG_ARRAY_TYPES:
+                items = items.cast(pa.list_(PG_ARRAY_TYPES[udt_name]))
+            arrays[i] = items
+    return pa.RecordBatch.from_arrays(arrays, names=batch.schema.names)
+
+# Stream one table into a Parquet file in the (not yet published) version
+# directory. Returns (rows, sort keys).
+def export_table(conn, schema: str, table: str, columns: list[tuple[str, str, str]], out_dir: Path) -> tuple[int, list[str]]:
+    keys = sort_columns([name for name, _, _ in columns])
+    target = out_dir / f"{table}.parquet"
+
+    with tempfile.TemporaryFile(dir=out_dir) as spool:
+        with conn.cursor() as cur:
+            cur.copy_expert(copy_sql(schema, table, columns, keys), spool)
+        spool.seek(0)
+
+        reader = pacsv.open_csv(
+            spool,
+            read_options=pacsv.ReadOptions(block_size=16 << 20),
+            convert_options=pacsv.ConvertOptions(
+                column_types=arrow_column_types(columns),
+                strings_can_be_null=True,
+                quoted_strings_can_be_null=False,
+            ),
+        )
+
+        rows = 0
+        writer = None
+        try:
+            for batch in reader:
+                batch = split_arrays(batch, columns)
+                if writer is None:
+                    names = batch.schema.names
+                    writer = pq.ParquetWriter(
+                        target,
+                        batch.schema,
+                        compression="zstd",
+                        write_statistics=True,
+                        write_page_index=True,
+                        sorting_columns=[pq.SortingColumn(names.index(k)) for k in keys],
+                    )
+                writer.write_batch(batch, row_group_size=ROW_GROUP_ROWS)
+                rows += batch.num_rows
+            if writer is None:
+                # Empty table: still publish a file with the right columns
+                empty = pa.schema([
+                    (name, pa.list_(PG_ARRAY_TYPES.get(udt_name, pa.string())) if data_type == "ARRAY"
+                     else PG_TYPES.get(data_type, pa.string()))
+                    for name, data_type, udt_name in columns
+                ])
+                writer = pq.ParquetWriter(target, empty, compression="zstd")
+        finally:
+            if writer is not None:
+                writer.close()
+
+    return rows, keys
+
+# Fresh directory for one export, named after its start time
+def new_version_dir(out_dir: Path, started: datetime) -> Path:
+    stamp = started.strftime("%Y%m%dT%H%M%SZ")
+    for attempt in range(100):
+        version_dir = out_dir / (f"v{stamp}" if attempt == 0 else f"v{stamp}-{attempt}")
+        try:
+            version_dir.mkdir()
+            return version_dir
+        except FileExistsError:
+            continue
+    raise RuntimeError(f"Could not create a version directory under {out_dir}")
+
+# Remove files and version directories the current manifest does not list
+# (superseded exports, earlier flat <table>.parquet files, failed runs).
+# Call only after the manifest is written.
+def remove_unlisted(out_dir: Path, entries: dict) -> int:
+    listed = {entry["file"] for entry in entries.values()}
+    removed = 0
+    for path in out_dir.glob("*.parquet"):
+        if path.name not in listed:
+            path.unlink()
+            removed += 1
+    for version_dir in (p for p in out_dir.glob("v*") if p.is_dir()):
+        files = list(version_dir.glob("*.parquet"))
+        stale = [f for f in files if f"{version_dir.name}/{f.name}" not in listed]
+        if len(stale) == len(files):
+            shutil.rmtree(version_dir)
+        else:
+            for f in stale:
+                f.unlink()
+        removed += len(stale)
+    return removed
+
+def write_manifest(out_dir: Path, manifest: dict) -> None:
+    tmp = out_dir / f".tmp-{MANIFEST_NAME}"
+    tmp.write_text(json.dumps(manifest, indent=2) + "\n", encoding="utf-8")
+    tmp.replace(out_dir / MANIFEST_NAME)
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Export dbt tables to a local Parquet dataset")
+    parser.add_argument("--schema", default=SOURCE_SCHEMA, help="Postgres schema to export (default: %(default)s)")
+    parser.add_argument("--out", type=Path, default=EXPORT_DIR, help="output directory (default: %(default)s)")
+    parser.add_argument("--tables", nargs="*", default=None, help="only these tables (default: all base tables)")
+    args = parser.parse_args()
+
+    args.out.mkdir(parents=True, exist_ok=True)
+    conn = get_connection()
+    version_dir = None
+    try:
+        tables = list_tables(conn, args.schema)
+        if args.tables:
+            missing = sorted(set(args.tables) - set(tables))
+            if missing:
+                raise SystemExit(f"Tables not found in schema {args.schema}: {missing}")
+            tables = {t: tables[t] for t in args.tables}
+        if not tables:
+            raise SystemExit(f"No tables in schema {args.schema}; run dbt first.")
+
+        manifest_path = args.out / MANIFEST_NAME
+        previous = json.loads(manifest_path.read_text(encoding="utf-8")) if manifest_path.exists() else {}
+        # A partial export keeps the other tables' entries (and their files)
+        entries = dict(previous.get("tables", {})) if args.tables else {}
+
+        started = datetime.now(timezone.utc)
+        version_dir = new_version_dir(args.out, started)
+        total_rows = 0
+        for done, (table, columns) in enumerate(sorted(tables.items()), start=1):
+            rows, keys = export_table(conn, args.schema, table, columns, version_dir)
+            size = (version_dir / f"{table}.parquet").stat().st_size
+            entries[table] = {
+                "file": f"{version_dir.name}/{table}.parquet",
+                "rows": rows,
+                "bytes": size,
+                "columns": [name for name, _, _ in columns],
+                "sort_by": keys,
+            }
+            total_rows += rows
+            print(f"  {args.schema}.{table}: {rows} rows, {size / 1024:.1f} KiB, sorted by {keys or '-'}")
+            print(f"[progress] done={done} total={len(tables)} unit=tables step={table}")
+    except BaseException:
+        # Nothing lists the new version yet; readers keep the previous one
+        if version_dir is not None:
+            shutil.rmtree(version_dir, ignore_errors=True)
+        raise
+    finally:
+        conn.close()
+
+    # The switch: from here on readers resolve the new files
+    write_manifest(args.out, {
+        "schema": args.schema,
+        "exported_at": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "tables": entries,
+    })
+    removed = remove_unlisted(args.out, entries)
+    print(f"Exported {len(tables)} tables to {version_dir}" + (f"; removed {removed} superseded file(s)" if removed else ""))
+    print(f"[metrics] rows_processed={total_rows} tables={len(tables)}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,184 @@
+# Extract the AMEPIP compensation table from the published PDF into the raw
+# CSV consumed by scripts/clean/data_clean.py (data/indemnizatii.csv).
+#
+# Pages are extracted independently on a process pool. Each page's rows are
+# cached under .cache/pdf_pages/ keyed by a hash of the page's content
+# streams, so re-publishing a PDF with a few changed pages only re-extracts
+# those pages.
+#
+# Usage:
+#   python -m scripts.ingest.extract_pdf --pdf data/indemnizatii.pdf
+#   PIPELINE_PDF_PATH=data/indemnizatii.pdf python -m scripts.ingest.extract_pdf
+
+import argparse
+import csv
+import hashlib
+import json
+import os
+import re
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from pathlib import Path
+
+from scripts.common.artifacts import artifact_path, open_artifact
+
+REPO_ROOT = Path(__file__).resolve().parents[2]
+# PIPELINE_DATA_DIR relocates the data artifacts (benchmarks, sample runs)
+DATA_DIR = Path(os.getenv("PIPELINE_DATA_DIR") or REPO_ROOT / "data")
+OUT_PATH = DATA_DIR / "indemnizatii.csv"
+CACHE_DIR = REPO_ROOT / ".cache" / "pdf_pages"
+
+# Bump when extraction logic or table settings change: cached pages from an
+# older extractor are then ignored instead of being reused.
+EXTRACTOR_VERSION = "1"
+
+# AMEPIP tables are ruled, so cell boundaries come from the drawn lines.
+TABLE_SETTINGS = {
+    "vertical_strategy": "lines",
+    "horizontal_strategy": "lines",
+}
+
+# Pages handed to a worker at once (amortizes opening the PDF per task)
+PAGES_PER_TASK = 8
+
+# The header row starts with the row-number column ("Nr.Crt" / "Nr. crt.")
+HEADER_FIRST_CELL = re.compile(r"^\s*nr\.?\s*crt", re.IGNORECASE)
+
+# Hash of everything that determines a page's extracted text: the decoded
+# content streams, the page box and the font resources they reference.
+def page_content_hash(page) -> str:
+    from pdfminer.pdftypes import resolve1
+
+    h = hashlib.sha256(EXTRACTOR_VERSION.encode("ascii"))
+    h.update(repr(sorted(TABLE_SETTINGS.items())).encode("utf-8"))
+    h.update(repr(tuple(page.bbox)).encode("ascii"))
+    for stream in page.page_obj.contents:
+        h.update(resolve1(stream).get_data())
+    resources = resolve1(page.page_obj.resources) or {}
+    fonts = resolve1(resources.get("Font")) or {}
+    for name in sorted(fonts):
+        font = resolve1(fonts[name]) or {}
+        h.update(f"{name}:{font.get('BaseFont')}".encode("utf-8"))
+    return h.hexdigest()
+
+def clean_cell(value) -> str:
+    return "" if value is None else str(value).strip()
+
+# Runs in a worker process: extract table rows for a batch of pages.
+def extract_pages(pdf_path: str, page_numbers: list[int]) -> dict[int, list[list[str]]]:
+    import pdfplumber
+
+    out = {}
+    with pdfplumber.open(pdf_path) as pdf:
+        for n in page_numbers:
+            page = pdf.pages[n]
+            rows = []
+            for table in page.extract_tables(TABLE_SETTINGS):
+                for row in table:
+                    cells = [clean_cell(c) for c in row]
+                    if any(cells):
+                        rows.append(cells)
+            out[n] = rows
+            page.close()  # release the page's parsed layout
+    return out
+
+def cache_path(cache_dir: Path, page_hash: str) -> Path:
+    return cache_dir / page_hash[:2] / f"{page_hash}.json"
+
+def read_cache(cache_dir: Path, page_hash: str) -> list[list[str]] | None:
+    path = cache_path(cache_dir, page_hash)
+    try:
+        return json.loads(path.read_text(encoding="utf-8"))["rows"]
+    except (OSError, ValueError, KeyError):
+        return None
+
+def write_cache(cache_dir: Path, page_hash: str, rows: list[list[str]]) -> None:
+    path = cache_path(cache_dir, page_hash)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_suffix(f".{os.getpid()}.tmp")
+    tmp.write_text(json.dumps({"rows": rows}, ensure_ascii=False), encoding="utf-8")
+    tmp.replace(path)  # atomic: concurrent runs never see a partial entry
+
+# Stitch per-page rows into one table: keep the first header row, drop the
+# header repeated on later pages and rows whose width does not match it.
+def assemble(pages: list[list[list[str]]]) -> tuple[list[str] | None, list[list[str]], int]:
+    header = None
+    body = []
+    skipped = 0
+    for rows in pages:
+        for row in rows:
+            if HEADER_FIRST_CELL.match(row[0]):
+                if header is None:
+                    header = row
+                continue
+            if header is not None and len(row) != len(header):
+                skipped += 1
+                continue
+            body.append(row)
+    return header, body, skipped
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Extract the AMEPIP PDF table into the raw CSV")
+    parser.add_argument("--pdf", type=Path, default=os.getenv("PIPELINE_PDF_PATH"), help="source PDF (default: PIPELINE_PDF_PATH)")
+    parser.add_argument("--out", type=Path, default=None, help="output CSV (default: data/indemnizatii.csv)")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--cache-dir", type=Path, default=CACHE_DIR)
+    parser.add_argument("--no-cache", action="store_true", help="re-extract every page")
+    args = parser.parse_args()
+
+    if not args.pdf:
+        raise SystemExit("No PDF given: pass --pdf or set PIPELINE_PDF_PATH.")
+    pdf_path = Path(args.pdf)
+    if not pdf_path.exists():
+        raise FileNotFoundError(f"PDF not found: {pdf_path}")
+    out_path = args.out or artifact_path(OUT_PATH)
+
+    import pdfplumber
+
+    # Hashing only reads the content streams; no layout analysis happens here
+    with pdfplumber.open(pdf_path) as pdf:
+        hashes = [page_content_hash(p) for p in pdf.pages]
+    total = len(hashes)
+    print(f"PDF {pdf_path.name}: {total} pages")
+
+    pages: list[list[list[str]] | None] = [None] * total
+    if not args.no_cache:
+        for n, page_hash in enumerate(hashes):
+            pages[n] = read_cache(args.cache_dir, page_hash)
+    todo = [n for n in range(total) if pages[n] is None]
+    cached = total - len(todo)
+    print(f"Pages from cache: {cached}, to extract: {len(todo)}")
+
+    done = cached
+    if todo:
+        batches = [todo[i:i + PAGES_PER_TASK] for i in range(0, len(todo), PAGES_PER_TASK)]
+        workers = max(1, min(args.workers, len(batches)))
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            futures = [pool.submit(extract_pages, str(pdf_path), batch) for batch in batches]
+            for fut in as_completed(futures):
+                for n, rows in fut.result().items():
+                    pages[n] = rows
+                    write_cache(args.cache_dir, hashes[n], rows)
+                done += len(fut.result())
+                print(f"[progress] done={done} total={total} unit=pages")
+
+    header, body, skipped = assemble(pages)
+    if header is None:
+        raise RuntimeError("No table header row found in the PDF (expected a first cell like 'Nr.Crt').")
+    if skipped:
+        print(f"Skipped {skipped} rows whose column count differs from the header ({len(header)}).")
+
+    out_path.parent.mkdir(parents=True, exist_ok=True)
+    # Same shape as the hand-exported CSV: CRLF rows, line breaks kept
+    # inside quoted cells (data_clean normalizes both).
+    with open_artifact(out_path, "w") as f:
+        writer = csv.writer(f, lineterminator="\r\n")
+        writer.writerow(header)
+        writer.writerows(body)
+
+    print(f"Extracted {len(body)} rows to {out_path}")
+    print(f"[metrics] rows_processed={len(body)}")
+    print(f"[metrics] pages_extracted={len(todo)}")
+    print(f"[metrics] pages_cached={cached}")
+
+if __name__ == "__main__":
+    main()
@@ -1,32 +1,217 @@
+# Paginated API ingestion with concurrent page fetches and conditional requests.
+#
+# Pages are fetched over one keep-alive requests.Session on a thread pool.
+# Every response's ETag / Last-Modified is kept in a local cache together
+# with its body, and the next poll sends If-None-Match / If-Modified-Since:
+# unchanged pages come back as empty 304s and are served from the cache, so
+# polling an unchanged source transfers almost nothing and leaves the output
+# file untouched. Records are streamed to disk as JSONL in page order.
+#
+# Configuration (env):
+#   INGEST_API_URL          paginated JSON endpoint (list of records per page)
+#   INGEST_API_PAGE_PARAM   page number query parameter (default: _page)
+#   INGEST_API_LIMIT_PARAM  page size query parameter (default: _limit)
+#   INGEST_API_PAGE_SIZE    records per page (default: 100)
+#   INGEST_API_WORKERS      concurrent requests (default: 8)
+#   INGEST_API_MAX_PAGES    safety cap on pages (default: 10000)
+
+import argparse
+import hashlib
+import json
+import math
+import os
+import re
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
 import requests
-import time
+from requests.adapters import HTTPAdapter
+
+from scripts.common.artifacts import artifact_path, open_artifact
 from .retry import retry
 
-URL = "https://jsonplaceholder.typicode.com/posts"  # placeholder public API
+REPO_ROOT = Path(__file__).resolve().parents[2]
+# PIPELINE_DATA_DIR relocates the data artifacts (benchmarks, sample runs)
+DATA_DIR = Path(os.getenv("PIPELINE_DATA_DIR") or REPO_ROOT / "data")
+CACHE_DIR = REPO_ROOT / ".cache" / "api"
+
+URL = os.getenv("INGEST_API_URL", "https://jsonplaceholder.typicode.com/posts")  # placeholder public API
+PAGE_PARAM = os.getenv("INGEST_API_PAGE_PARAM", "_page")
+LIMIT_PARAM = os.getenv("INGEST_API_LIMIT_PARAM", "_limit")
+
+REQUEST_TIMEOUT_S = 10
+
+LINK_LAST = re.compile(r'<[^>]*[?&]' + re.escape(PAGE_PARAM) + r'=(\d+)[^>]*>;\s*rel="last"')
+
+# Server-side and throttling errors are worth retrying; other 4xx are not.
+class RetryableHTTPError(requests.HTTPError):
+    pass
+
+RETRY_ON = (requests.ConnectionError, requests.Timeout, RetryableHTTPError)
+
+# On-disk cache of one page: validators + body, keyed by the full request URL.
+class ResponseCache:
+    def __init__(self, root: Path):
+        self.root = root
+        self.root.mkdir(parents=True, exist_ok=True)
+
+    def _paths(self, key: str) -> tuple[Path, Path]:
+        digest = hashlib.sha256(key.encode("utf-8")).hexdigest()
+        return self.root / f"{digest}.meta.json", self.root / f"{digest}.body"
+
+    def get(self, key: str) -> tuple[dict, bytes] | None:
+        meta_path, body_path = self._paths(key)
+        try:
+            return json.loads(meta_path.read_text(encoding="utf-8")), body_path.read_bytes()
+        except (OSError, ValueError):
+            return None
+
+    def put(self, key: str, meta: dict, body: bytes) -> None:
+        meta_path, body_path = self._paths(key)
+        # Body first, then meta: a meta file always points at a complete body
+        tmp = body_path.with_suffix(f".{threading.get_ident()}.tmp")
+        tmp.write_bytes(body)
+        tmp.replace(body_path)
+        tmp = meta_path.with_suffix(f".{threading.get_ident()}.tmp")
+        tmp.write_text(json.dumps(meta), encoding="utf-8")
+        tmp.replace(meta_path)
 
-# Fetch data from external API.
-# Raises an exception on HTTP errors so retry logic can handle failures.
-def fetch_posts():
-    r = requests.get(URL, timeout=10)
-    r.raise_for_status()
-    return r.json()
+def make_session(workers: int) -> requests.Session:
+    session = requests.Session()
+    # One pooled keep-alive connection per worker thread
+    adapter = HTTPAdapter(pool_connections=1, pool_maxsize=workers)
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    session.headers["Accept"] = "application/json"
+    return session
+
+# Fetch one page, conditionally when the cache holds validators for it.
+# Returns (records, headers, status, bytes downloaded); status is "fetched"
+# or "not_modified".
+def fetch_page(session: requests.Session, cache: ResponseCache, page: int, page_size: int):
+    params = {PAGE_PARAM: page, LIMIT_PARAM: page_size}
+    key = requests.Request("GET", URL, params=params).prepare().url
+    cached = cache.get(key)
+
+    headers = {}
+    if cached:
+        meta, _ = cached
+        if meta.get("etag"):
+            headers["If-None-Match"] = meta["etag"]
+        if meta.get("last_modified"):
+            headers["If-Modified-Since"] = meta["last_modified"]
+
+    def do_request() -> requests.Response:
+        r = session.get(URL, params=params, headers=headers, timeout=REQUEST_TIMEOUT_S)
+        if r.status_code == 429 or r.status_code >= 500:
+            raise RetryableHTTPError(f"{r.status_code} for {r.url}", response=r)
+        r.raise_for_status()
+        return r
+
+    r = retry(do_request, attempts=3, base_delay_s=1.0, retry_on=RETRY_ON)
+
+    if r.status_code == 304 and cached:
+        meta, body = cached
+        return json.loads(body), meta.get("headers", {}), "not_modified", 0
+
+    body = r.content
+    kept_headers = {k: r.headers[k] for k in ("X-Total-Count", "Link") if k in r.headers}
+    if r.headers.get("ETag") or r.headers.get("Last-Modified"):
+        cache.put(
+            key,
+            {
+                "etag": r.headers.get("ETag"),
+                "last_modified": r.headers.get("Last-Modified"),
+                "headers": kept_headers,
+            },
+            body,
+        )
+    return r.json(), kept_headers, "fetched", len(body)
+
+# Page count from X-Total-Count or a Link rel="last" header, if the API exposes one.
+def total_pages(headers: dict, page_size: int) -> int | None:
+    if "X-Total-Count" in headers:
+        return max(1, math.ceil(int(headers["X-Total-Count"]) / page_size))
+    m = LINK_LAST.search(headers.get("Link", ""))
+    return int(m.group(1)) if m else None
 
 def main():
-    print("Fetching sample API data...")
+    parser = argparse.ArgumentParser(description="Ingest a paginated JSON API into JSONL")
+    parser.add_argument("--out", type=Path, default=None, help="output JSONL (default: data/api/records.jsonl)")
+    parser.add_argument("--page-size", type=int, default=int(os.getenv("INGEST_API_PAGE_SIZE", "100")))
+    parser.add_argument("--workers", type=int, default=int(os.getenv("INGEST_API_WORKERS", "8")))
+    parser.add_argument("--max-pages", type=int, default=int(os.getenv("INGEST_API_MAX_PAGES", "10000")))
+    parser.add_argument("--cache-dir", type=Path, default=CACHE_DIR)
+    args = parser.parse_args()
+
+    out_path = args.out or artifact_path(DATA_DIR / "api" / "records.jsonl")
+    session = make_session(args.workers)
+    cache = ResponseCache(args.cache_dir)
+    stats = {"fetched": 0, "not_modified": 0, "bytes": 0}
+    stats_lock = threading.Lock()
+
+    print(f"Fetching {URL} (page size {args.page_size}, {args.workers} workers)...")
+
+    def fetch(page: int):
+        records, headers, status, nbytes = fetch_page(session, cache, page, args.page_size)
+        with stats_lock:
+            stats[status] += 1
+            stats["bytes"] += nbytes
+        return records, headers
+
+    # Page 1 tells us how many pages exist (when the API says so)
+    first, headers = fetch(1)
+    pages = {1: first}
+    known_total = total_pages(headers, args.page_size)
+
+    with ThreadPoolExecutor(max_workers=max(1, args.workers)) as pool:
+        if known_total is not None:
+            last = min(known_total, args.max_pages)
+            for page, (records, _) in zip(range(2, last + 1), pool.map(fetch, range(2, last + 1))):
+                pages[page] = records
+        else:
+            # Unknown size: fetch one window of pages at a time until a short page
+            page = 2
+            done = len(first) < args.page_size
+            while not done and page <= args.max_pages:
+                window = list(range(page, min(page + args.workers, args.max_pages + 1)))
+                for p, (records, _) in zip(window, pool.map(fetch, window)):
+                    pages[p] = records
+                    if len(records) < args.page_size:
+                        done = True
+                        break
+                page = window[-1] + 1
 
-    # Retry wrapper adds basic resilience to transient API failures.
-    data = retry(fetch_posts, attempts=3, base_delay_s=1.0)
+    # Drop pages past the first short/empty one (windowed fetch may overshoot)
+    ordered = []
+    for p in sorted(pages):
+        ordered.append(pages[p])
+        if len(pages[p]) < args.page_size:
+            break
+    rows = sum(len(r) for r in ordered)
 
-    print(f"Fetched {len(data)} records from API")
+    if stats["fetched"] == 0 and out_path.exists():
+        print(f"No changes: all {stats['not_modified']} pages returned 304; {out_path} left as-is.")
+    else:
+        # Stream to a temp file and swap it in, so readers never see a partial file
+        out_path.parent.mkdir(parents=True, exist_ok=True)
+        # The temp name keeps the suffix so open_artifact picks the same codec
+        tmp_path = out_path.with_name(f".tmp-{out_path.name}")
+        with open_artifact(tmp_path, "w", newline="\n") as f:
+            for records in ordered:
+                for record in records:
+                    f.write(json.dumps(record, ensure_ascii=False) + "\n")
+        tmp_path.replace(out_path)
+        print(f"Wrote {rows} records from {len(ordered)} pages to {out_path}")
 
-    # Log a small sample instead of full record to avoid noisy output
-    print("Sample record:", data[0])
+    print(f"[metrics] rows_processed={rows}")
+    print(f"[metrics] pages_fetched={stats['fetched']}")
+    print(f"[metrics] pages_not_modified={stats['not_modified']}")
+    print(f"[metrics] bytes_downloaded={stats['bytes']}")
 
-    # Basic sanity check: ensure at least one record exists
-    if not data:
+    if rows == 0:
         raise ValueError("No data returned from API")
-    
-    print("First record:", data[0])
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
@@ -2,8 +2,10 @@
 # (API + PDF/clean pipeline) as subprocesses. Each stage is executed
 # sequentially and must succeed before the next one runs.
 
+import os
 import subprocess
 import sys
+import threading
 from pathlib import Path
 
 # Resolve repository root to ensure all subprocesses run from a consistent working directory.
@@ -16,30 +18,53 @@ STAGES = [
     ("PDF/clean pipeline", "scripts.clean.run_pipeline_clean"),
 ]
 
+# Kill a stage that produces no result within this many seconds.
+STAGE_TIMEOUT_S = float(os.getenv("INGEST_STAGE_TIMEOUT", "1800"))
+
 # Execute a single ingestion stage as a subprocess.
-# Captures stdout/stderr and raises an exception on failure to stop the pipeline.
+# Output is streamed line by line as the stage produces it (stderr merged
+# into stdout), and an exception is raised on failure or timeout to stop
+# the pipeline.
 
 def run_stage(name: str, module: str) -> None:
     print(f"\n=== Stage: {name} ===")
     print(f"Running: {module}")
 
-    # Run module as a subprocess to isolate execution and capture output cleanly.
-    result = subprocess.run(
+    # Run module as a subprocess to isolate execution; unbuffered so
+    # progress shows up live instead of after the stage exits.
+    proc = subprocess.Popen(
         [sys.executable, "-m", module],
         cwd=str(REPO_ROOT),
-        capture_output=True,
+        env={**os.environ, "PYTHONUNBUFFERED": "1"},
+        stdout=subprocess.PIPE,
+        stderr=subprocess.STDOUT,
         text=True,
+        bufsize=1,
     )
 
-    if result.stdout:
-        print(result.stdout)
-    
-    if result.stderr:
-        print("STDERR:", result.stderr)
+    # Watchdog kills hung stages once the timeout elapses.
+    timed_out = threading.Event()
+
+    def kill_on_timeout() -> None:
+        timed_out.set()
+        proc.kill()
+
+    watchdog = threading.Timer(STAGE_TIMEOUT_S, kill_on_timeout)
+    watchdog.start()
+    try:
+        for line in proc.stdout:
+            print(f"[{name}] {line.rstrip()}")
+        returncode = proc.wait()
+    finally:
+        watchdog.cancel()
+        proc.stdout.close()
+
+    if timed_out.is_set():
+        raise RuntimeError(f"Stage '{name}' timed out after {STAGE_TIMEOUT_S:.0f}s")
 
     # Fail fast if any stage exits with a non-zero status.
-    if result.returncode != 0:
-        raise RuntimeError(f"Stage '{name}' failed with exit code {result.returncode}")
+    if returncode != 0:
+        raise RuntimeError(f"Stage '{name}' failed with exit code {returncode}")
 
     print(f"=== Completed: {name} ===")
 
@@ -53,4 +78,4 @@ def main():
     print("\nAll ingestion stages complete.")
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
@@ -0,0 +1,174 @@
+# Deterministic, stratified sample of the raw CSV for fast development runs
+# (run_pipeline.py --sample).
+#
+# Records are drawn per supervising authority: each keeps ceil(fraction *
+# size) records, at least one, taken round-robin across its enterprises (one
+# record of each enterprise before a second of any), so small companies are
+# represented without a per-enterprise floor inflating the sample. On top of
+# that one record of every distinct "format signature" is kept, so the
+# sample still exercises every parsing branch of the clean step:
+#   - the shape of both salary fields (digits -> 9, letters -> a, runs
+#     collapsed: "4,455" -> "9,9", "5000+2000" -> "9+9", "2000 - 3000" -> "9 - 9",
+#     "N/A" -> "a/a")
+#   - blank nr_crt (identifier inference) and embedded line breaks
+# Within an enterprise, records are ranked by a seeded hash of their fields, so
+# the sample depends only on the data and the seed, not on row order.
+# Selected records keep their original order.
+#
+# The sample is cached: sample_meta.json records a key over the input file's
+# content, fraction, seed and SAMPLER_VERSION, and an unchanged key skips the
+# draw.
+#
+# Input:  <PIPELINE_SAMPLE_SOURCE_DIR>/indemnizatii.csv (the full raw file)
+# Output: <PIPELINE_DATA_DIR>/indemnizatii.csv (the sample directory)
+
+import argparse
+import csv
+import hashlib
+import json
+import math
+import os
+import re
+from collections import defaultdict
+from pathlib import Path
+
+from scripts.clean.data_clean import canonical_column_name
+from scripts.common.artifacts import artifact_path, open_artifact, resolve_artifact
+
+REPO_ROOT = Path(__file__).resolve().parents[2]
+SOURCE_DIR = Path(os.getenv("PIPELINE_SAMPLE_SOURCE_DIR") or REPO_ROOT / "data")
+SAMPLE_DIR = Path(os.getenv("PIPELINE_DATA_DIR") or SOURCE_DIR / "sample")
+META_NAME = "sample_meta.json"
+
+DEFAULT_FRACTION = float(os.getenv("PIPELINE_SAMPLE_FRACTION", "0.02"))
+DEFAULT_SEED = int(os.getenv("PIPELINE_SAMPLE_SEED", "42"))
+
+# Bump when the selection rules change, so cached samples are redrawn
+SAMPLER_VERSION = 1
+
+STRATUM_COLUMN = "autoritate_tutelara"
+ENTERPRISE_COLUMN = "intreprindere"
+AMOUNT_COLUMNS = ("suma", "indemnizatie_variabila")
+
+def file_sha256(path: Path) -> str:
+    h = hashlib.sha256()
+    with path.open("rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            h.update(block)
+    return h.hexdigest()
+
+def value_shape(value: str) -> str:
+    shape = re.sub(r"\d+", "9", value.strip())
+    return re.sub(r"[^\W\d_]+", "a", shape)
+
+def format_signature(fields: list[str], index: dict[str, int]) -> tuple:
+    def get(col: str) -> str:
+        i = index.get(col)
+        return fields[i] if i is not None and i < len(fields) else ""
+
+    return (
+        *(value_shape(get(col)) for col in AMOUNT_COLUMNS),
+        get("nr_crt").strip() == "",
+        any("\n" in f or "\r" in f for f in fields),
+    )
+
+def rank(fields: list[str], seed: int) -> bytes:
+    return hashlib.blake2b("\x1f".join(fields).encode("utf-8"), digest_size=8, key=str(seed).encode()).digest()
+
+# Indices of the records to keep, in file order
+def select(records: list[list[str]], header: list[str], fraction: float, seed: int) -> tuple[list[int], int, int]:
+    index = {canonical_column_name(c): i for i, c in enumerate(header)}
+
+    def key(fields: list[str], col: str) -> str:
+        i = index.get(col)
+        return fields[i].strip().upper() if i is not None and i < len(fields) else ""
+
+    strata: dict[str, dict[str, list[int]]] = defaultdict(lambda: defaultdict(list))
+    signatures: dict[tuple, list[int]] = defaultdict(list)
+    for i, fields in enumerate(records):
+        strata[key(fields, STRATUM_COLUMN)][key(fields, ENTERPRISE_COLUMN)].append(i)
+        signatures[format_signature(fields, index)].append(i)
+
+    ranks = [rank(fields, seed) for fields in records]
+    keep = set()
+    for enterprises in strata.values():
+        # (position within its enterprise, rank): round-robin over enterprises
+        order = []
+        for members in enterprises.values():
+            members.sort(key=ranks.__getitem__)
+            order.extend((pos, ranks[i], i) for pos, i in enumerate(members))
+        order.sort()
+        quota = max(1, math.ceil(fraction * len(order)))
+        keep.update(i for _, _, i in order[:quota])
+    for members in signatures.values():
+        keep.add(min(members, key=ranks.__getitem__))
+    return sorted(keep), len(strata), len(signatures)
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Draw a stratified, seeded sample of the raw CSV")
+    parser.add_argument("--fraction", type=float, default=DEFAULT_FRACTION, help="share of each stratum to keep (default: %(default)s)")
+    parser.add_argument("--seed", type=int, default=DEFAULT_SEED, help="sampling seed (default: %(default)s)")
+    args = parser.parse_args()
+    if not 0 < args.fraction <= 1:
+        raise SystemExit("--fraction must be in (0, 1]")
+
+    source = resolve_artifact(SOURCE_DIR / "indemnizatii.csv")
+    if not source.exists():
+        raise FileNotFoundError(f"Raw CSV not found: {source}")
+    if source.parent.resolve() == SAMPLE_DIR.resolve():
+        raise SystemExit("Sample directory must differ from the source directory")
+
+    SAMPLE_DIR.mkdir(parents=True, exist_ok=True)
+    out_path = artifact_path(SAMPLE_DIR / "indemnizatii.csv")
+    meta_path = SAMPLE_DIR / META_NAME
+
+    key = hashlib.sha256(
+        f"{file_sha256(source)}:{args.fraction}:{args.seed}:{SAMPLER_VERSION}".encode()
+    ).hexdigest()[:16]
+    meta = json.loads(meta_path.read_text(encoding="utf-8")) if meta_path.exists() else {}
+    if meta.get("key") == key and resolve_artifact(SAMPLE_DIR / "indemnizatii.csv").exists():
+        print(f"Sample cached (key {key}): {meta['rows_out']} of {meta['rows_in']} records in {SAMPLE_DIR}")
+        print(f"[metrics] rows_processed={meta['rows_out']} sample_cached=1")
+        return
+
+    with open_artifact(source) as f:
+        reader = csv.reader(f)
+        header = next(reader)
+        records = [fields for fields in reader if fields and any(v.strip() for v in fields)]
+    print("[progress] done=1 total=3 unit=steps step=read")
+
+    keep, strata, signatures = select(records, header, args.fraction, args.seed)
+    print("[progress] done=2 total=3 unit=steps step=select")
+
+    tmp = out_path.with_name(f".tmp-{out_path.name}")
+    # CRLF rows like the raw export: csv.writer only quotes fields holding a
+    # lineterminator character, and raw cells contain bare "\r"
+    with open_artifact(tmp, "w") as f:
+        writer = csv.writer(f, lineterminator="\r\n")
+        writer.writerow(header)
+        writer.writerows(records[i] for i in keep)
+    tmp.replace(out_path)
+
+    meta = {
+        "key": key,
+        "source": str(source),
+        "fraction": args.fraction,
+        "seed": args.seed,
+        "rows_in": len(records),
+        "rows_out": len(keep),
+        "strata": strata,
+        "format_signatures": signatures,
+    }
+    tmp = meta_path.with_name(f".tmp-{META_NAME}")
+    tmp.write_text(json.dumps(meta, indent=2) + "\n", encoding="utf-8")
+    tmp.replace(meta_path)
+    print("[progress] done=3 total=3 unit=steps step=write")
+
+    print(
+        f"Sampled {len(keep)} of {len(records)} records "
+        f"({strata} strata, {signatures} format signatures) -> {out_path}"
+    )
+    print(f"[metrics] rows_processed={len(keep)} sample_cached=0")
+
+if __name__ == "__main__":
+    main()
@@ -1,3 +1,11 @@
+# Pipeline orchestrator CLI.
+#
+# Kept cheap to start: the scheduler polls `status`, `history` and
+# `--dry-run` frequently, so module import only pulls in light
+# standard-library modules. psycopg2, cProfile/pstats, the worker pool and
+# the SQLite history store are imported where they are used (see
+# tools/check_startup_time.py for the budget).
+
 import os
 import platform
 import subprocess
@@ -6,16 +14,34 @@ import time
 import argparse
 import logging
 import json
+import re
 import socket
-import psycopg2
+import threading
+from collections import deque
+from dataclasses import dataclass
+from functools import lru_cache
 from pathlib import Path
 from datetime import datetime, timezone
 
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
 # Repo paths
 REPO_ROOT = Path(__file__).resolve().parents[1]
 SCRIPTS_DIR = REPO_ROOT / "scripts"
-LOGS_DIR = REPO_ROOT / "logs"
+# PIPELINE_LOG_DIR relocates the run logs and run history (e.g. so the
+# startup check's dry runs do not land in the real run log)
+LOGS_DIR = Path(os.getenv("PIPELINE_LOG_DIR") or REPO_ROOT / "logs")
 PIPELINE_LOGS_DIR = LOGS_DIR / "pipeline"
+RUNS_JSONL = PIPELINE_LOGS_DIR / "pipeline_runs.jsonl"
+HISTORY_DB = PIPELINE_LOGS_DIR / "pipeline_runs.sqlite"
+TRACES_DIR = PIPELINE_LOGS_DIR / "traces"
+
+# Shared helpers live in the `scripts` package (scripts/common/...)
+if str(REPO_ROOT) not in sys.path:
+    sys.path.insert(0, str(REPO_ROOT))
 
 # Environment checks
 def has_db_config() -> bool:
@@ -34,19 +60,123 @@ def has_aws_creds() -> bool:
 # Canonical mapping of pipeline stage names to executable scripts.
 # Used by CLI stage selection and by the default full-run path.
 STAGE_SCRIPTS = {
+    "extract": SCRIPTS_DIR / "ingest" / "extract_pdf.py",
+    "sample": SCRIPTS_DIR / "ingest" / "sample_raw.py",
     "clean": SCRIPTS_DIR / "clean" / "data_clean.py",
+    "match_persons": SCRIPTS_DIR / "clean" / "match_persons.py",
     "validate": SCRIPTS_DIR / "clean" / "validate_and_export.py",
     "load": SCRIPTS_DIR / "clean" / "load_indemnizatii_clean_to_pg.py",
-    "upload": SCRIPTS_DIR / "clean" / "upload_to_s3.py"
+    "upload": SCRIPTS_DIR / "clean" / "upload_to_s3.py",
+    "anomaly_review": SCRIPTS_DIR / "ai" / "anomaly_review.py",
+    "export": SCRIPTS_DIR / "export" / "export_analytics.py",
+}
+
+# Extra arguments and working directory for stages that are not a bare script run.
+DBT_DIR = REPO_ROOT / "dbt_project"
+DBT_BUILD_COMMAND = [
+    "dbt", "build", "--resource-type", "model", "--resource-type", "snapshot",
+    "--profiles-dir", "profiles",
+]
+# "{suffix}" is replaced by PIPELINE_SCHEMA_SUFFIX (set by --sample).
+STAGE_ARGS = {
+    "anomaly_review": [
+        "--source", "analytics{suffix}.fact_indemnizatii",
+        "--yoy-table", "analytics{suffix}.compensation_yoy",
+    ],
 }
 
-def build_scripts(selected_stage: str | None = None) -> list[Path]:
-    # Upload is optional and only included when explicitly enabled
-    # and credentials are available.
+# --sample: stages after extract read and write PIPELINE_DATA_DIR=<data>/sample
+# and the Postgres schemas raw_sample, analytics_sample, snapshots_sample.
+SAMPLE_SUBDIR = "sample"
+SAMPLE_SCHEMA_SUFFIX = "_sample"
+SAMPLE_SOURCE_ENV = "PIPELINE_SAMPLE_SOURCE_DIR"
+
+# Stage dependency graph. A stage starts as soon as every dependency that is
+# part of the current run has succeeded, so independent stages (load and
+# upload) run side by side on the worker pool.
+STAGE_DEPENDENCIES = {
+    "extract": (),
+    "sample": ("extract",),
+    "clean": ("sample",),
+    "match_persons": ("clean",),
+    "validate": ("match_persons",),
+    "load": ("validate",),
+    "upload": ("validate",),
+    "dbt": ("load",),
+    "anomaly_review": ("dbt",),
+    "export": ("dbt",),
+}
+
+STAGE_NAMES = list(STAGE_DEPENDENCIES)
+
+# Stages that talk to PostgreSQL and therefore need a resolved DB config.
+DB_STAGES = {"load", "dbt", "anomaly_review", "export"}
+
+# Python stages run as modules from the repo root (like run_ingest does),
+# so they can share code through the `scripts` package.
+def script_module(script_path: Path) -> str:
+    return ".".join(script_path.relative_to(REPO_ROOT).with_suffix("").parts)
+
+def stage_command(stage: str) -> tuple[list[str], Path]:
+    suffix = os.getenv("PIPELINE_SCHEMA_SUFFIX") or ""
+    if stage == "dbt":
+        # build (not run) so the SCD2 snapshots are taken between the dimension
+        # models and the point-in-time fact that joins them
+        if suffix:
+            return [*DBT_BUILD_COMMAND, "--vars", json.dumps({"schema_suffix": suffix})], DBT_DIR
+        return DBT_BUILD_COMMAND, DBT_DIR
+    module = script_module(STAGE_SCRIPTS[stage])
+    args = [a.format(suffix=suffix) for a in STAGE_ARGS.get(stage, [])]
+    return [sys.executable, "-m", module, *args], REPO_ROOT
+
+# Environment overrides for one stage. In sample runs extract still writes the
+# full raw file, which the sample stage draws from.
+def stage_env(stage: str) -> dict[str, str]:
+    source_dir = os.getenv(SAMPLE_SOURCE_ENV)
+    if stage == "extract" and source_dir:
+        return {"PIPELINE_DATA_DIR": source_dir}
+    return {}
+
+# Point this process's environment (inherited by every stage) at the sample
+# data directory and schemas. Returns the sample directory.
+def enable_sample_mode(fraction: float, seed: int) -> Path:
+    source_dir = Path(os.getenv("PIPELINE_DATA_DIR") or REPO_ROOT / "data")
+    sample_dir = source_dir / SAMPLE_SUBDIR
+    os.environ.update({
+        SAMPLE_SOURCE_ENV: str(source_dir),
+        "PIPELINE_DATA_DIR": str(sample_dir),
+        "PIPELINE_SCHEMA_SUFFIX": SAMPLE_SCHEMA_SUFFIX,
+        "PIPELINE_SAMPLE_FRACTION": str(fraction),
+        "PIPELINE_SAMPLE_SEED": str(seed),
+    })
+    return sample_dir
+
+def stage_label(stage: str) -> str:
+    if stage in STAGE_SCRIPTS:
+        return pretty_path(STAGE_SCRIPTS[stage])
+    cmd, _ = stage_command(stage)
+    return " ".join(cmd)
+
+def build_stages(selected_stage: str | None = None, sample: bool = False) -> list[str]:
+    # PDF extraction, upload, dbt, anomaly review and the Parquet export are
+    # optional and only included when explicitly enabled (upload additionally
+    # needs credentials).
+    extract_enabled = bool(os.getenv("PIPELINE_PDF_PATH"))
     upload_enabled = os.getenv("PIPELINE_UPLOAD") == "1"
+    dbt_enabled = os.getenv("PIPELINE_DBT") == "1"
+    review_enabled = os.getenv("PIPELINE_ANOMALY_REVIEW") == "1"
+    export_enabled = os.getenv("PIPELINE_EXPORT") == "1"
 
     if selected_stage:
+        if selected_stage == "extract" and not extract_enabled:
+            raise ValueError(
+                "Extract stage requested but PIPELINE_PDF_PATH is not set."
+            )
+        if selected_stage == "sample" and not sample:
+            raise ValueError("Sample stage requested without --sample.")
         if selected_stage == "upload":
+            if sample:
+                raise ValueError("Upload stage is not available in sample runs.")
             if not upload_enabled:
                 raise ValueError(
                     "Upload stage requested but PIPELINE_UPLOAD is not enabled."
@@ -55,33 +185,66 @@ def build_scripts(selected_stage: str | None = None) -> list[Path]:
                 raise ValueError(
                     "Upload stage requested but AWS credentials were not found."
                 )
-            return [STAGE_SCRIPTS["upload"]]
-        
-        return [STAGE_SCRIPTS[selected_stage]]
 
-    # Default pipeline order: local ETL first, optional cloud upload last.
-    stages = [
-        STAGE_SCRIPTS["clean"],
-        STAGE_SCRIPTS["validate"],
-        STAGE_SCRIPTS["load"],
-    ]
+        return [selected_stage]
+
+    # Default pipeline: local ETL first, optional cloud upload and
+    # post-load stages when enabled.
+    stages = ["clean", "match_persons", "validate", "load"]
+
+    if sample:
+        stages.insert(0, "sample")
 
-    if upload_enabled and has_aws_creds():
-        stages.append(STAGE_SCRIPTS["upload"])
+    if extract_enabled:
+        stages.insert(0, "extract")
+
+    if upload_enabled and sample:
+        print("!!! PIPELINE_UPLOAD=1 ignored in sample runs.", file=sys.stderr)
+    elif upload_enabled and has_aws_creds():
+        stages.append("upload")
     elif upload_enabled and not has_aws_creds():
         print(
             "!!! PIPELINE_UPLOAD=1 but AWS credentials not found. Skipping upload.",
             file=sys.stderr,
         )
 
+    if dbt_enabled:
+        stages.append("dbt")
+
+    if review_enabled:
+        stages.append("anomaly_review")
+
+    if export_enabled:
+        stages.append("export")
+
     return stages
 
+# Restrict the dependency graph to the stages in this run. When a dependency
+# is not part of the run, the stage inherits that dependency's own
+# dependencies instead (e.g. anomaly_review waits for load when dbt is off).
+def resolve_dependencies(stages: list[str]) -> dict[str, set[str]]:
+    selected = set(stages)
+
+    def nearest(stage: str) -> set[str]:
+        found: set[str] = set()
+        for dep in STAGE_DEPENDENCIES[stage]:
+            if dep in selected:
+                found.add(dep)
+            else:
+                found |= nearest(dep)
+        return found
+
+    return {s: nearest(s) for s in stages}
+
 # Configure per-run file + console logging in UTC and enforce simple
-# retention so pipeline logs do not grow without bound.
-def setup_logging(run_id: str) -> tuple[logging.Logger, Path]:
-    PIPELINE_LOGS_DIR.mkdir(exist_ok=True)
+# retention so pipeline logs do not grow without bound. Retention is
+# skipped for dry runs, which the scheduler issues often.
+def setup_logging(run_id: str, *, prune: bool = True) -> tuple[logging.Logger, Path]:
+    PIPELINE_LOGS_DIR.mkdir(parents=True, exist_ok=True)
 
-    prune_logs(keep_last=20)
+    if prune:
+        prune_logs(keep_last=20)
+        prune_logs(keep_last=20, pattern="traces/trace_*.json")
 
     log_path = PIPELINE_LOGS_DIR / f"pipeline_{run_id}.log"
 
@@ -115,15 +278,13 @@ def pretty_path(p: Path) -> str:
         return str(p)
 
 # Keep only the most recent pipeline logs to avoid unbounded local growth.
+# Log names embed the UTC run id (pipeline_YYYYMMDD_HHMMSS.log), so sorting
+# by name orders them chronologically without a stat() per file.
 def prune_logs(*, keep_last: int = 20, pattern: str = "pipeline_*.log") -> None:
     LOGS_DIR.mkdir(exist_ok=True)
     PIPELINE_LOGS_DIR.mkdir(exist_ok=True)
 
-    logs = sorted(
-        PIPELINE_LOGS_DIR.glob(pattern),
-        key=lambda p: p.stat().st_mtime,
-        reverse=True,
-    )
+    logs = sorted(PIPELINE_LOGS_DIR.glob(pattern), key=lambda p: p.name, reverse=True)
     for old in logs[keep_last:]:
         try:
             old.unlink()
@@ -151,7 +312,30 @@ def log_environment_once(logger: logging.Logger) -> None:
         )
     logger.info("===========================")
 
-def get_git_sha(logger: logging.Logger) -> str:
+# Resolve HEAD by reading .git directly (loose ref or packed-refs) and fall
+# back to `git rev-parse` only for layouts this does not understand.
+# Cached: the SHA cannot change during a run.
+@lru_cache(maxsize=1)
+def get_git_sha() -> str:
+    try:
+        git_dir = REPO_ROOT / ".git"
+        if git_dir.is_file():  # worktree / submodule: "gitdir: <path>"
+            git_dir = (REPO_ROOT / git_dir.read_text(encoding="utf-8").split(":", 1)[1].strip()).resolve()
+        head = (git_dir / "HEAD").read_text(encoding="utf-8").strip()
+        if not head.startswith("ref: "):
+            return head[:7]
+        ref = head[5:]
+        ref_path = git_dir / ref
+        if ref_path.exists():
+            return ref_path.read_text(encoding="utf-8").strip()[:7]
+        packed = git_dir / "packed-refs"
+        if packed.exists():
+            for line in packed.read_text(encoding="utf-8").splitlines():
+                if line.endswith(" " + ref):
+                    return line.split(" ", 1)[0][:7]
+    except (OSError, IndexError):
+        pass
+
     try:
         p = subprocess.run(
             ["git", "rev-parse", "--short", "HEAD"],
@@ -160,8 +344,7 @@ def get_git_sha(logger: logging.Logger) -> str:
             text=True,
         )
         return p.stdout.strip() if p.returncode == 0 else "n/a"
-    except Exception as e:
-        logger.warning("Could not resolve git SHA: %s", e)
+    except Exception:
         return "n/a"
 
 # Write a readable Markdown summary for the latest run so failures
@@ -170,8 +353,8 @@ def write_run_summary(
     *,
     status: str,
     duration_s: float,
-    steps: list[Path],
-    failed_step: Path | None,
+    stage_results: list[dict],
+    failed_stage: str | None,
     log_path: Path,
     sha: str,
 ) -> Path:
@@ -184,8 +367,30 @@ def write_run_summary(
     dbname = os.getenv("PGDATABASE") or os.getenv("DB_NAME") or "not set"
     user = os.getenv("PGUSER") or os.getenv("DB_USER") or "not set"
 
-    failed_line = pretty_path(failed_step) if failed_step else "n/a"
-    steps_lines = "\n".join([f"- {pretty_path(s)}" for s in steps])
+    failed_line = stage_label(failed_stage) if failed_stage else "n/a"
+    steps_lines = "\n".join(
+        [
+            f"| {r['stage']} | {r['status']} | {r['started_at_utc']} "
+            f"| {r['ended_at_utc']} | {r['duration_seconds']:.1f}s |"
+            for r in sorted(stage_results, key=lambda r: r["started_at_utc"])
+        ]
+    )
+
+    def fmt(value, spec: str = "") -> str:
+        return "n/a" if value is None else format(value, spec)
+
+    resource_lines = "\n".join(
+        [
+            f"| {r['stage']} | {fmt(r['resources'].get('cpu_user_seconds'), '.2f')} "
+            f"| {fmt(r['resources'].get('cpu_sys_seconds'), '.2f')} "
+            f"| {fmt(r['resources'].get('peak_rss_mb'), '.1f')} "
+            f"| {fmt(r['resources'].get('block_input_ops'))} "
+            f"| {fmt(r['resources'].get('block_output_ops'))} "
+            f"| {fmt(r['counters'].get('rows_processed'))} "
+            f"| {fmt(r['resources'].get('rows_per_second'), '.0f')} |"
+            for r in sorted(stage_results, key=lambda r: r["started_at_utc"])
+        ]
+    )
 
     content = f"""# Pipeline Run Summary
 
@@ -202,8 +407,15 @@ def write_run_summary(
 - User: {user}
 
 ## Steps executed
+| Stage | Status | Start (UTC) | End (UTC) | Duration |
+|---|---|---|---|---|
 {steps_lines}
 
+## Stage resources
+| Stage | CPU user (s) | CPU sys (s) | Peak RSS (MB) | Blocks in | Blocks out | Rows | Rows/s |
+|---|---|---|---|---|---|---|---|
+{resource_lines}
+
 ## Failure
 - Failed step: {failed_line}
 """
@@ -219,12 +431,138 @@ def append_run_record(*, record: dict) -> Path:
 
     # JSONL chosen intentionally over a single JSON document:
     # append-only, easy to stream, grep, parse, and ingest later.
-    path = PIPELINE_LOGS_DIR / "pipeline_runs.jsonl"
+    path = RUNS_JSONL
     with path.open("a", encoding="utf-8") as f:
         f.write(json.dumps(record, ensure_ascii=False) + "\n")
     return path
 
+# Yield records from pipeline_runs.jsonl newest first without reading the
+# whole file: scan backwards from the end in fixed-size blocks.
+def iter_run_records_reversed(block_size: int = 8192):
+    path = RUNS_JSONL
+    if not path.exists():
+        return
+    with path.open("rb") as f:
+        f.seek(0, os.SEEK_END)
+        pos = f.tell()
+        partial = b""
+        while pos > 0:
+            step = min(block_size, pos)
+            pos -= step
+            f.seek(pos)
+            lines = (f.read(step) + partial).split(b"\n")
+            # The first piece may be cut mid-line; keep it for the next block
+            partial = lines.pop(0) if pos > 0 else b""
+            for line in reversed(lines):
+                if line.strip():
+                    yield json.loads(line)
+        if partial.strip():
+            yield json.loads(partial)
+
+# Most recent real run; dry runs only record intent and are skipped, and
+# --sample development runs unless include_sample is set.
+def read_last_run_record(include_sample: bool = False) -> dict | None:
+    for record in iter_run_records_reversed():
+        if record.get("status") == "dry_run":
+            continue
+        if record.get("sample") and not include_sample:
+            continue
+        return record
+    return None
+
+# Mirror new JSONL records into the indexed SQLite history store.
+# The store is derived data: a failure here is logged, never fatal.
+def index_run_history(logger: logging.Logger) -> None:
+    import sqlite3
+    from scripts.common import run_history
+
+    try:
+        conn = run_history.connect(HISTORY_DB)
+        try:
+            run_history.sync(conn, RUNS_JSONL)
+        finally:
+            conn.close()
+    except (sqlite3.Error, OSError) as e:
+        logger.warning("Could not update run history store: %s", e)
+
+# `history` command: per-stage duration percentiles, failure rates and
+# regressions, served from the SQLite store (synced from the JSONL first).
+def show_history(args) -> int:
+    from scripts.common import run_history
+
+    conn = run_history.connect(HISTORY_DB)
+    try:
+        run_history.sync(conn, RUNS_JSONL)
+        totals = run_history.run_totals(
+            conn, last=args.last, since=args.since, include_sample=args.include_sample
+        )
+        stats = run_history.stage_stats(
+            conn,
+            stage=args.stage,
+            last=args.last,
+            recent=args.recent,
+            tolerance=args.tolerance,
+            since=args.since,
+            include_sample=args.include_sample,
+        )
+    finally:
+        conn.close()
+
+    if args.json:
+        print(json.dumps({"runs": totals, "stages": stats}, ensure_ascii=False))
+        return 0
+
+    if not stats:
+        print("No stage history recorded yet.")
+        return 0
+
+    def fmt(value) -> str:
+        return "n/a" if value is None else f"{value:.1f}s"
+
+    rate = totals["failure_rate"]
+    print(
+        f"Runs: {totals['runs']} (failures {totals['failures']}, "
+        f"rate {'n/a' if rate is None else f'{rate:.1%}'}), "
+        f"p50 {fmt(totals['p50_seconds'])}, p95 {fmt(totals['p95_seconds'])}"
+    )
+    print(f"{'stage':<16} {'runs':>5} {'fail%':>6} {'p50':>8} {'p90':>8} {'p95':>8} {'max':>8}  trend")
+    for s in stats:
+        trend = "-"
+        if s["regression"]:
+            trend = f"REGRESSION {fmt(s['prior_p50_seconds'])} -> {fmt(s['recent_p50_seconds'])}"
+        print(
+            f"{s['stage']:<16} {s['runs']:>5} {s['failure_rate']:>6.1%} "
+            f"{fmt(s['p50_seconds']):>8} {fmt(s['p90_seconds']):>8} "
+            f"{fmt(s['p95_seconds']):>8} {fmt(s['max_seconds']):>8}  {trend}"
+        )
+    return 0
+
+# `status` command: report the last run for schedulers and humans.
+# Exit code mirrors the last run (0 success/dry run, 1 failed, 3 no runs).
+def show_status(as_json: bool, include_sample: bool = False) -> int:
+    record = read_last_run_record(include_sample)
+    if record is None:
+        print("No pipeline runs recorded yet.")
+        return 3
+    if as_json:
+        print(json.dumps(record, ensure_ascii=False))
+    else:
+        print(f"run_id      : {record.get('run_id')}")
+        print(f"status      : {record.get('status')}")
+        print(f"completed   : {record.get('completed_at_utc')}")
+        print(f"duration    : {record.get('duration_seconds')}s")
+        print(f"git_sha     : {record.get('git_sha')}")
+        print(f"failed_step : {record.get('failed_step') or '-'}")
+        if record.get("sample"):
+            print(f"sample      : fraction={record['sample'].get('fraction')} seed={record['sample'].get('seed')}")
+        for s in record.get("stages", []):
+            print(f"  {s['stage']:<16} {s['status']:<8} {s['duration_seconds']:.1f}s")
+    return 1 if record.get("status") == "failed" else 0
+
 def check_db_connection(logger: logging.Logger) -> None:
+    # Imported here so dry runs and status polls never pay for libpq
+    import psycopg2
+
     try:
         conn = psycopg2.connect(
             host=os.getenv("PGHOST") or os.getenv("DB_HOST"),
@@ -239,45 +577,387 @@ def check_db_connection(logger: logging.Logger) -> None:
         logger.error("Database connection failed: %s", e)
         sys.exit(1)
 
-# Execute a single pipeline stage as a subprocess, capture stdout/stderr,
-# and return success status plus elapsed runtime.
-def run_stage(logger: logging.Logger, script_path: Path) -> tuple[bool, float]:
-    stage_name = pretty_path(script_path)
-    logger.info("=== Stage start: %s ===", stage_name)
-    start = time.time()
+def utc_iso(dt: datetime) -> str:
+    return dt.isoformat(timespec="milliseconds").replace("+00:00", "Z")
+
+# Stages report structured lines on stdout:
+#   "[metrics] key=value"                 counters stored in the run record
+#                                         (e.g. "[metrics] rows_processed=786")
+#   "[progress] done=<n> total=<n> ..."   heartbeats with live progress
+STRUCTURED_LINE = re.compile(r"^\[(metrics|progress)\]\s+(.*)$")
+KEY_VALUE = re.compile(r"(\w+)=(\S+)")
 
-    result = subprocess.run(
-        [sys.executable, str(script_path)],
-        cwd=str(REPO_ROOT),
-        capture_output=True,
+# Output is streamed line by line; only a bounded tail is kept in memory
+# (for the failure message) and overly long lines are truncated in the log.
+OUTPUT_TAIL_LINES = 50
+MAX_LOGGED_LINE_CHARS = 4000
+
+HEARTBEAT_LOCK = threading.Lock()
+
+@dataclass(frozen=True)
+class StageOptions:
+    timeout_s: float | None = None
+    profile_dir: Path | None = None
+    heartbeat_path: Path | None = None
+    trace_dir: Path | None = None
+
+def parse_value(value: str):
+    try:
+        return int(value)
+    except ValueError:
+        try:
+            return float(value)
+        except ValueError:
+            return value
+
+def record_heartbeat(
+    logger: logging.Logger, stage: str, values: dict, heartbeat_path: Path | None
+) -> dict:
+    heartbeat = {"stage": stage, "ts_utc": utc_iso(datetime.now(timezone.utc)), **values}
+    done, total = values.get("done"), values.get("total")
+    if isinstance(done, (int, float)) and isinstance(total, (int, float)) and total > 0:
+        heartbeat["percent"] = round(100.0 * done / total, 1)
+        logger.info("Heartbeat: %s %s/%s (%.1f%%)", stage, done, total, heartbeat["percent"])
+
+    if heartbeat_path is not None:
+        with HEARTBEAT_LOCK:
+            heartbeat_path.parent.mkdir(parents=True, exist_ok=True)
+            with heartbeat_path.open("a", encoding="utf-8") as f:
+                f.write(json.dumps(heartbeat, ensure_ascii=False) + "\n")
+    return heartbeat
+
+# Run a stage command, streaming stdout/stderr into the logger as lines
+# arrive, and return (exit code, counters, heartbeat count, stderr tail,
+# rusage, timed_out). The child is reaped with os.wait4 so CPU time, peak
+# RSS and block I/O are measured for that child alone; RUSAGE_CHILDREN
+# deltas would mix the usage of stages running concurrently on the pool.
+def stream_stage(
+    logger: logging.Logger,
+    stage: str,
+    cmd: list[str],
+    cwd: Path,
+    options: StageOptions,
+):
+    env = {**os.environ, "PYTHONUNBUFFERED": "1", **stage_env(stage)}
+    if options.trace_dir is not None:
+        # Stages record spans with scripts.common.tracing (see merge_run_trace)
+        env.update(PIPELINE_TRACE_DIR=str(options.trace_dir), PIPELINE_TRACE_STAGE=stage)
+    proc = subprocess.Popen(
+        cmd,
+        cwd=str(cwd),
+        env=env,
+        stdout=subprocess.PIPE,
+        stderr=subprocess.PIPE,
         text=True,
+        bufsize=1,
     )
 
+    counters: dict = {}
+    heartbeats: list[dict] = []
+    stderr_tail: deque[str] = deque(maxlen=OUTPUT_TAIL_LINES)
+
+    def pump_stdout() -> None:
+        for line in proc.stdout:
+            line = line.rstrip("\n")
+            logger.info("[%s] %s", stage, line[:MAX_LOGGED_LINE_CHARS])
+            m = STRUCTURED_LINE.match(line.strip())
+            if not m:
+                continue
+            kind, rest = m.groups()
+            values = {k: parse_value(v) for k, v in KEY_VALUE.findall(rest)}
+            if kind == "metrics":
+                counters.update(values)
+            else:
+                heartbeats.append(
+                    record_heartbeat(logger, stage, values, options.heartbeat_path)
+                )
+        proc.stdout.close()
+
+    def pump_stderr() -> None:
+        for line in proc.stderr:
+            line = line.rstrip("\n")
+            logger.warning("[%s] %s", stage, line[:MAX_LOGGED_LINE_CHARS])
+            stderr_tail.append(line)
+        proc.stderr.close()
+
+    readers = [
+        threading.Thread(target=pump_stdout, daemon=True),
+        threading.Thread(target=pump_stderr, daemon=True),
+    ]
+    for t in readers:
+        t.start()
+
+    deadline = time.monotonic() + options.timeout_s if options.timeout_s else None
+    usage = None
+    timed_out = False
+
+    def reap(block: bool) -> bool:
+        nonlocal usage
+        if resource is None:  # non-POSIX platform: no per-child accounting
+            if block:
+                proc.wait()
+            return proc.poll() is not None
+        pid, wait_status, ru = os.wait4(proc.pid, 0 if block else os.WNOHANG)
+        if not pid:
+            return False
+        usage = ru
+        proc.returncode = os.waitstatus_to_exitcode(wait_status)
+        return True
+
+    while not reap(block=False):
+        if deadline is not None and time.monotonic() > deadline:
+            # Kill hung stages so the worker (and the run) can move on.
+            timed_out = True
+            proc.kill()
+            reap(block=True)
+            break
+        time.sleep(0.05)
+
+    # After a kill, a grandchild may still hold the pipes open; don't wait forever.
+    for t in readers:
+        t.join(timeout=5 if timed_out else None)
+
+    return proc.returncode, counters, len(heartbeats), list(stderr_tail), usage, timed_out
+
+def summarize_usage(usage, elapsed: float, counters: dict) -> dict:
+    if usage is None:
+        return {}
+
+    # ru_maxrss is reported in kilobytes on Linux and in bytes on macOS.
+    rss_divisor = 1024 * 1024 if sys.platform == "darwin" else 1024
+    resources = {
+        "cpu_user_seconds": round(usage.ru_utime, 3),
+        "cpu_sys_seconds": round(usage.ru_stime, 3),
+        "peak_rss_mb": round(usage.ru_maxrss / rss_divisor, 1),
+        "block_input_ops": usage.ru_inblock,
+        "block_output_ops": usage.ru_oublock,
+    }
+
+    rows = counters.get("rows_processed")
+    if isinstance(rows, int) and elapsed > 0:
+        resources["rows_per_second"] = round(rows / elapsed, 1)
+
+    return resources
+
+# Write a short, human-readable pstats report next to the raw .prof dump.
+def write_profile_report(prof_path: Path) -> Path | None:
+    if not prof_path.exists():
+        return None
+    import pstats
+
+    report_path = prof_path.with_suffix(".txt")
+    with report_path.open("w", encoding="utf-8") as f:
+        stats = pstats.Stats(str(prof_path), stream=f)
+        stats.sort_stats("cumulative").print_stats(40)
+    return report_path
+
+# Merge the spans the stages recorded (one file per process under
+# traces/<run_id>/) with the stage timings into traces/trace_<run_id>.json,
+# and attach per-span totals to the stage records so a slow step inside a
+# stage shows up in the run record without opening the trace.
+def merge_run_trace(logger: logging.Logger, run_id: str, stage_results: list[dict], parts_dir: Path) -> Path | None:
+    from scripts.common.tracing import merge_traces
+
+    stage_spans = [
+        (
+            r["stage"],
+            datetime.fromisoformat(r["started_at_utc"].replace("Z", "+00:00")).timestamp(),
+            r["duration_seconds"],
+        )
+        for r in stage_results
+    ]
+    out_path = TRACES_DIR / f"trace_{run_id}.json"
+    try:
+        totals = merge_traces(parts_dir, stage_spans, out_path, run_id)
+    except OSError as e:
+        logger.warning("Trace not written: %s", e)
+        return None
+
+    for r in stage_results:
+        spans = totals.get(r["stage"])
+        if spans:
+            r["spans_ms"] = spans
+            slowest = sorted(spans.items(), key=lambda kv: kv[1], reverse=True)[:5]
+            logger.info(
+                "Slowest spans in %s: %s",
+                r["stage"],
+                ", ".join(f"{name}={ms:.0f}ms" for name, ms in slowest),
+            )
+    logger.info("Trace written: %s", pretty_path(out_path))
+    return out_path
+
+# Execute a single pipeline stage as a subprocess with live, line-streamed
+# output and return a record with status, start/end timestamps, elapsed
+# runtime, child resource usage and stage-reported counters.
+def run_stage(
+    logger: logging.Logger, stage: str, options: StageOptions = StageOptions()
+) -> dict:
+    stage_name = stage_label(stage)
+    cmd, cwd = stage_command(stage)
+
+    # Opt-in cProfile: only Python stages can be profiled this way.
+    prof_path = None
+    if options.profile_dir is not None and stage in STAGE_SCRIPTS:
+        options.profile_dir.mkdir(parents=True, exist_ok=True)
+        prof_path = options.profile_dir / f"{stage}.prof"
+        cmd = [cmd[0], "-m", "cProfile", "-o", str(prof_path), *cmd[1:]]
+
+    logger.info("=== Stage start: %s ===", stage_name)
+    started_at = datetime.now(timezone.utc)
+    start = time.time()
+
+    counters: dict = {}
+    heartbeat_count = 0
+    stderr_tail: list[str] = []
+    usage = None
+    timed_out = False
+    try:
+        returncode, counters, heartbeat_count, stderr_tail, usage, timed_out = stream_stage(
+            logger, stage, cmd, cwd, options
+        )
+    except OSError as e:
+        # e.g. dbt executable not on PATH
+        logger.error("Stage could not be started: %s (%s)", stage_name, e)
+        returncode = None
+
     elapsed = time.time() - start
+    record = {
+        "stage": stage,
+        "command": stage_name,
+        "started_at_utc": utc_iso(started_at),
+        "ended_at_utc": utc_iso(datetime.now(timezone.utc)),
+        "duration_seconds": round(elapsed, 2),
+        "exit_code": returncode,
+        "timed_out": timed_out,
+        "heartbeats": heartbeat_count,
+        "resources": summarize_usage(usage, elapsed, counters),
+        "counters": counters,
+    }
 
-    # Run each stage in an isolated subprocess so failures,
-    # stdout/stderr, and execution timing are independently observable.
-    if result.stdout:
-        logger.info("[stdout] %s\n%s", stage_name, result.stdout.rstrip())
+    if prof_path is not None:
+        report_path = write_profile_report(prof_path)
+        if report_path is not None:
+            record["profile_file"] = pretty_path(report_path)
+            logger.info("Profile written: %s", pretty_path(report_path))
 
-    if result.stderr:
-        logger.warning("[stderr] %s\n%s", stage_name, result.stderr.rstrip())
+    if record["resources"]:
+        logger.info(
+            "Stage resources: %s (cpu user=%.2fs sys=%.2fs, peak_rss=%.1fMB)",
+            stage_name,
+            record["resources"]["cpu_user_seconds"],
+            record["resources"]["cpu_sys_seconds"],
+            record["resources"]["peak_rss_mb"],
+        )
 
-    if result.returncode != 0:
+    if timed_out:
+        logger.error(
+            "Stage timed out and was killed: %s (timeout=%.0fs)",
+            stage_name,
+            options.timeout_s,
+        )
+
+    if returncode != 0:
         logger.error(
             "Stage failed: %s (exit=%s, elapsed=%.1fs)",
             stage_name,
-            result.returncode,
+            returncode,
             elapsed,
         )
-        return False, elapsed
+        if stderr_tail:
+            logger.error("Last stderr lines from %s:\n%s", stage_name, "\n".join(stderr_tail))
+        return {**record, "status": "failed"}
 
     logger.info("=== Stage success: %s (elapsed=%.1fs) ===", stage_name, elapsed)
-    return True, elapsed
+    return {**record, "status": "success"}
+
+# Execute the selected stages as a dependency graph on a worker pool.
+# A stage is submitted once all of its dependencies succeeded. On the first
+# failure no further stages are started (fail fast); stages already running
+# are allowed to finish so their output and timings are still recorded.
+def run_dag(
+    logger: logging.Logger,
+    stages: list[str],
+    *,
+    max_workers: int,
+    options: StageOptions = StageOptions(),
+) -> tuple[list[dict], str | None]:
+    from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+    deps = resolve_dependencies(stages)
+    pending = list(stages)
+    succeeded: set[str] = set()
+    running = {}
+    results: list[dict] = []
+    failed_stage: str | None = None
+
+    with ThreadPoolExecutor(max_workers=max_workers) as pool:
+        while pending or running:
+            if failed_stage is None:
+                ready = [s for s in pending if deps[s] <= succeeded]
+                for s in ready:
+                    pending.remove(s)
+                    running[pool.submit(run_stage, logger, s, options)] = s
+
+            if not running:
+                break
+
+            done, _ = wait(running, return_when=FIRST_COMPLETED)
+            for fut in done:
+                stage = running.pop(fut)
+                result = fut.result()
+                results.append(result)
+                if result["status"] == "success":
+                    succeeded.add(stage)
+                elif failed_stage is None:
+                    failed_stage = stage
+
+    for s in pending:
+        logger.warning("Stage not started: %s", stage_label(s))
+
+    return results, failed_stage
 
 
 def main() -> None:
     parser = argparse.ArgumentParser(description="Run ETL pipeline")
+    parser.add_argument(
+        "command",
+        nargs="?",
+        choices=["run", "status", "history"],
+        default="run",
+        help="run the pipeline (default), show the last recorded run, or show run history",
+    )
+    parser.add_argument(
+        "--json",
+        action="store_true",
+        help="status/history: print JSON instead of text",
+    )
+    parser.add_argument(
+        "--last",
+        type=int,
+        default=100,
+        help="history: number of most recent executions per stage to analyse (default: 100)",
+    )
+    parser.add_argument(
+        "--recent",
+        type=int,
+        default=10,
+        help="history: newest executions compared against the older ones for regressions (default: 10)",
+    )
+    parser.add_argument(
+        "--tolerance",
+        type=float,
+        default=0.25,
+        help="history: relative median slowdown flagged as a regression (default: 0.25)",
+    )
+    parser.add_argument(
+        "--since",
+        help="history: only consider runs on or after this UTC date (YYYY-MM-DD)",
+    )
+    parser.add_argument(
+        "--include-sample",
+        action="store_true",
+        help="status/history: also consider --sample development runs (excluded by default)",
+    )
     parser.add_argument(
         "--dry-run",
         action="store_true",
@@ -285,23 +965,72 @@ def main() -> None:
     )
     parser.add_argument(
         "--stage",
-        choices=["clean", "validate", "load", "upload"],
-        help="Run only a specific pipeline stage",
+        choices=STAGE_NAMES,
+        help="Run only a specific pipeline stage (history: report only this stage)",
+    )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=4,
+        help="Maximum number of stages executed concurrently (default: 4)",
+    )
+    parser.add_argument(
+        "--profile",
+        action="store_true",
+        help="Run Python stages under cProfile and write pstats reports per stage",
+    )
+    parser.add_argument(
+        "--sample",
+        type=float,
+        nargs="?",
+        const=0.02,
+        default=None,
+        metavar="FRACTION",
+        help="Run on a seeded, stratified sample of the raw data (default fraction 0.02) "
+        "in data/sample/ and the *_sample schemas",
+    )
+    parser.add_argument(
+        "--sample-seed",
+        type=int,
+        default=42,
+        help="Seed for --sample (default: 42)",
+    )
+    parser.add_argument(
+        "--stage-timeout",
+        type=float,
+        default=3600.0,
+        help="Kill a stage that runs longer than this many seconds (default: 3600, 0 disables)",
     )
     args = parser.parse_args()
 
+    if args.command == "status":
+        sys.exit(show_status(args.json, args.include_sample))
+    if args.command == "history":
+        sys.exit(show_history(args))
+
     run_id = datetime.now(timezone.utc).strftime("%Y%m%d_%H%M%S")
-    logger, log_path = setup_logging(run_id)
-    sha = get_git_sha(logger)
+    logger, log_path = setup_logging(run_id, prune=not args.dry_run)
+    sha = get_git_sha()
 
     logger.info("Pipeline run start (git=%s)", sha)
     if args.stage:
         logger.info("Selected stage: %s", args.stage)
         
+    sample = args.sample is not None
+    if sample:
+        if not 0 < args.sample <= 1:
+            logger.error("--sample fraction must be in (0, 1]")
+            sys.exit(2)
+        sample_dir = enable_sample_mode(args.sample, args.sample_seed)
+        logger.info(
+            "Sample run: fraction=%s seed=%s data=%s schemas=*%s",
+            args.sample, args.sample_seed, pretty_path(sample_dir), SAMPLE_SCHEMA_SUFFIX,
+        )
+
     log_environment_once(logger)
 
     try:
-        scripts_to_run = build_scripts(args.stage)
+        stages_to_run = build_stages(args.stage, sample=sample)
     except ValueError as e:
         logger.error(str(e))
         sys.exit(2)
@@ -317,9 +1046,8 @@ def main() -> None:
     if upload_enabled and not has_aws_creds():
         logger.warning("PIPELINE_UPLOAD=1 but AWS credentials not found. Skipping upload stage.")
 
-    # Fail fast if loading to PG without DB config
-    load_stage = STAGE_SCRIPTS["load"]
-    needs_db = load_stage in scripts_to_run
+    # Fail fast if any database stage is selected without DB config
+    needs_db = bool(DB_STAGES.intersection(stages_to_run))
     if needs_db and not has_db_config():
         logger.error(
             "Database configuration missing. Expected PGHOST/PGDATABASE/PGUSER "
@@ -334,8 +1062,10 @@ def main() -> None:
     # any pipeline scripts. Useful for debugging and CI verification.
     if args.dry_run:
         logger.info("DRY RUN MODE - No stages will be executed.")
-        for s in scripts_to_run:
-            logger.info("Would run: %s", pretty_path(s))
+        deps = resolve_dependencies(stages_to_run)
+        for s in stages_to_run:
+            after = ", ".join(sorted(deps[s])) or "-"
+            logger.info("Would run: %s (after: %s)", stage_label(s), after)
         record = {
             "run_id": run_id,
             "completed_at_utc": datetime.now(timezone.utc).replace(microsecond=0).isoformat().replace("+00:00", "Z"),
@@ -344,8 +1074,10 @@ def main() -> None:
             "git_sha": sha,
             "log_file": pretty_path(log_path),
             "summary_file": None,
-            "steps_executed": [pretty_path(p) for p in scripts_to_run],
+            "steps_executed": [stage_label(s) for s in stages_to_run],
             "failed_step": None,
+            "stages": [],
+            "sample": {"fraction": args.sample, "seed": args.sample_seed} if sample else None,
             "upload_enabled": upload_enabled,
             "host": socket.gethostname(),
             "python_version": platform.python_version(),
@@ -355,26 +1087,31 @@ def main() -> None:
         logger.info("Pipeline run end (dry-run). Log: %s", pretty_path(log_path))
         return
 
-    steps_executed: list[Path] = []
-    failed_step: Path | None = None
-    status = "Success"
     overall_start = time.time()
 
-    # Execute stages sequentially and stop on first failure.
-    for s in scripts_to_run:
-        steps_executed.append(s)
-        ok, _ = run_stage(logger, s)
-        if not ok:
-            status = "Failed"
-            failed_step = s
-            break
+    # Execute the stage graph; wall time follows the critical path
+    # rather than the sum of all stage durations.
+    options = StageOptions(
+        timeout_s=args.stage_timeout or None,
+        profile_dir=PIPELINE_LOGS_DIR / "profiles" / run_id if args.profile else None,
+        heartbeat_path=PIPELINE_LOGS_DIR / "heartbeats" / f"{run_id}.jsonl",
+        trace_dir=TRACES_DIR / run_id,
+    )
+    stage_results, failed_stage = run_dag(
+        logger,
+        stages_to_run,
+        max_workers=max(1, args.workers),
+        options=options,
+    )
+    trace_path = merge_run_trace(logger, run_id, stage_results, options.trace_dir)
+    status = "Failed" if failed_stage else "Success"
 
     duration = time.time() - overall_start
     summary_path = write_run_summary(
         status=status,
         duration_s=duration,
-        steps=steps_executed,
-        failed_step=failed_step,
+        stage_results=stage_results,
+        failed_stage=failed_stage,
         log_path=log_path,
         sha=sha,
     )
@@ -387,13 +1124,17 @@ def main() -> None:
         "git_sha": sha,
         "log_file": pretty_path(log_path),
         "summary_file": pretty_path(summary_path),
-        "steps_executed": [pretty_path(p) for p in steps_executed],
-        "failed_step": pretty_path(failed_step) if failed_step else None,
+        "steps_executed": [r["command"] for r in stage_results],
+        "failed_step": stage_label(failed_stage) if failed_stage else None,
+        "stages": stage_results,
+        "trace_file": pretty_path(trace_path) if trace_path else None,
+        "sample": {"fraction": args.sample, "seed": args.sample_seed} if sample else None,
         "upload_enabled": upload_enabled,
         "host": socket.gethostname(),
         "python_version": platform.python_version(),
     }
     runs_path = append_run_record(record=record)
+    index_run_history(logger)
     logger.info("Run record appended to: %s", pretty_path(runs_path))
 
     logger.info("Run summary written to: %s", pretty_path(summary_path))
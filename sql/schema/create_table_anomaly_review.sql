@@ -14,6 +14,9 @@ CREATE TABLE IF NOT EXISTS audit.anomaly_candidates (
     anomaly_reasons TEXT[] NOT NULL -- store multiple anomaly reasons
 );
 
+-- Lineage lookups join candidates to loaded rows by record_pk
+CREATE INDEX IF NOT EXISTS ix_anomaly_candidates_record_pk ON audit.anomaly_candidates (record_pk);
+
 CREATE TABLE IF NOT EXISTS audit.anomaly_reviews (
     review_id BIGSERIAL PRIMARY KEY,
     candidate_id BIGINT NOT NULL REFERENCES audit.anomaly_candidates(candidate_id) ON DELETE CASCADE,
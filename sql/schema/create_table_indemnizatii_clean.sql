@@ -7,10 +7,26 @@ CREATE TABLE IF NOT EXISTS raw.indemnizatii_clean (
     intreprindere TEXT,
     cui VARCHAR(20),
     personal TEXT,
+    person_key VARCHAR(16),
     calitate_membru TEXT,
     suma TEXT,
     indemnizatie_variabila TEXT,
     suma_num INT,
     indemnizatie_variabila_num INT,
+    source_line INT,
+    raw_hash VARCHAR(16),
     created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-);
\ No newline at end of file
+);
+
+-- Lineage columns for tables created before they existed
+ALTER TABLE raw.indemnizatii_clean ADD COLUMN IF NOT EXISTS source_line INT;
+ALTER TABLE raw.indemnizatii_clean ADD COLUMN IF NOT EXISTS raw_hash VARCHAR(16);
+-- Person key written by the match_persons stage
+ALTER TABLE raw.indemnizatii_clean ADD COLUMN IF NOT EXISTS person_key VARCHAR(16);
+
+-- Point lookups from a raw line or raw record hash to the loaded row
+CREATE INDEX IF NOT EXISTS ix_indemnizatii_clean_source_line ON raw.indemnizatii_clean (source_line);
+CREATE INDEX IF NOT EXISTS ix_indemnizatii_clean_raw_hash ON raw.indemnizatii_clean (raw_hash);
+
+-- All records of one person across spelling variants
+CREATE INDEX IF NOT EXISTS ix_indemnizatii_clean_person_key ON raw.indemnizatii_clean (person_key);
\ No newline at end of file
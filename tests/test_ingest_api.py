@@ -0,0 +1,160 @@
+# ingest_api against a local stub of a paginated JSON API: page count from
+# X-Total-Count, windowed fetch when the size is unknown, retry on 503, and
+# a second poll of unchanged data answered by 304s with 0 bytes downloaded.
+
+import hashlib
+import json
+import re
+import sys
+import threading
+from collections import Counter
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+import pytest
+
+from scripts.ingest import ingest_api, retry
+
+
+class StubAPI:
+    def __init__(self, records: int, total_count: bool = True, fail_once: tuple[int, ...] = ()):
+        self.records = [{"id": i, "title": f"record {i}"} for i in range(1, records + 1)]
+        self.total_count = total_count
+        self.fail_once = set(fail_once)
+        self.requests = Counter()
+        self.statuses = Counter()
+        self.lock = threading.Lock()
+
+    def respond(self, handler: BaseHTTPRequestHandler) -> None:
+        query = parse_qs(urlparse(handler.path).query)
+        page = int(query["_page"][0])
+        limit = int(query["_limit"][0])
+        with self.lock:
+            self.requests[page] += 1
+            failing = page in self.fail_once
+            self.fail_once.discard(page)
+
+        if failing:
+            status, body, headers = 503, b"", {}
+        else:
+            body = json.dumps(self.records[(page - 1) * limit:page * limit]).encode("utf-8")
+            etag = '"' + hashlib.sha256(body).hexdigest()[:16] + '"'
+            headers = {"ETag": etag, "Content-Type": "application/json"}
+            if self.total_count:
+                headers["X-Total-Count"] = str(len(self.records))
+            if handler.headers.get("If-None-Match") == etag:
+                status, body = 304, b""
+            else:
+                status = 200
+        with self.lock:
+            self.statuses[status] += 1
+
+        handler.send_response(status)
+        for name, value in headers.items():
+            handler.send_header(name, value)
+        handler.send_header("Content-Length", str(len(body)))
+        handler.end_headers()
+        handler.wfile.write(body)
+
+
+@pytest.fixture
+def serve(monkeypatch):
+    servers = []
+    # retry() backs off for a second or more; the stub fails only once
+    monkeypatch.setattr(retry.time, "sleep", lambda _: None)
+
+    def start(api: StubAPI) -> None:
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def do_GET(self):
+                api.respond(self)
+
+            def log_message(self, *args):
+                pass
+
+        server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        servers.append(server)
+        monkeypatch.setattr(ingest_api, "URL", f"http://127.0.0.1:{server.server_port}/posts")
+
+    yield start
+    for server in servers:
+        server.shutdown()
+        server.server_close()
+
+
+def run_ingest(monkeypatch, capsys, tmp_path, page_size: int = 100, workers: int = 4) -> dict[str, int]:
+    monkeypatch.setattr(sys, "argv", [
+        "ingest_api",
+        "--out", str(tmp_path / "records.jsonl"),
+        "--cache-dir", str(tmp_path / "cache"),
+        "--page-size", str(page_size),
+        "--workers", str(workers),
+    ])
+    ingest_api.main()
+    out = capsys.readouterr().out
+    return {k: int(v) for k, v in re.findall(r"\[metrics\] (\w+)=(\d+)", out)}
+
+
+def read_ids(tmp_path) -> list[int]:
+    lines = (tmp_path / "records.jsonl").read_text(encoding="utf-8").splitlines()
+    return [json.loads(line)["id"] for line in lines]
+
+
+def test_total_count_path_and_unchanged_second_poll(serve, monkeypatch, capsys, tmp_path):
+    api = StubAPI(250)
+    serve(api)
+
+    first = run_ingest(monkeypatch, capsys, tmp_path)
+    assert first["rows_processed"] == 250
+    assert first["pages_fetched"] == 3
+    assert first["bytes_downloaded"] > 0
+    assert read_ids(tmp_path) == list(range(1, 251))
+    # X-Total-Count on page 1 bounds the fetch: no page past the last
+    assert sorted(api.requests) == [1, 2, 3]
+
+    out = tmp_path / "records.jsonl"
+    mtime = out.stat().st_mtime_ns
+    api.statuses.clear()
+
+    second = run_ingest(monkeypatch, capsys, tmp_path)
+    assert second["pages_fetched"] == 0
+    assert second["pages_not_modified"] == 3
+    assert second["bytes_downloaded"] == 0
+    assert second["rows_processed"] == 250
+    assert api.statuses == Counter({304: 3})
+    assert out.stat().st_mtime_ns == mtime
+
+
+def test_windowed_path_without_total_count(serve, monkeypatch, capsys, tmp_path):
+    api = StubAPI(250, total_count=False)
+    serve(api)
+
+    metrics = run_ingest(monkeypatch, capsys, tmp_path, workers=2)
+    assert metrics["rows_processed"] == 250
+    assert read_ids(tmp_path) == list(range(1, 251))
+    # windows of two pages: [2, 3] ends on the short page 3
+    assert sorted(api.requests) == [1, 2, 3]
+
+
+def test_windowed_path_drops_pages_past_the_last_full_one(serve, monkeypatch, capsys, tmp_path):
+    api = StubAPI(200, total_count=False)
+    serve(api)
+
+    metrics = run_ingest(monkeypatch, capsys, tmp_path, workers=4)
+    assert metrics["rows_processed"] == 200
+    assert read_ids(tmp_path) == list(range(1, 201))
+    # the window [2..5] overshoots past the empty page 3
+    assert sorted(api.requests) == [1, 2, 3, 4, 5]
+
+
+def test_503_is_retried(serve, monkeypatch, capsys, tmp_path):
+    api = StubAPI(250, fail_once=(2,))
+    serve(api)
+
+    metrics = run_ingest(monkeypatch, capsys, tmp_path)
+    assert metrics["rows_processed"] == 250
+    assert read_ids(tmp_path) == list(range(1, 251))
+    assert api.requests[2] == 2
+    assert api.statuses[503] == 1
@@ -0,0 +1,90 @@
+# MartsApi.run_query returns pooled connections on every error, and drops
+# only broken ones. Uses a stub pool, so no database is needed.
+
+import psycopg2
+import psycopg2.errors
+import pytest
+
+from scripts.api import marts_api
+
+
+class StubCursor:
+    def __init__(self, error: Exception | None):
+        self.error = error
+        self.description = [("n",)]
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def execute(self, sql, params):
+        if self.error is not None:
+            raise self.error
+
+    def fetchall(self):
+        return [(1,)]
+
+
+class StubConnection:
+    autocommit = True
+
+    def __init__(self, pool):
+        self.pool = pool
+
+    def cursor(self):
+        return StubCursor(self.pool.next_error)
+
+
+# Same exhaustion behaviour as psycopg2's pool: getconn raises once every
+# connection is out.
+class StubPool:
+    def __init__(self, minconn, maxconn, **_):
+        self.maxconn = maxconn
+        self.out = 0
+        self.closed = 0
+        self.next_error = None
+
+    def getconn(self):
+        if self.out >= self.maxconn:
+            raise psycopg2.pool.PoolError("connection pool exhausted")
+        self.out += 1
+        return StubConnection(self)
+
+    def putconn(self, conn, close=False):
+        self.out -= 1
+        self.closed += close
+
+
+@pytest.fixture
+def api(monkeypatch, tmp_path):
+    monkeypatch.setattr(marts_api, "ThreadedConnectionPool", StubPool)
+    monkeypatch.setattr(marts_api, "conn_params", lambda: {})
+    return marts_api.MartsApi(pool_size=2, runs_path=tmp_path / "pipeline_runs.jsonl")
+
+
+@pytest.mark.parametrize("error", [
+    psycopg2.errors.UndefinedTable("relation does not exist"),
+    psycopg2.ProgrammingError("syntax error"),
+    psycopg2.DataError("invalid input"),
+])
+def test_failing_queries_do_not_exhaust_the_pool(api, error):
+    api.pool.next_error = error
+    for _ in range(3):
+        with pytest.raises(type(error)):
+            api.run_query("select 1", {}, False)
+    assert api.pool.out == 0
+    assert api.pool.closed == 0
+
+    api.pool.next_error = None
+    assert b'"count": 1' in api.run_query("select 1", {}, False)
+
+
+@pytest.mark.parametrize("error", [psycopg2.OperationalError("server closed"), psycopg2.InterfaceError("closed")])
+def test_broken_connections_are_closed(api, error):
+    api.pool.next_error = error
+    with pytest.raises(type(error)):
+        api.run_query("select 1", {}, False)
+    assert api.pool.out == 0
+    assert api.pool.closed == 1
@@ -0,0 +1,114 @@
+# Incremental S3 upload against moto: unchanged data sends nothing, changed
+# parts are re-uploaded and superseded parts are deleted after the manifest.
+
+import json
+import sys
+
+import pandas as pd
+import pytest
+
+boto3 = pytest.importorskip("boto3")
+moto = pytest.importorskip("moto")
+
+from scripts.clean import upload_to_s3  # noqa: E402
+from scripts.clean.s3_layout import MANIFEST_KEY  # noqa: E402
+
+BUCKET = "test-artifacts"
+
+
+# Every upload_to_s3.main() client gets a hook that adds up request bodies,
+# i.e. the bytes that would go over the wire to S3.
+@pytest.fixture
+def s3(monkeypatch, tmp_path):
+    monkeypatch.setenv("AWS_ACCESS_KEY_ID", "testing")
+    monkeypatch.setenv("AWS_SECRET_ACCESS_KEY", "testing")
+    monkeypatch.setenv("AWS_DEFAULT_REGION", "us-east-1")
+    monkeypatch.setenv("S3_ARTIFACTS_BUCKET", BUCKET)
+    monkeypatch.delenv("S3_ENDPOINT_URL", raising=False)
+    monkeypatch.setattr(upload_to_s3, "FILE_PATH", tmp_path / "indemnizatii_clean.csv")
+
+    sent = {"bytes": 0, "requests": []}
+    real_client = boto3.client
+
+    def counting_client(*args, **kwargs):
+        client = real_client(*args, **kwargs)
+
+        def count(request, operation_name, **_):
+            # streamed (aws-chunked) bodies declare their payload size
+            size = request.headers.get("X-Amz-Decoded-Content-Length")
+            if size is None:
+                body = request.body or b""
+                size = len(body) if isinstance(body, (bytes, str)) else request.headers.get("Content-Length", 0)
+            sent["bytes"] += int(size)
+            sent["requests"].append(operation_name)
+
+        client.meta.events.register("request-created.s3", count)
+        return client
+
+    with moto.mock_aws():
+        conn = real_client("s3", region_name="us-east-1")
+        conn.create_bucket(Bucket=BUCKET)
+        monkeypatch.setattr(boto3, "client", counting_client)
+        yield conn, sent
+
+
+def run_upload(monkeypatch, sent, df: pd.DataFrame, *extra: str) -> tuple[int, list[str]]:
+    df.to_csv(upload_to_s3.FILE_PATH, index=False)
+    sent["bytes"] = 0
+    sent["requests"] = []
+    monkeypatch.setattr(sys, "argv", ["upload_to_s3", "--rows-per-part", "4", *extra])
+    upload_to_s3.main()
+    return sent["bytes"], list(sent["requests"])
+
+
+def part_keys(conn) -> list[str]:
+    listed = conn.list_objects_v2(Bucket=BUCKET).get("Contents", [])
+    return sorted(o["Key"] for o in listed if o["Key"] != MANIFEST_KEY)
+
+
+def frame(rows: int) -> pd.DataFrame:
+    return pd.DataFrame({"nume": [f"persoana {i}" for i in range(rows)], "suma": [str(1000 + i) for i in range(rows)]})
+
+
+def test_second_upload_of_unchanged_data_sends_nothing(s3, monkeypatch):
+    conn, sent = s3
+    df = frame(10)
+
+    first_bytes, _ = run_upload(monkeypatch, sent, df)
+    assert first_bytes > 0
+    assert len(part_keys(conn)) == 3
+
+    second_bytes, requests = run_upload(monkeypatch, sent, df)
+    assert second_bytes == 0
+    assert requests == ["GetObject"]  # only the manifest read
+
+
+def test_changed_part_is_reuploaded_and_superseded_part_deleted(s3, monkeypatch):
+    conn, sent = s3
+    df = frame(10)
+    run_upload(monkeypatch, sent, df)
+    before = part_keys(conn)
+
+    df.loc[9, "suma"] = "9999"
+    changed_bytes, requests = run_upload(monkeypatch, sent, df)
+    after = part_keys(conn)
+
+    assert changed_bytes > 0
+    # parts 0 and 1 are unchanged and keep their keys; only part 2 is new
+    assert after[:2] == before[:2]
+    assert after[2] != before[2]
+    # upload, then manifest, then delete of the old part 2
+    assert requests == ["GetObject", "PutObject", "PutObject", "DeleteObjects"]
+
+    manifest = json.loads(conn.get_object(Bucket=BUCKET, Key=MANIFEST_KEY)["Body"].read())
+    listed = [f["key"] for f in manifest["partitions"]["2025"]["files"]]
+    assert listed == after
+
+
+def test_force_reuploads_unchanged_data(s3, monkeypatch):
+    _, sent = s3
+    df = frame(10)
+    run_upload(monkeypatch, sent, df)
+
+    forced_bytes, _ = run_upload(monkeypatch, sent, df, "--force")
+    assert forced_bytes > 0
@@ -0,0 +1,265 @@
+# Scaling benchmark for the pipeline stages on synthetic AMEPIP-shaped data.
+# For each row count, generates (or reuses) a synthetic raw CSV, runs the
+# stages against it in isolated subprocesses and records wall time,
+# throughput and peak memory. Results can be saved as a JSON baseline and
+# later runs compared against it; a regression beyond the tolerance exits 1.
+#
+# Usage:
+#   python tools/benchmark_stages.py --sizes 1000 100000 --write-baseline benchmarks/baseline.json
+#   python tools/benchmark_stages.py --sizes 1000 100000 --baseline benchmarks/baseline.json
+#   python tools/benchmark_stages.py --sizes 100000 --compression zst
+#
+# The load stage only runs with --with-db. It loads into raw_bench (stages run
+# with PIPELINE_SCHEMA_SUFFIX=_bench), so the real raw schema is left alone.
+#
+# Generated data is cached under .bench/ per size, seed and generator version
+# (a hash of tools/generate_synthetic_data.py), so changing either one
+# generates fresh data instead of reusing a stale file.
+
+import argparse
+import hashlib
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+
+REPO_ROOT = Path(__file__).resolve().parents[1]
+BENCH_DIR = REPO_ROOT / ".bench"
+RESULTS_DIR = REPO_ROOT / "logs" / "benchmarks"
+
+sys.path.insert(0, str(REPO_ROOT / "tools"))
+from generate_synthetic_data import generate  # noqa: E402
+
+sys.path.insert(0, str(REPO_ROOT))
+from scripts.common.artifacts import COMPRESSION_SUFFIXES, artifact_path  # noqa: E402
+
+DEFAULT_SIZES = [1_000, 100_000, 1_000_000, 10_000_000]
+
+# Stages write to <schema>_bench (raw_bench, analytics_bench, ...)
+SCHEMA_SUFFIX = "_bench"
+
+GENERATOR_PATH = REPO_ROOT / "tools" / "generate_synthetic_data.py"
+
+# Scores the cleaned artifact with the anomaly rules, without a database.
+ANOMALY_SNIPPET = """
+import sys
+import pandas as pd
+from scripts.ai.anomaly_review import compute_anomaly_score
+from scripts.common.artifacts import open_artifact, resolve_artifact
+from scripts.common.schema import compact, read_clean_csv
+
+with open_artifact(resolve_artifact(sys.argv[1])) as f:
+    df = read_clean_csv(f)
+suma = df["suma_num"].fillna(0)
+variabila = df["indemnizatie_variabila_num"].fillna(0)
+frame = compact(pd.DataFrame({
+    "record_pk": df.index.astype(str),
+    "year": 2025,
+    "company_id": df["cui"],
+    "person_id": df["personal"],
+    "total_ron": suma.astype("Int64") + variabila,
+    "suma_clean": suma,
+    "variabila_clean": variabila,
+}))
+scored = compute_anomaly_score(frame)
+print(f"[metrics] rows_processed={len(scored)}")
+"""
+
+
+# Artifact each stage writes, for reporting on-disk size per compression setting
+STAGE_OUTPUTS = {
+    "clean": "indemnizatii_clean.csv",
+    "validate": "indemnizatii_clean_validated.csv",
+}
+
+
+def stage_commands(data_dir: Path) -> dict[str, list[str]]:
+    return {
+        "clean": [sys.executable, "-m", "scripts.clean.data_clean"],
+        "match_persons": [sys.executable, "-m", "scripts.clean.match_persons"],
+        "validate": [sys.executable, "-m", "scripts.clean.validate_and_export"],
+        "load": [sys.executable, "-m", "scripts.clean.load_indemnizatii_clean_to_pg"],
+        "anomaly_score": [sys.executable, "-c", ANOMALY_SNIPPET, str(data_dir / "indemnizatii_clean.csv")],
+    }
+
+
+# Run one stage and return wall time and peak RSS of that child process.
+# stderr goes to a temp file rather than a pipe: the parent only reads it
+# after the child exits, and a chatty stage would block on a full pipe.
+def measure(cmd: list[str], env: dict, timeout_s: float) -> dict:
+    with tempfile.TemporaryFile(mode="w+", encoding="utf-8", errors="replace") as stderr_file:
+        start = time.perf_counter()
+        proc = subprocess.Popen(
+            cmd,
+            cwd=str(REPO_ROOT),
+            env=env,
+            stdout=subprocess.DEVNULL,
+            stderr=stderr_file,
+        )
+
+        deadline = start + timeout_s
+        usage = None
+        while True:
+            if hasattr(os, "wait4"):
+                pid, status, usage = os.wait4(proc.pid, os.WNOHANG)
+                if pid:
+                    proc.returncode = os.waitstatus_to_exitcode(status)
+                    break
+            elif proc.poll() is not None:
+                break
+            if time.perf_counter() > deadline:
+                proc.kill()
+                proc.wait()
+                return {"status": "timeout", "seconds": round(timeout_s, 3)}
+            time.sleep(0.05)
+
+        seconds = time.perf_counter() - start
+        if proc.returncode != 0:
+            stderr_file.seek(0)
+            return {"status": "failed", "seconds": round(seconds, 3), "stderr_tail": stderr_file.read()[-2000:]}
+
+    result = {"status": "ok", "seconds": round(seconds, 3)}
+    if usage is not None:
+        # ru_maxrss is kilobytes on Linux, bytes on macOS
+        divisor = 1024 * 1024 if sys.platform == "darwin" else 1024
+        result["peak_rss_mb"] = round(usage.ru_maxrss / divisor, 1)
+    return result
+
+
+def generator_version() -> str:
+    return hashlib.sha256(GENERATOR_PATH.read_bytes()).hexdigest()[:12]
+
+
+# Cached synthetic input for one size/seed/generator version. Written under a
+# temporary name first, so an interrupted run never leaves a partial file
+# that a later run would reuse.
+def bench_data_dir(size: int, seed: int) -> Path:
+    data_dir = BENCH_DIR / f"rows_{size}_seed_{seed}_gen_{generator_version()}"
+    raw_path = data_dir / "indemnizatii.csv"
+    if not raw_path.exists():
+        print(f"Generating {size} rows -> {raw_path}")
+        tmp_path = data_dir / ".tmp-indemnizatii.csv"
+        generate(size, tmp_path, seed)
+        tmp_path.replace(raw_path)
+    return data_dir
+
+
+def run_benchmarks(sizes: list[int], stages: list[str], seed: int, timeout_s: float, compression: str) -> dict:
+    results: dict = {}
+
+    for size in sizes:
+        data_dir = bench_data_dir(size, seed)
+
+        env = {
+            **os.environ,
+            "PIPELINE_DATA_DIR": str(data_dir),
+            "PIPELINE_COMPRESSION": compression,
+            "PIPELINE_SCHEMA_SUFFIX": SCHEMA_SUFFIX,
+        }
+        commands = stage_commands(data_dir)
+
+        for stage in stages:
+            print(f"[{stage}] rows={size} ...", end=" ", flush=True)
+            res = measure(commands[stage], env, timeout_s)
+            if res["status"] == "ok" and res["seconds"] > 0:
+                res["rows_per_second"] = round(size / res["seconds"], 1)
+            if res["status"] == "ok" and stage in STAGE_OUTPUTS:
+                output = artifact_path(data_dir / STAGE_OUTPUTS[stage], compression)
+                res["output_bytes"] = output.stat().st_size
+            print(res["status"], f"{res['seconds']:.2f}s", f"{res.get('peak_rss_mb', 'n/a')}MB")
+            results.setdefault(stage, {})[str(size)] = res
+
+            # Later stages depend on this stage's output
+            if res["status"] != "ok":
+                print(f"Stopping size {size}: stage {stage} {res['status']}")
+                break
+
+    return results
+
+
+# Compare throughput and peak memory against a baseline.
+# Returns a list of human-readable regressions (empty when within tolerance).
+def compare(current: dict, baseline: dict, tolerance: float) -> list[str]:
+    regressions = []
+    for stage, by_size in baseline.get("results", {}).items():
+        for size, base in by_size.items():
+            cur = current.get("results", {}).get(stage, {}).get(size)
+            if cur is None or base.get("status") != "ok":
+                continue
+            if cur.get("status") != "ok":
+                regressions.append(f"{stage}@{size}: {cur.get('status')} (baseline ok)")
+                continue
+
+            base_tp, cur_tp = base.get("rows_per_second"), cur.get("rows_per_second")
+            if base_tp and cur_tp and cur_tp < base_tp * (1 - tolerance):
+                regressions.append(
+                    f"{stage}@{size}: throughput {cur_tp:.0f} rows/s < baseline {base_tp:.0f} rows/s"
+                )
+
+            base_rss, cur_rss = base.get("peak_rss_mb"), cur.get("peak_rss_mb")
+            if base_rss and cur_rss and cur_rss > base_rss * (1 + tolerance):
+                regressions.append(
+                    f"{stage}@{size}: peak memory {cur_rss:.1f}MB > baseline {base_rss:.1f}MB"
+                )
+    return regressions
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Benchmark pipeline stages at increasing row counts")
+    parser.add_argument("--sizes", type=int, nargs="+", default=DEFAULT_SIZES)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--with-db", action="store_true", help=f"also benchmark the load stage (into raw{SCHEMA_SUFFIX})")
+    parser.add_argument("--timeout", type=float, default=3600.0, help="per-stage timeout in seconds")
+    parser.add_argument("--out", type=Path, default=None, help="where to write this run's results")
+    parser.add_argument("--write-baseline", type=Path, default=None, help="also save results as the baseline")
+    parser.add_argument("--baseline", type=Path, default=None, help="compare against this baseline")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="allowed relative regression (default 0.25)")
+    parser.add_argument(
+        "--compression",
+        choices=sorted(COMPRESSION_SUFFIXES),
+        default=os.getenv("PIPELINE_COMPRESSION") or "none",
+        help="artifact compression passed to the stages (default: PIPELINE_COMPRESSION or none)",
+    )
+    args = parser.parse_args()
+
+    stages = ["clean", "match_persons", "validate"] + (["load"] if args.with_db else []) + ["anomaly_score"]
+
+    current = {
+        "generated_at_utc": datetime.now(timezone.utc).replace(microsecond=0).isoformat().replace("+00:00", "Z"),
+        "python_version": platform.python_version(),
+        "machine": platform.machine(),
+        "cpu_count": os.cpu_count(),
+        "compression": args.compression,
+        "seed": args.seed,
+        "generator_version": generator_version(),
+        "results": run_benchmarks(args.sizes, stages, args.seed, args.timeout, args.compression),
+    }
+
+    out = args.out or RESULTS_DIR / f"benchmark_{datetime.now(timezone.utc):%Y%m%d_%H%M%S}.json"
+    out.parent.mkdir(parents=True, exist_ok=True)
+    out.write_text(json.dumps(current, indent=2), encoding="utf-8")
+    print(f"Results written to {out}")
+
+    if args.write_baseline:
+        args.write_baseline.parent.mkdir(parents=True, exist_ok=True)
+        args.write_baseline.write_text(json.dumps(current, indent=2), encoding="utf-8")
+        print(f"Baseline written to {args.write_baseline}")
+
+    if args.baseline:
+        baseline = json.loads(args.baseline.read_text(encoding="utf-8"))
+        regressions = compare(current, baseline, args.tolerance)
+        if regressions:
+            print("Performance regressions:")
+            for r in regressions:
+                print(f"  - {r}")
+            sys.exit(1)
+        print("No regressions against baseline.")
+
+
+if __name__ == "__main__":
+    main()
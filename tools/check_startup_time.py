@@ -0,0 +1,139 @@
+# Startup-cost guard for the pipeline CLI.
+# Runs the cheap orchestrator commands under `python -X importtime`, sums
+# the cumulative time of the CLI's own top-level imports and fails when it exceeds
+# the budget or when a heavy third-party module is imported at all.
+# A command that exits non-zero fails the check too.
+#
+# The commands run with PIPELINE_LOG_DIR pointing at a temporary run log
+# holding one successful run, so status and history go through their normal
+# path (and exit 0) while the dry runs' records never reach logs/pipeline/.
+#
+# Run it from a virtualenv: the pipeline CLI refuses to run outside one. A
+# bare venv is enough, since these commands import only the standard library.
+#
+# Usage:
+#   python tools/check_startup_time.py                  # default budget
+#   python tools/check_startup_time.py --budget-ms 80 --runs 5
+
+import argparse
+import os
+import json
+import re
+import subprocess
+import sys
+import tempfile
+from pathlib import Path
+
+REPO_ROOT = Path(__file__).resolve().parents[1]
+CLI = REPO_ROOT / "scripts" / "run_pipeline.py"
+
+# Run record the scratch log starts with (status exits 3 on an empty log)
+SEED_RUN = {
+    "run_id": "20000101_000000",
+    "completed_at_utc": "2000-01-01T00:00:00Z",
+    "status": "success",
+    "duration_seconds": 0.0,
+    "git_sha": None,
+    "log_file": None,
+    "summary_file": None,
+    "steps_executed": [],
+    "failed_step": None,
+    "stages": [],
+    "sample": None,
+}
+
+# Commands the scheduler polls; none of them should touch the heavy stack.
+COMMANDS = {
+    "status": ["status"],
+    "dry-run": ["--dry-run", "--stage", "clean"],
+    "history": ["history"],
+}
+
+# Modules that must stay out of the fast paths
+FORBIDDEN = ("psycopg2", "boto3", "botocore", "pandas", "numpy", "dotenv", "cProfile", "pstats")
+
+# "import time: self [us] | cumulative | imported package"
+IMPORTTIME_LINE = re.compile(r"^import time:\s+(\d+)\s+\|\s+(\d+)\s+\|(\s*)(\S+)")
+
+
+# Temporary log directory holding SEED_RUN
+def scratch_log_dir(root: Path) -> Path:
+    pipeline_dir = root / "pipeline"
+    pipeline_dir.mkdir(parents=True)
+    (pipeline_dir / "pipeline_runs.jsonl").write_text(json.dumps(SEED_RUN) + "\n", encoding="utf-8")
+    return root
+
+
+# Run one command under -X importtime; return (cumulative ms of top-level
+# imports, module names). Raises RuntimeError when the command fails.
+def measure(args: list[str], log_dir: Path) -> tuple[float, set[str]]:
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", str(CLI), *args],
+        cwd=str(REPO_ROOT),
+        env={**os.environ, "PYTHONDONTWRITEBYTECODE": "", "PIPELINE_LOG_DIR": str(log_dir)},
+        capture_output=True,
+        text=True,
+    )
+    if proc.returncode != 0:
+        # -X importtime floods stderr; keep the CLI's own output (the
+        # pipeline logger writes to stdout)
+        output = proc.stdout.splitlines() + [
+            line for line in proc.stderr.splitlines() if not line.startswith("import time:")
+        ]
+        output = [line.strip() for line in output if line.strip()]
+        raise RuntimeError(f"exit code {proc.returncode}: {output[-1] if output else 'no output'}")
+    total_us = 0
+    modules: set[str] = set()
+    after_site = False
+    for line in proc.stderr.splitlines():
+        m = IMPORTTIME_LINE.match(line)
+        if not m:
+            continue
+        cumulative, indent, name = int(m.group(2)), m.group(3), m.group(4)
+        modules.add(name)
+        top_level = len(indent) <= 1
+        # Interpreter startup (encodings, site and its .pth hooks) ends with
+        # the top-level `site` entry; only the CLI's own imports count.
+        if top_level and name == "site":
+            after_site = True
+            continue
+        # Nested imports are indented; their time is already in the parent
+        if after_site and top_level:
+            total_us += cumulative
+    return total_us / 1000, modules
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Check pipeline CLI import time against a budget")
+    parser.add_argument("--budget-ms", type=float, default=float(os.getenv("STARTUP_BUDGET_MS", "60")))
+    parser.add_argument("--runs", type=int, default=3, help="take the best of N runs (default 3)")
+    args = parser.parse_args()
+
+    failures = []
+    with tempfile.TemporaryDirectory(prefix="startup-check-") as tmp:
+        log_dir = scratch_log_dir(Path(tmp))
+        for label, cli_args in COMMANDS.items():
+            try:
+                runs = [measure(cli_args, log_dir) for _ in range(max(1, args.runs))]
+            except RuntimeError as e:
+                print(f"{label:<8} failed: {e}")
+                failures.append(f"{label}: command failed ({e})")
+                continue
+            best_ms, modules = min(runs, key=lambda r: r[0])
+            heavy = sorted(m for m in modules if m.split(".")[0] in FORBIDDEN)
+            print(f"{label:<8} imports={best_ms:.1f}ms modules={len(modules)} budget={args.budget_ms:.0f}ms")
+            if best_ms > args.budget_ms:
+                failures.append(f"{label}: import time {best_ms:.1f}ms exceeds budget {args.budget_ms:.0f}ms")
+            if heavy:
+                failures.append(f"{label}: heavy modules imported: {', '.join(heavy)}")
+
+    if failures:
+        print("Startup regressions:")
+        for f in failures:
+            print(f"  - {f}")
+        sys.exit(1)
+    print("Startup within budget.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,51 @@
+# Download selected reporting periods of the cleaned dataset from S3.
+# Uses the partition manifest to locate files, so no LIST calls are made
+# and only the requested periods are transferred.
+#
+# Usage:
+#   python -m tools.fetch_s3_partitions --period 2025 --out data/s3
+#   python -m tools.fetch_s3_partitions --list
+#   python -m tools.fetch_s3_partitions --dataset indemnizatii_unmatched --list
+
+import argparse
+import os
+from pathlib import Path
+
+import boto3
+from dotenv import load_dotenv
+
+from scripts.clean.s3_layout import DATASET_PREFIX, load_manifest, select_partitions
+
+
+def main() -> None:
+    load_dotenv()
+
+    parser = argparse.ArgumentParser(description="Fetch period partitions listed in the S3 manifest")
+    parser.add_argument("--period", action="append", help="period to fetch (repeatable); default: all")
+    parser.add_argument("--out", type=Path, default=Path("data") / "s3")
+    parser.add_argument("--list", action="store_true", help="only print the manifest partitions")
+    parser.add_argument("--dataset", default=DATASET_PREFIX, help=f"dataset prefix (default: {DATASET_PREFIX})")
+    args = parser.parse_args()
+
+    bucket = os.environ["S3_ARTIFACTS_BUCKET"]
+    s3 = boto3.client("s3", endpoint_url=os.getenv("S3_ENDPOINT_URL") or None)
+    manifest = load_manifest(s3, bucket, args.dataset)
+
+    partitions = select_partitions(manifest, args.period)
+    if args.period and len(partitions) < len(args.period):
+        known = sorted(manifest.get("partitions", {}))
+        print(f"Some requested periods are not in the manifest. Known periods: {known}")
+
+    for part in partitions:
+        print(f"period={part['period']} rows={part['rows']} files={len(part['files'])} sha256={part['sha256'][:12]}")
+        if args.list:
+            continue
+        for f in part["files"]:
+            target = args.out / f["key"]
+            target.parent.mkdir(parents=True, exist_ok=True)
+            s3.download_file(bucket, f["key"], str(target))
+            print(f"  downloaded {f['key']} -> {target}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,165 @@
+# Generate synthetic AMEPIP-shaped CSVs for scaling tests and benchmarks.
+# Output mirrors data/indemnizatii.csv: same header (including the embedded
+# line breaks from the PDF export), repeated enterprise blocks sharing nr_crt
+# and CUI, and the messy salary formats the cleaning stage has to handle.
+#
+# Usage:
+#   python tools/generate_synthetic_data.py --rows 100000 --out .bench/100k/indemnizatii.csv
+
+import argparse
+import csv
+import random
+from pathlib import Path
+
+# Header exactly as exported from the PDF (line breaks inside quoted cells).
+RAW_HEADER = [
+    "Nr.Crt",
+    "AUTORITATE PUBLICĂ TUTELARĂ (APT)",
+    "NUME ÎNTREPRINDERE PUBLICĂ",
+    "CUI",
+    "NUME PERSONAL\nCONDUCERE",
+    "CALITATE (membru CA/CS\ndirector/membru\ndirectorat)",
+    "VALOARE INDEMNIZAȚIE FIXĂ\nLUNARĂ CONFORM CONTRACT\n(Brut-Lei)*",
+    "VALOARE INDEMNIZAȚIE VARIABILA\nANUALĂ CONFORM CONTRACT\n(Brut-Lei)*",
+]
+
+AUTHORITIES = [
+    "AGENTIA DOMENIILOR STATULUI",
+    "AGENTIA NATIONALA PENTRU PESCUIT SI\nACVACULTURA",
+    "AUTORITATEA PENTRU ADMINISTRAREA ACTIVELOR\nSTATULUI",
+    "Administratia Nationala Apele Romane",
+    "MINISTERUL AGRICULTURII SI DEZVOLTARII RURALE",
+    "MINISTERUL APARARII NATIONALE",
+    "MINISTERUL CULTURII",
+    "MINISTERUL DEZVOLTARII, LUCRARILOR PUBLICE SI\nADMINISTRATIEI",
+    "MINISTERUL ECONOMIEI, DIGITALIZARII,\nANTREPRENORIATULUI SI TURISMULUI",
+    "MINISTERUL ENERGIEI",
+    "MINISTERUL FINANTELOR",
+    "MINISTERUL MEDIULUI, APELOR SI PADURILOR",
+    "MINISTERUL MUNCII, FAMILIEI, TINERETULUI ȘI\nSOLIDARITĂȚII SOCIALE",
+    "MINISTERUL SANATATII",
+    "MINISTERUL TRANSPORTURILOR SI INFRASTRUCTURII",
+    "SECRETARIATUL GENERAL AL GUVERNULUI",
+]
+
+COMPANY_PREFIXES = ["PISCICOLA", "COMPANIA NATIONALA", "SOCIETATEA", "REGIA AUTONOMA", "ADMINISTRATIA", "CENTRUL", "INSTITUTUL"]
+COMPANY_NAMES = ["CALARASI", "TRANSPORTURI", "ENERGIE", "APE", "DRUMURI", "SILVICA", "PORTUARA", "FEROVIARA", "MINIERA", "AGRICOLA", "TURISM", "IMOBILIARE"]
+
+FIRST_NAMES = ["Ștefan", "Cătălin", "Oana", "Răzvan", "Ioana", "Mihai", "Gabriela", "Andrei", "Laurențiu", "Cosmin", "Silvia", "Bogdan", "Petronel", "Roxana", "Marian", "Codruț"]
+LAST_NAMES = ["Popescu", "Chiriac", "Avramescu", "Dragomir", "Chițescu", "Stănescu", "Ghiță", "Trâmbițaș", "Diaconu", "Constantin", "Badea", "Radoi", "Fetita", "Jude"]
+
+ROLES = ["Membru CA/CS", "Membru CA/CS", "Membru CA/CS", "Director/directorat", "Director/directorat", "Insolventa/Diverse", "Vacant", "ADMINISTRATOR SPECIAL"]
+
+PLACEHOLDERS = ["-", "", "Nu a fost stabilită", "Nu e cazul", "N/A", "insolventa", "neraportat"]
+
+
+def thousands(n: int) -> str:
+    return f"{n:,}"
+
+
+# Monthly base salary in one of the formats observed in the AMEPIP export.
+def base_salary(rng: random.Random) -> str:
+    n = rng.randint(800, 80_000)
+    kind = rng.random()
+    if kind < 0.55:
+        return thousands(n)                                    # "4,455"
+    if kind < 0.70:
+        s = thousands(n)
+        return f"{s[0]} {s[1:]}" if len(s) > 1 else s          # "3 1,530" (PDF split digit)
+    if kind < 0.76:
+        return f"{n // 1000}\xa0{n % 1000:03d}"                # NBSP thousands separator
+    if kind < 0.80:
+        return f"{n}+{rng.randint(500, 20_000)}"               # "5000+2000"
+    if kind < 0.84:
+        return f"{n}/{n * 2}"                                  # "2000/4000"
+    if kind < 0.88:
+        return f"{n} - {n * 2}"                                # "base - variable"
+    if kind < 0.90:
+        return f"{n} + {thousands(rng.randint(500, 5000))} (spor doctorat)"
+    return rng.choice(PLACEHOLDERS)
+
+
+def variable_salary(rng: random.Random) -> str:
+    kind = rng.random()
+    if kind < 0.65:
+        return "-"
+    if kind < 0.80:
+        return ""
+    if kind < 0.95:
+        n = thousands(rng.randint(10_000, 400_000))
+        return f"{n[0]} {n[1:]}"
+    return rng.choice(PLACEHOLDERS)
+
+
+def person_name(rng: random.Random) -> str:
+    parts = [rng.choice(LAST_NAMES), rng.choice(FIRST_NAMES)]
+    if rng.random() < 0.3:
+        parts.append(rng.choice(FIRST_NAMES))
+    name = " ".join(parts)
+
+    kind = rng.random()
+    if kind < 0.08:
+        # PDF line wrap inside the cell
+        head, _, tail = name.rpartition(" ")
+        return f"{head}\n{tail}" if head else name
+    if kind < 0.10:
+        # words glued together by the extractor
+        return name.replace(" ", "", 1)
+    if kind < 0.12:
+        return name.upper() + " "
+    return name
+
+
+# Stream rows to disk: enterprises are emitted as blocks of board members
+# so nr_crt / CUI repeat the way they do in the real publication.
+def generate(rows: int, out_path: Path, seed: int) -> int:
+    rng = random.Random(seed)
+    out_path.parent.mkdir(parents=True, exist_ok=True)
+
+    written = 0
+    nr_crt = 0
+    with out_path.open("w", encoding="utf-8", newline="") as f:
+        writer = csv.writer(f, lineterminator="\r\n")
+        writer.writerow(RAW_HEADER)
+
+        while written < rows:
+            nr_crt += 1
+            authority = rng.choice(AUTHORITIES)
+            company = f"{rng.choice(COMPANY_PREFIXES)} {rng.choice(COMPANY_NAMES)} {nr_crt}"
+            cui = str(1_000_000 + nr_crt * 7919 % 40_000_000)
+            block = min(rng.randint(3, 9), rows - written)
+
+            for _ in range(block):
+                role = rng.choice(ROLES)
+                if rng.random() < 0.01:
+                    # PDF artifact: letters spaced out
+                    role = "  ".join(role)
+                writer.writerow([
+                    # ~5% of rows lose nr_crt in the export
+                    "" if rng.random() < 0.05 else str(nr_crt),
+                    authority,
+                    company,
+                    cui,
+                    person_name(rng),
+                    role,
+                    base_salary(rng),
+                    variable_salary(rng),
+                ])
+                written += 1
+
+    return written
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Generate a synthetic AMEPIP-shaped CSV")
+    parser.add_argument("--rows", type=int, required=True, help="Number of data rows to write")
+    parser.add_argument("--out", type=Path, required=True, help="Output CSV path")
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    written = generate(args.rows, args.out, args.seed)
+    print(f"Wrote {written} rows to {args.out}")
+
+
+if __name__ == "__main__":
+    main()
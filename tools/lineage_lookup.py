@@ -0,0 +1,211 @@
+# Trace one record through the pipeline using the lineage columns
+# (source_line, raw_hash) written by the clean step:
+#
+#   raw line  ->  cleaned artifact row  ->  raw.indemnizatii_clean.id (pk)
+#             ->  audit.anomaly_candidates (record_pk)
+#
+# Database lookups are indexed point queries (see the DDL in sql/schema);
+# the artifact lookups stream the CSVs and stop at the matching record.
+#
+# Usage:
+#   python tools/lineage_lookup.py --line 162
+#   python tools/lineage_lookup.py --raw-hash 46fc63f36d78bffb
+#   python tools/lineage_lookup.py --pk 42
+#   python tools/lineage_lookup.py --candidate-id 7
+#   python tools/lineage_lookup.py --line 162 --no-db
+
+import argparse
+import csv
+import os
+import sys
+from pathlib import Path
+
+REPO_ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(REPO_ROOT))
+from scripts.clean.data_clean import raw_hash  # noqa: E402
+from scripts.common.artifacts import open_artifact, resolve_artifact  # noqa: E402
+
+DATA_DIR = Path(os.getenv("PIPELINE_DATA_DIR") or REPO_ROOT / "data")
+
+LOOKUP_SQL = """
+SELECT
+    c.id AS pk,
+    c.source_line,
+    c.raw_hash,
+    c.nr_crt,
+    c.cui,
+    c.intreprindere,
+    c.personal,
+    c.calitate_membru,
+    c.suma_num,
+    c.indemnizatie_variabila_num,
+    c.created_at
+FROM raw.indemnizatii_clean c
+WHERE {where}
+ORDER BY c.id
+"""
+
+CANDIDATES_SQL = """
+SELECT candidate_id, run_id, created_at, source_table, anomaly_score, anomaly_reasons
+FROM audit.anomaly_candidates
+WHERE record_pk = %s
+ORDER BY created_at
+"""
+
+
+def get_connection():
+    import psycopg2
+
+    return psycopg2.connect(
+        host=os.getenv("PGHOST") or os.getenv("DB_HOST") or "localhost",
+        port=os.getenv("PGPORT") or os.getenv("DB_PORT") or "5432",
+        dbname=os.getenv("PGDATABASE") or os.getenv("DB_NAME"),
+        user=os.getenv("PGUSER") or os.getenv("DB_USER"),
+        password=os.getenv("PGPASSWORD") or os.getenv("DB_PASSWORD"),
+    )
+
+
+def fetch_dicts(cur, sql: str, params: tuple) -> list[dict]:
+    cur.execute(sql, params)
+    names = [d[0] for d in cur.description]
+    return [dict(zip(names, row)) for row in cur.fetchall()]
+
+
+# Loaded rows matching the lookup, each with its anomaly candidates attached
+def lookup_db(conn, args) -> list[dict]:
+    with conn.cursor() as cur:
+        if args.candidate_id is not None:
+            cur.execute("SELECT record_pk FROM audit.anomaly_candidates WHERE candidate_id = %s", (args.candidate_id,))
+            found = cur.fetchone()
+            if not found:
+                return []
+            where, params = "c.id = %s", (int(found[0]),)
+        elif args.pk is not None:
+            where, params = "c.id = %s", (args.pk,)
+        elif args.raw_hash is not None:
+            where, params = "c.raw_hash = %s", (args.raw_hash,)
+        else:
+            where, params = "c.source_line = %s", (args.line,)
+
+        rows = fetch_dicts(cur, LOOKUP_SQL.format(where=where), params)
+
+        cur.execute("SELECT to_regclass('audit.anomaly_candidates') IS NOT NULL")
+        has_audit = cur.fetchone()[0]
+        for row in rows:
+            row["anomaly_candidates"] = fetch_dicts(cur, CANDIDATES_SQL, (str(row["pk"]),)) if has_audit else []
+    return rows
+
+
+# Raw records are addressed by the line they start on, as recorded by the
+# clean step; returns (start_line, fields) for each match.
+def find_raw_records(path: Path, line: int | None = None, hash_: str | None = None) -> list[tuple[int, list[str]]]:
+    matches = []
+    with open_artifact(path) as f:
+        reader = csv.reader(f)
+        next(reader, None)
+        next_line = reader.line_num + 1
+        for fields in reader:
+            start_line, next_line = next_line, reader.line_num + 1
+            if line is not None:
+                if start_line == line:
+                    return [(start_line, fields)]
+                if start_line > line:
+                    break
+            elif fields and raw_hash(fields) == hash_:
+                matches.append((start_line, fields))
+    return matches
+
+
+def find_clean_rows(path: Path, lines: set[int]) -> list[dict]:
+    found = []
+    with open_artifact(path) as f:
+        for row in csv.DictReader(f):
+            if row.get("source_line") and int(row["source_line"]) in lines:
+                found.append(row)
+    return found
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Trace a record from raw line to loaded row and anomaly candidates")
+    target = parser.add_mutually_exclusive_group(required=True)
+    target.add_argument("--line", type=int, help="raw CSV line the record starts on (source_line)")
+    target.add_argument("--raw-hash", help="raw record hash (raw_hash)")
+    target.add_argument("--pk", type=int, help="raw.indemnizatii_clean.id")
+    target.add_argument("--candidate-id", type=int, help="audit.anomaly_candidates.candidate_id")
+    parser.add_argument("--raw", type=Path, default=None, help="raw CSV (default: the raw CSV in PIPELINE_DATA_DIR)")
+    parser.add_argument("--clean", type=Path, default=None, help="cleaned CSV (default: the cleaned CSV in PIPELINE_DATA_DIR)")
+    parser.add_argument("--no-db", action="store_true", help="only look in the CSV artifacts")
+    args = parser.parse_args()
+
+    sys.stdout.reconfigure(encoding="utf-8")
+    raw_path = args.raw or resolve_artifact(DATA_DIR / "indemnizatii.csv")
+    clean_path = args.clean or resolve_artifact(DATA_DIR / "indemnizatii_clean.csv")
+
+    if args.no_db and (args.pk is not None or args.candidate_id is not None):
+        sys.exit("--pk and --candidate-id need the database")
+
+    db_rows = None
+    if not args.no_db:
+        try:
+            conn = get_connection()
+        except Exception as e:
+            print(f"Database unavailable ({e}); showing artifacts only.", file=sys.stderr)
+        else:
+            try:
+                db_rows = lookup_db(conn, args)
+            finally:
+                conn.close()
+
+    # Resolve the raw line(s) the lookup refers to
+    if args.line is not None:
+        raw_records = find_raw_records(raw_path, line=args.line) if raw_path.exists() else []
+        lines = {args.line}
+    elif args.raw_hash is not None and db_rows is None:
+        raw_records = find_raw_records(raw_path, hash_=args.raw_hash) if raw_path.exists() else []
+        lines = {start for start, _ in raw_records}
+    else:
+        lines = {r["source_line"] for r in db_rows or [] if r["source_line"] is not None}
+        raw_records = []
+        if raw_path.exists():
+            for line in sorted(lines):
+                raw_records += find_raw_records(raw_path, line=line)
+
+    print(f"=== Raw records ({raw_path}) ===")
+    if not raw_records:
+        print("  none found")
+    for start_line, fields in raw_records:
+        print(f"  line {start_line}  raw_hash={raw_hash(fields)}")
+        print(f"    {fields}")
+
+    print(f"\n=== Cleaned rows ({clean_path}) ===")
+    clean_rows = find_clean_rows(clean_path, lines) if lines and clean_path.exists() else []
+    if not clean_rows:
+        print("  none found")
+    for row in clean_rows:
+        print(f"  line {row['source_line']}  raw_hash={row.get('raw_hash')}")
+        print(f"    {dict((k, v) for k, v in row.items() if k not in ('source_line', 'raw_hash'))}")
+
+    if db_rows is None:
+        return
+
+    print("\n=== Loaded rows (raw.indemnizatii_clean) ===")
+    if not db_rows:
+        print("  none found")
+    for row in db_rows:
+        candidates = row.pop("anomaly_candidates")
+        print(f"  pk={row['pk']}  line {row['source_line']}  raw_hash={row['raw_hash']}")
+        print(f"    {row}")
+        for c in candidates:
+            print(
+                f"    anomaly candidate {c['candidate_id']} (run {c['run_id']}): "
+                f"score={c['anomaly_score']} reasons={c['anomaly_reasons']}"
+            )
+
+        # A different hash means the raw file changed after this row was loaded
+        for start_line, fields in raw_records:
+            if start_line == row["source_line"] and raw_hash(fields) != row["raw_hash"]:
+                print(f"    WARNING: raw line {start_line} no longer matches the loaded record's raw_hash")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,273 @@
+# Single-pass profile of a pipeline CSV artifact (plain, .gz or .zst).
+# One scan of the file computes every diagnostic the old one-off scripts
+# produced separately:
+#   - rows whose column count differs from the header
+#   - empty critical fields (per column and rows with any empty)
+#   - per-column empty and distinct counts, value-length histograms
+#   - cui -> nr_crt mapping coverage (how many blank nr_crt are recoverable)
+#   - CUI set differences against the raw publication
+#
+# Reports are cached in .cache/profiles keyed by the content hash of the
+# artifact (and of the raw file), so re-inspecting an unchanged artifact
+# does not re-parse it.
+#
+# Usage:
+#   python tools/profile_artifact.py                          # cleaned artifact vs raw
+#   python tools/profile_artifact.py data/indemnizatii.csv    # raw file on its own
+#   python tools/profile_artifact.py --json --samples 20
+
+import argparse
+import csv
+import hashlib
+import json
+import os
+import sys
+from pathlib import Path
+
+REPO_ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(REPO_ROOT))
+from scripts.clean.data_clean import canonical_column_name  # noqa: E402
+from scripts.common.artifacts import open_artifact, resolve_artifact  # noqa: E402
+
+DATA_DIR = Path(os.getenv("PIPELINE_DATA_DIR") or REPO_ROOT / "data")
+CACHE_DIR = REPO_ROOT / ".cache" / "profiles"
+
+# Bump when the report layout or any diagnostic changes, to invalidate the cache
+PROFILER_VERSION = 2
+
+# Columns considered essential for a valid record
+CRITICAL_COLUMNS = ["autoritate_tutelara", "intreprindere", "cui", "personal", "calitate_membru"]
+
+HASH_BLOCK = 1024 * 1024
+
+
+# Raw headers ("Nr.Crt", "CUI", ...) map to the cleaned column names the same
+# way data_clean renames them, so both files are profiled by the same keys.
+def column_key(name: str) -> str:
+    return canonical_column_name(name)
+
+
+def file_sha256(path: Path) -> str:
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(HASH_BLOCK), b""):
+            h.update(block)
+    return h.hexdigest()
+
+
+# Length buckets by bit length: 0, 1, 2-3, 4-7, 8-15, ...
+def length_bucket(n: int) -> str:
+    if n < 2:
+        return str(n)
+    bits = n.bit_length()
+    return f"{1 << (bits - 1)}-{(1 << bits) - 1}"
+
+
+def read_cuis(path: Path) -> set[str]:
+    with open_artifact(path) as f:
+        reader = csv.reader(f)
+        header = [column_key(c) for c in next(reader, [])]
+        if "cui" not in header:
+            return set()
+        idx = header.index("cui")
+        return {row[idx].strip() for row in reader if len(row) > idx}
+
+
+def profile(path: Path, raw_path: Path | None, samples: int) -> dict:
+    with open_artifact(path) as f:
+        reader = csv.reader(f)
+        header = next(reader, [])
+        keys = [column_key(c) for c in header]
+        width = len(header)
+
+        empty = [0] * width
+        distinct = [set() for _ in range(width)]
+        lengths = [{} for _ in range(width)]
+
+        critical = [keys.index(c) for c in CRITICAL_COLUMNS if c in keys]
+        critical_empty = {keys[i]: 0 for i in critical}
+        rows_missing_critical = 0
+        missing_critical_samples = []
+
+        cui_idx = keys.index("cui") if "cui" in keys else None
+        nr_idx = keys.index("nr_crt") if "nr_crt" in keys else None
+        cui_to_nrcrt: dict[str, str] = {}
+        blank_nr_cuis: list[str] = []
+
+        rows = 0
+        bad_width = 0
+        bad_width_samples = []
+
+        for row in reader:
+            rows += 1
+            if len(row) != width:
+                bad_width += 1
+                if len(bad_width_samples) < samples:
+                    bad_width_samples.append({"line": reader.line_num, "columns": len(row), "row": row})
+                continue
+
+            for i, value in enumerate(row):
+                n = len(value)
+                if n == 0 or not value.strip():
+                    empty[i] += 1
+                distinct[i].add(value)
+                bucket = length_bucket(n)
+                lengths[i][bucket] = lengths[i].get(bucket, 0) + 1
+
+            missing = [keys[i] for i in critical if not row[i].strip()]
+            if missing:
+                rows_missing_critical += 1
+                for name in missing:
+                    critical_empty[name] += 1
+                if len(missing_critical_samples) < samples:
+                    missing_critical_samples.append({"line": reader.line_num, "empty": missing, "row": row})
+
+            if cui_idx is not None and nr_idx is not None:
+                cui = row[cui_idx].strip()
+                nr_crt = row[nr_idx].strip()
+                if nr_crt:
+                    cui_to_nrcrt.setdefault(cui, row[nr_idx])
+                else:
+                    blank_nr_cuis.append(cui)
+
+    report = {
+        "path": str(path),
+        "rows": rows,
+        "columns": keys,
+        "header": header,
+        "column_count_anomalies": {"rows": bad_width, "expected": width, "samples": bad_width_samples},
+        "critical_fields": {
+            "columns": list(critical_empty),
+            "empty_by_column": critical_empty,
+            "rows_with_any_empty": rows_missing_critical,
+            "samples": missing_critical_samples,
+        },
+        "column_stats": {
+            keys[i]: {
+                "empty": empty[i],
+                "distinct": len(distinct[i]),
+                "length_histogram": dict(sorted(lengths[i].items(), key=lambda kv: int(kv[0].split("-")[0]))),
+            }
+            for i in range(width)
+        },
+    }
+
+    if cui_idx is not None and nr_idx is not None:
+        recoverable = sum(1 for cui in blank_nr_cuis if cui in cui_to_nrcrt)
+        report["nr_crt_mapping"] = {
+            "mapping_size": len(cui_to_nrcrt),
+            "blank_nr_crt": len(blank_nr_cuis),
+            "recoverable": recoverable,
+            "unrecoverable": len(blank_nr_cuis) - recoverable,
+            "sample": dict(list(cui_to_nrcrt.items())[:samples]),
+        }
+
+    if raw_path is not None and cui_idx is not None:
+        raw_cuis = read_cuis(raw_path)
+        cuis = {c.strip() for c in distinct[cui_idx]}
+        report["cui_diff_vs_raw"] = {
+            "raw_path": str(raw_path),
+            "missing_from_artifact": sorted(raw_cuis - cuis),
+            "not_in_raw": sorted(cuis - raw_cuis),
+        }
+
+    return report
+
+
+def cache_key(path: Path, raw_path: Path | None, samples: int) -> str:
+    parts = [str(PROFILER_VERSION), file_sha256(path), file_sha256(raw_path) if raw_path else "", str(samples)]
+    return hashlib.sha256("|".join(parts).encode("ascii")).hexdigest()
+
+
+def load_or_profile(path: Path, raw_path: Path | None, samples: int, use_cache: bool) -> tuple[dict, bool]:
+    key = cache_key(path, raw_path, samples)
+    cache_file = CACHE_DIR / f"{key}.json"
+    if use_cache and cache_file.exists():
+        return json.loads(cache_file.read_text(encoding="utf-8")), True
+
+    report = profile(path, raw_path, samples)
+    report["cache_key"] = key
+    CACHE_DIR.mkdir(parents=True, exist_ok=True)
+    tmp = cache_file.with_suffix(".tmp")
+    tmp.write_text(json.dumps(report, ensure_ascii=False), encoding="utf-8")
+    tmp.replace(cache_file)
+    return report, False
+
+
+def print_report(report: dict, cached: bool) -> None:
+    print(f"Profile of {report['path']}{' (cached)' if cached else ''}")
+    print(f"Rows: {report['rows']}, Columns: {len(report['columns'])}")
+    print()
+
+    anomalies = report["column_count_anomalies"]
+    print(f"=== Column count anomalies (expected {anomalies['expected']}) ===")
+    print(f"Rows with a different column count: {anomalies['rows']}")
+    for s in anomalies["samples"]:
+        print(f"  Line {s['line']} has {s['columns']} columns: {s['row']}")
+    print()
+
+    crit = report["critical_fields"]
+    print("=== Empty critical fields ===")
+    print(f"Rows with at least one empty key field: {crit['rows_with_any_empty']}")
+    for name, count in crit["empty_by_column"].items():
+        print(f"  {name:<24} {count}")
+    for s in crit["samples"]:
+        print(f"  Line {s['line']} empty {s['empty']}: {s['row']}")
+    print()
+
+    mapping = report.get("nr_crt_mapping")
+    if mapping:
+        print("=== cui -> nr_crt mapping ===")
+        print(f"Mapping size: {mapping['mapping_size']} entries")
+        print(f"Blank nr_crt: {mapping['blank_nr_crt']} "
+              f"(recoverable {mapping['recoverable']}, unrecoverable {mapping['unrecoverable']})")
+        print(f"Sample mappings: {mapping['sample']}")
+        print()
+
+    diff = report.get("cui_diff_vs_raw")
+    if diff:
+        print(f"=== CUI differences vs {diff['raw_path']} ===")
+        print(f"In raw, missing from artifact ({len(diff['missing_from_artifact'])}): {diff['missing_from_artifact']}")
+        print(f"In artifact, not in raw ({len(diff['not_in_raw'])}): {diff['not_in_raw']}")
+        print()
+
+    print("=== Columns ===")
+    print(f"  {'column':<28} {'empty':>8} {'distinct':>9}  lengths")
+    for name, stats in report["column_stats"].items():
+        hist = " ".join(f"{k}:{v}" for k, v in stats["length_histogram"].items())
+        print(f"  {name:<28} {stats['empty']:>8} {stats['distinct']:>9}  {hist}")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Profile a pipeline CSV artifact in a single pass")
+    parser.add_argument("path", type=Path, nargs="?", default=None,
+                        help="artifact to profile (default: the cleaned CSV in PIPELINE_DATA_DIR)")
+    parser.add_argument("--raw", type=Path, default=None,
+                        help="raw CSV for the CUI comparison (default: the raw CSV in PIPELINE_DATA_DIR)")
+    parser.add_argument("--no-raw", action="store_true", help="skip the CUI comparison against raw")
+    parser.add_argument("--samples", type=int, default=10, help="sample rows kept per diagnostic (default 10)")
+    parser.add_argument("--no-cache", action="store_true", help="always re-scan, ignoring cached reports")
+    parser.add_argument("--json", action="store_true", help="print the report as JSON")
+    args = parser.parse_args()
+
+    # stdout may not be UTF-8 on Windows consoles; the data has diacritics
+    sys.stdout.reconfigure(encoding="utf-8")
+
+    path = args.path or resolve_artifact(DATA_DIR / "indemnizatii_clean.csv")
+    raw_path = None
+    if not args.no_raw:
+        raw_path = args.raw or resolve_artifact(DATA_DIR / "indemnizatii.csv")
+        if raw_path.resolve() == path.resolve() or not raw_path.exists():
+            raw_path = None
+    if not path.exists():
+        sys.exit(f"Artifact not found: {path}")
+
+    report, cached = load_or_profile(path, raw_path, args.samples, use_cache=not args.no_cache)
+    if args.json:
+        print(json.dumps(report, indent=2, ensure_ascii=False))
+    else:
+        print_report(report, cached)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,176 @@
+# Query the Parquet export of the dbt marts (scripts/export/export_analytics.py)
+# without touching Postgres.
+#
+# Filters are pushed down to the Parquet reader: row groups and pages whose
+# min/max statistics cannot match are skipped, and only the referenced
+# columns are decoded. Exports are sorted by reporting year, then company, so
+# filters on those columns read a small fraction of a large table.
+#
+# Usage:
+#   python tools/query_export.py --list
+#   python tools/query_export.py top_earners --where an_raportare=2025 --order-by total_salary:desc --limit 10
+#   python tools/query_export.py fact_indemnizatii --where an_raportare=2025 --where total_plata>=100000 \
+#       --group-by company_id --agg total_plata:sum --agg pk:count --order-by total_plata_sum:desc
+#   python tools/query_export.py compensation_yoy --columns person_id,company_id,pct_change --format csv
+
+import argparse
+import json
+import operator
+import os
+import re
+import sys
+import time
+from pathlib import Path
+
+REPO_ROOT = Path(__file__).resolve().parents[1]
+DATA_DIR = Path(os.getenv("PIPELINE_DATA_DIR") or REPO_ROOT / "data")
+EXPORT_DIR = Path(os.getenv("PIPELINE_EXPORT_DIR") or DATA_DIR / "analytics")
+MANIFEST_NAME = "_manifest.json"
+
+# Longest operators first so ">=" is not read as ">"
+WHERE_PATTERN = re.compile(r"^\s*(\w+)\s*(>=|<=|!=|=|>|<)\s*(.*?)\s*$")
+OPERATORS = {
+    "=": operator.eq,
+    "!=": operator.ne,
+    ">=": operator.ge,
+    "<=": operator.le,
+    ">": operator.gt,
+    "<": operator.lt,
+}
+AGGREGATES = ("sum", "mean", "min", "max", "count", "count_distinct")
+
+
+def load_manifest(export_dir: Path) -> dict:
+    path = export_dir / MANIFEST_NAME
+    if not path.exists():
+        sys.exit(f"No export found in {export_dir}; run the export stage first (PIPELINE_EXPORT=1).")
+    return json.loads(path.read_text(encoding="utf-8"))
+
+
+def list_tables(manifest: dict) -> None:
+    print(f"schema={manifest['schema']} exported_at={manifest['exported_at']}")
+    for name, entry in sorted(manifest["tables"].items()):
+        sort_by = ", ".join(entry["sort_by"]) or "-"
+        print(f"  {name:<28} {entry['rows']:>10} rows  {entry['bytes'] / 1024:>9.1f} KiB  sorted by {sort_by}")
+
+
+# "col>=value" -> dataset filter expression, with the value cast to the
+# column's type so comparisons run on typed data
+def parse_where(clauses: list[str], schema):
+    import pyarrow as pa
+    import pyarrow.dataset as ds
+
+    expr = None
+    for clause in clauses:
+        m = WHERE_PATTERN.match(clause)
+        if not m:
+            sys.exit(f"Invalid --where {clause!r}; expected <column><op><value> with op one of {list(OPERATORS)}")
+        column, op, raw = m.groups()
+        if column not in schema.names:
+            sys.exit(f"Unknown column in --where: {column}")
+        value = pa.scalar(raw).cast(schema.field(column).type)
+        term = OPERATORS[op](ds.field(column), value)
+        expr = term if expr is None else expr & term
+    return expr
+
+
+def parse_aggregates(specs: list[str], schema) -> list[tuple[str, str]]:
+    aggregates = []
+    for spec in specs:
+        column, _, fn = spec.partition(":")
+        if column not in schema.names or fn not in AGGREGATES:
+            sys.exit(f"Invalid --agg {spec!r}; expected <column>:<{'|'.join(AGGREGATES)}>")
+        aggregates.append((column, fn))
+    return aggregates
+
+
+def parse_order(specs: list[str]) -> list[tuple[str, str]]:
+    order = []
+    for spec in specs:
+        column, _, direction = spec.partition(":")
+        order.append((column, "descending" if direction == "desc" else "ascending"))
+    return order
+
+
+def print_table(table, fmt: str) -> None:
+    if fmt == "csv":
+        table.to_pandas().to_csv(sys.stdout, index=False)
+    elif fmt == "json":
+        for row in table.to_pylist():
+            print(json.dumps(row, ensure_ascii=False, default=str))
+    else:
+        import pandas as pd
+
+        with pd.option_context("display.max_columns", None, "display.width", 200):
+            print(table.to_pandas().to_string(index=False))
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Query the Parquet export of the dbt marts")
+    parser.add_argument("table", nargs="?", help="exported table, e.g. top_earners")
+    parser.add_argument("--list", action="store_true", help="list exported tables")
+    parser.add_argument("--dir", type=Path, default=EXPORT_DIR, help="export directory (default: %(default)s)")
+    parser.add_argument("--columns", default=None, help="comma-separated columns to return (default: all)")
+    parser.add_argument("--where", action="append", default=[], help="filter <column><op><value>, op in = != >= <= > < (repeatable, ANDed)")
+    parser.add_argument("--group-by", default=None, help="comma-separated grouping columns")
+    parser.add_argument("--agg", action="append", default=[], help="aggregate <column>:<fn>, fn in " + ", ".join(AGGREGATES))
+    parser.add_argument("--order-by", action="append", default=[], help="sort <column>[:desc] (repeatable)")
+    parser.add_argument("--limit", type=int, default=20, help="rows to print, 0 for all (default: %(default)s)")
+    parser.add_argument("--format", choices=["table", "csv", "json"], default="table")
+    args = parser.parse_args()
+
+    sys.stdout.reconfigure(encoding="utf-8")
+    manifest = load_manifest(args.dir)
+    if args.list or not args.table:
+        list_tables(manifest)
+        return
+    if args.table not in manifest["tables"]:
+        sys.exit(f"Table {args.table!r} is not in the export; see --list")
+
+    import pyarrow.dataset as ds
+
+    started = time.perf_counter()
+    dataset = ds.dataset(args.dir / manifest["tables"][args.table]["file"], format="parquet")
+    schema = dataset.schema
+
+    expr = parse_where(args.where, schema)
+    group_by = args.group_by.split(",") if args.group_by else []
+    aggregates = parse_aggregates(args.agg, schema)
+    order = parse_order(args.order_by)
+    columns = args.columns.split(",") if args.columns else None
+
+    if group_by or aggregates:
+        needed = group_by + [c for c, _ in aggregates]
+    else:
+        needed = columns or schema.names
+    unknown = [c for c in needed if c not in schema.names]
+    if unknown:
+        sys.exit(f"Unknown columns: {unknown}")
+
+    # Row groups the filter can match, from the footer statistics alone
+    fragments = list(dataset.get_fragments())
+    total_groups = sum(f.num_row_groups for f in fragments)
+    read_groups = sum(len(f.split_by_row_group(expr)) for f in fragments) if expr is not None else total_groups
+
+    table = dataset.to_table(columns=list(dict.fromkeys(needed)), filter=expr)
+    scanned = table.num_rows
+    if group_by or aggregates:
+        table = table.group_by(group_by).aggregate(aggregates)
+        if columns:
+            table = table.select(columns)
+    if order:
+        table = table.sort_by(order)
+    if args.limit:
+        table = table.slice(0, args.limit)
+
+    print_table(table, args.format)
+    elapsed = time.perf_counter() - started
+    print(
+        f"[query] table={args.table} rows_matched={scanned} row_groups={read_groups}/{total_groups} "
+        f"elapsed_ms={elapsed * 1000:.1f}",
+        file=sys.stderr,
+    )
+
+
+if __name__ == "__main__":
+    main()